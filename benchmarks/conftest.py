@@ -0,0 +1,180 @@
+"""Benchmark conftest — repeated timings of nit commands, gated on baselines."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from benchmarks.harness import BaselineStore, Benchmark, BenchSession, environment
+from tests.manifests import ProjectManifest, select_projects
+from tests.nit_runner import SubprocessBackend
+from tests.project_fixtures import SELECTED_PROJECTS, BuildOutputSeeder
+from tests.snapshots import Snapshot, SnapshotStore
+
+pytest_plugins = ["tests.project_fixtures"]
+
+BENCHMARKS_ROOT = Path(__file__).resolve().parent
+EXAMPLES_ROOT = BENCHMARKS_ROOT.parent
+
+_BENCH_SESSION = pytest.StashKey[BenchSession]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("nit-bench", "nit command benchmarks")
+    group.addoption(
+        "--bench-project",
+        action="append",
+        default=[],
+        dest="bench_projects",
+        metavar="NAME",
+        help="Only benchmark the named example project (repeatable). "
+        "Use the --bench-project=NAME form.",
+    )
+    group.addoption(
+        "--bench-repeat",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Timed runs per case; the median is compared (default: 5).",
+    )
+    group.addoption(
+        "--bench-warmup",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Untimed runs per case before measuring (default: 1).",
+    )
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=float(os.environ.get("NIT_BENCH_THRESHOLD", "0.25")),
+        metavar="FRACTION",
+        help="Fail when a median is this much slower than its baseline "
+        "(default: 0.25 = 25%%). Env: NIT_BENCH_THRESHOLD.",
+    )
+    group.addoption(
+        "--bench-min-delta",
+        type=float,
+        default=0.05,
+        metavar="SECONDS",
+        help="Ignore regressions smaller than this many seconds (default: 0.05).",
+    )
+    group.addoption(
+        "--bench-baseline-dir",
+        default=str(BENCHMARKS_ROOT / "baselines"),
+        metavar="DIR",
+        help="Where baseline JSON files live (default: benchmarks/baselines).",
+    )
+    group.addoption(
+        "--bench-save",
+        action="store_true",
+        default=False,
+        help="Record this run's medians as the new baselines instead of "
+        "comparing against them.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("bench_repeat") < 1:
+        raise pytest.UsageError("--bench-repeat must be at least 1")
+    try:
+        config.stash[SELECTED_PROJECTS] = select_projects(config.getoption("bench_projects"))
+    except KeyError as exc:
+        raise pytest.UsageError(exc.args[0]) from exc
+    store = BaselineStore(Path(config.getoption("bench_baseline_dir")))
+    config.stash[_BENCH_SESSION] = BenchSession(store)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Write baselines when ``--bench-save`` was given."""
+    config = session.config
+    bench = config.stash.get(_BENCH_SESSION, None)
+    if bench is None or not bench.results or not config.getoption("bench_save"):
+        return
+    meta = environment(_nit_version())
+    for project, cases in bench.results.items():
+        bench.store.save(project, cases.items(), meta)
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+    """Show every median next to its baseline."""
+    bench = config.stash.get(_BENCH_SESSION, None)
+    if bench is None or not bench.results:
+        return
+    tr = terminalreporter
+    tr.section("nit benchmarks")
+    tr.write_line(
+        f"{'project':<16} {'case':<16} {'median s':>9} {'stdev':>7} "
+        f"{'baseline':>9} {'change':>7}"
+    )
+    for project, cases in sorted(bench.results.items()):
+        for case, m in cases.items():
+            baseline = bench.store.median(project, case)
+            if baseline is None or config.getoption("bench_save"):
+                base_col, change_col = "-", "-"
+            else:
+                base_col = f"{baseline:.3f}"
+                change_col = f"{m.median / baseline - 1:+.0%}" if baseline else "-"
+            tr.write_line(
+                f"{project:<16} {case:<16} {m.median:>9.3f} {m.stdev:>7.3f} "
+                f"{base_col:>9} {change_col:>7}"
+            )
+    if config.getoption("bench_save"):
+        tr.write_line(f"baselines written to {bench.store.root}")
+    for regression in bench.regressions:
+        tr.write_line(f"REGRESSION {regression}", red=True)
+
+
+def _nit_version() -> str:
+    """``nit --version`` output, recorded alongside the baselines."""
+    try:
+        result = SubprocessBackend().execute(
+            ("--version",), cwd=EXAMPLES_ROOT, timeout=30,
+        )
+    except Exception:
+        return "unknown"
+    return result.stdout.strip() or "unknown"
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(scope="session")
+def bench_backend() -> Iterator[SubprocessBackend]:
+    """Always a fresh process per command — that is what users pay for."""
+    backend = SubprocessBackend()
+    yield backend
+    backend.close()
+
+
+@pytest.fixture()
+def benchmark(
+    pytestconfig: pytest.Config,
+    project_manifest: ProjectManifest,
+    project_snapshot: Snapshot,
+    snapshot_store: SnapshotStore,
+    bench_backend: SubprocessBackend,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Benchmark:
+    """Benchmark helper bound to the current project."""
+
+    def clone() -> Path:
+        dst = tmp_path_factory.mktemp(project_manifest.name)
+        return snapshot_store.clone(project_snapshot, dst)
+
+    return Benchmark(
+        manifest=project_manifest,
+        clone=clone,
+        listeners=lambda path: [BuildOutputSeeder(snapshot_store, project_snapshot, path)],
+        backend=bench_backend,
+        bench=pytestconfig.stash[_BENCH_SESSION],
+        config=pytestconfig,
+    )
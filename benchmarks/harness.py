@@ -0,0 +1,252 @@
+"""Benchmark harness — timing samples, stored baselines and regression checks.
+
+A baseline file holds the measurements of one stack
+(``baselines/<project>.json``), keyed by benchmark case::
+
+    {
+      "meta": {"nit_version": "...", "python": "3.12.1", ...},
+      "cases": {"scan-cold": {"median": 1.84, "min": 1.79, ...}, ...}
+    }
+
+Only medians are compared; the other statistics are kept to judge how
+noisy a case is when reading a regression report.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tests.manifests import ProjectManifest
+from tests.nit_runner import NitListener, NitResult, NitRunner, SubprocessBackend
+
+Step = Callable[[NitRunner], object]
+
+
+@dataclass(frozen=True)
+class Measurement:
+    """Wall-clock samples of one benchmark case, in seconds."""
+
+    samples: tuple[float, ...]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def minimum(self) -> float:
+        return min(self.samples)
+
+    @property
+    def maximum(self) -> float:
+        return max(self.samples)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "median": round(self.median, 4),
+            "min": round(self.minimum, 4),
+            "max": round(self.maximum, 4),
+            "stdev": round(self.stdev, 4),
+            "samples": [round(s, 4) for s in self.samples],
+        }
+
+
+@dataclass(frozen=True)
+class Regression:
+    """A median that got slower than its baseline allows."""
+
+    project: str
+    case: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.project}/{self.case}: median {self.current:.3f}s vs "
+            f"baseline {self.baseline:.3f}s ({self.ratio - 1:+.0%})"
+        )
+
+
+def check_regression(
+    project: str,
+    case: str,
+    measurement: Measurement,
+    baseline: float | None,
+    *,
+    threshold: float,
+    min_delta: float,
+) -> Regression | None:
+    """Compare *measurement* against a baseline median.
+
+    A case regresses when its median exceeds the baseline by more than
+    *threshold* (a fraction, 0.25 = 25 %) **and** by more than *min_delta*
+    seconds, so that sub-second commands don't fail on scheduler jitter.
+    """
+    if baseline is None:
+        return None
+    current = measurement.median
+    if current <= baseline * (1 + threshold) or current - baseline <= min_delta:
+        return None
+    return Regression(project, case, baseline, current)
+
+
+def environment(nit_version: str) -> dict[str, Any]:
+    """Describe the machine a baseline was recorded on."""
+    return {
+        "nit_version": nit_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+class BaselineStore:
+    """Per-stack baseline files under one directory."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._loaded: dict[str, dict[str, Any]] = {}
+
+    def path(self, project: str) -> Path:
+        return self.root / f"{project}.json"
+
+    def median(self, project: str, case: str) -> float | None:
+        """Baseline median of *case* for *project*, if one was recorded."""
+        entry = self._load(project).get("cases", {}).get(case)
+        return None if entry is None else float(entry["median"])
+
+    def save(
+        self,
+        project: str,
+        results: Iterable[tuple[str, Measurement]],
+        meta: dict[str, Any],
+    ) -> Path:
+        """Merge *results* into the project's baseline file.
+
+        Cases that were not measured in this run keep their old values,
+        so a ``-k`` filtered run only refreshes what it measured.
+        """
+        data = self._load(project)
+        cases = dict(data.get("cases", {}))
+        for case, measurement in results:
+            cases[case] = measurement.to_json()
+        data = {"meta": meta, "cases": dict(sorted(cases.items()))}
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(project)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, indent=2) + "\n")
+        tmp.replace(path)
+        self._loaded[project] = data
+        return path
+
+    def _load(self, project: str) -> dict[str, Any]:
+        if project not in self._loaded:
+            path = self.path(project)
+            self._loaded[project] = (
+                json.loads(path.read_text()) if path.is_file() else {}
+            )
+        return self._loaded[project]
+
+
+@dataclass
+class BenchSession:
+    """Everything measured in one pytest session."""
+
+    store: BaselineStore
+    results: dict[str, dict[str, Measurement]] = field(default_factory=dict)
+    regressions: list[Regression] = field(default_factory=list)
+
+
+class Benchmark:
+    """Times one nit command on fresh clones of a project.
+
+    Each case is timed from ``NitResult.usage.wall_seconds`` — the
+    backend's own measurement of the nit process, excluding the harness's
+    cloning and preparation steps. *listeners* gives the listeners for
+    the runner of each clone (e.g. one that seeds its build output).
+    """
+
+    def __init__(
+        self,
+        *,
+        manifest: ProjectManifest,
+        clone: Callable[[], Path],
+        backend: SubprocessBackend,
+        bench: BenchSession,
+        config: pytest.Config,
+        listeners: Callable[[Path], Sequence[NitListener]] = lambda path: (),
+    ) -> None:
+        self.manifest = manifest
+        self.clone = clone
+        self.listeners = listeners
+        self.backend = backend
+        self.bench = bench
+        self.repeat: int = config.getoption("bench_repeat")
+        self.warmup: int = config.getoption("bench_warmup")
+        self.threshold: float = config.getoption("bench_threshold")
+        self.min_delta: float = config.getoption("bench_min_delta")
+        self.save: bool = config.getoption("bench_save")
+
+    def __call__(
+        self,
+        case: str,
+        measure: Callable[[NitRunner], NitResult],
+        *,
+        prepare: Step | None = None,
+        fresh: bool = False,
+    ) -> Measurement:
+        """Run *measure* ``warmup + repeat`` times and gate the median.
+
+        *prepare* brings a clone into the state the command expects (e.g.
+        ``init`` before ``scan``). With *fresh*, every run gets a new
+        clone — for commands whose second run would hit a different code
+        path than the first (``init``).
+        """
+        samples: list[float] = []
+        nit: NitRunner | None = None
+        for i in range(self.warmup + self.repeat):
+            if nit is None or fresh:
+                path = self.clone()
+                nit = NitRunner(path, backend=self.backend, listeners=self.listeners(path))
+                if prepare is not None:
+                    prepare(nit)
+            result = measure(nit)
+            assert result.exit_code in (0, 1), (
+                f"{case} crashed (exit={result.exit_code}):\n{result.stderr}"
+            )
+            assert result.usage is not None
+            if i >= self.warmup:
+                samples.append(result.usage.wall_seconds)
+
+        measurement = Measurement(tuple(samples))
+        project = self.manifest.name
+        self.bench.results.setdefault(project, {})[case] = measurement
+        if not self.save:
+            regression = check_regression(
+                project,
+                case,
+                measurement,
+                self.bench.store.median(project, case),
+                threshold=self.threshold,
+                min_delta=self.min_delta,
+            )
+            if regression is not None:
+                self.bench.regressions.append(regression)
+                pytest.fail(f"performance regression: {regression}")
+        return measurement
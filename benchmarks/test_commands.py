@@ -0,0 +1,62 @@
+"""Benchmarks: wall time of the everyday nit commands, per stack."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pytest
+
+from benchmarks.harness import Benchmark
+from tests.nit_runner import NitResult, NitRunner
+from tests.project_fixtures import init_git_repo
+
+
+def _init(nit: NitRunner) -> None:
+    nit.init()
+
+
+def _init_and_scan(nit: NitRunner) -> None:
+    nit.init()
+    nit.scan(force=True)
+
+
+def _init_and_run(nit: NitRunner) -> None:
+    nit.init()
+    nit.run_tests()
+
+
+def _git_and_init(nit: NitRunner) -> None:
+    init_git_repo(nit.project_dir)
+    nit.init()
+
+
+@dataclass(frozen=True)
+class Case:
+    """One timed command and the state it runs on."""
+
+    name: str
+    measure: Callable[[NitRunner], NitResult]
+    prepare: Callable[[NitRunner], None] | None = None
+    fresh: bool = False
+
+
+CASES = [
+    # A second init on the same tree takes the "already initialized" path.
+    Case("init", lambda nit: nit.init(), fresh=True),
+    Case("scan-cold", lambda nit: nit.scan(force=True), prepare=_init),
+    Case("scan-cached", lambda nit: nit.scan(), prepare=_init_and_scan),
+    Case("run", lambda nit: nit.run_tests(), prepare=_init),
+    Case("report-html", lambda nit: nit.report_html(), prepare=_init_and_run),
+    Case("memory-show", lambda nit: nit.memory_show(), prepare=_init),
+    Case(
+        "docs-changelog",
+        lambda nit: nit.docs_changelog("v0.0.0", no_llm=True),
+        prepare=_git_and_init,
+    ),
+]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c.name for c in CASES])
+def test_command(benchmark: Benchmark, case: Case) -> None:
+    benchmark(case.name, case.measure, prepare=case.prepare, fresh=case.fresh)
@@ -0,0 +1,91 @@
+"""Benchmark the validators against their uncompiled originals.
+
+Usage (after ``pip install -e .``)::
+
+    python benchmarks/bench_validators.py --records 200000
+"""
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+from typing import Any
+
+from api.services.auth import validate_email
+from api.services.validators import validate_age, validate_phone, validate_username
+
+# The patterns as the validators matched them before they were precompiled.
+USERNAME_PATTERN = r'^[a-zA-Z0-9_-]+$'
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+PHONE_PATTERN = r'^\+?1?\d{9,15}$'
+
+
+def sample_records(count: int) -> list[dict[str, Any]]:
+    """Signup-like records, roughly one in ten invalid per field."""
+    return [
+        {
+            'username': f"user_{i}" if i % 10 else "x!",
+            'email': f"user{i}@example.com" if i % 11 else "user-at-example",
+            'phone': f"+1555{i % 10**7:07d}" if i % 12 else "555",
+            'age': 20 + i % 60 if i % 13 else 200,
+        }
+        for i in range(count)
+    ]
+
+
+def uncompiled(records: list[dict[str, Any]]) -> list[int]:
+    return [
+        i for i, r in enumerate(records)
+        if not (
+            3 <= len(r['username']) <= 20
+            and re.match(USERNAME_PATTERN, r['username'])
+            and re.match(EMAIL_PATTERN, r['email'])
+            and re.match(PHONE_PATTERN, r['phone'])
+            and validate_age(r['age'])
+        )
+    ]
+
+
+def precompiled(records: list[dict[str, Any]]) -> list[int]:
+    return [
+        i for i, r in enumerate(records)
+        if not (
+            validate_username(r['username'])
+            and validate_email(r['email'])
+            and validate_phone(r['phone'])
+            and validate_age(r['age'])
+        )
+    ]
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> tuple[float, Any]:
+    """Fastest of *repeat* runs of *func*, with its result."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="runs per approach; the fastest is reported")
+    args = parser.parse_args(argv)
+    records = sample_records(args.records)
+
+    results = {
+        'uncompiled': best_of(args.repeat, lambda: uncompiled(records)),
+        'precompiled': best_of(args.repeat, lambda: precompiled(records)),
+    }
+    invalid = results['precompiled'][1]
+    assert results['uncompiled'][1] == invalid
+    for label, (seconds, _) in results.items():
+        print(f"{label:>12}: {seconds:.3f} s ({args.records / seconds:,.0f} records/s)")
+    print(f"{len(invalid)} of {args.records} records invalid")
+
+
+if __name__ == '__main__':
+    main()
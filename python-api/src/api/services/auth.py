@@ -4,8 +4,19 @@ These functions are intentionally left untested for nit to generate tests.
 """
 
 import hashlib
+import itertools
+import os
+import re
 import secrets
+import time
+from collections import deque
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from typing import Any
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
 
 def hash_password(password: str, salt: str | None = None) -> tuple[str, str]:
@@ -41,6 +52,79 @@ def is_token_expired(issued_at: datetime, expiry_hours: int = 24) -> bool:
 
 def validate_email(email: str) -> bool:
     """Validate email format."""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_RE.match(email) is not None
+
+
+@dataclass(frozen=True)
+class BatchProgress:
+    """How far a bulk hashing run has got."""
+
+    records: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+def _hash_chunk(
+    hasher: Callable[[str], Any], chunk: list[tuple[Hashable, str]]
+) -> list[tuple[Hashable, Any]]:
+    return [(user, hasher(password)) for user, password in chunk]
+
+
+def hash_passwords(
+    records: Iterable[tuple[Hashable, str]],
+    *,
+    workers: int | None = None,
+    chunk_size: int = 64,
+    max_pending: int | None = None,
+    ordered: bool = True,
+    hasher: Callable[[str], Any] = hash_password,
+    progress: Callable[[BatchProgress], None] | None = None,
+) -> Iterator[tuple[Hashable, Any]]:
+    """Hash many (user, password) records on all cores.
+
+    Records are read lazily in chunks of ``chunk_size`` and hashed on a
+    process pool; at most ``max_pending`` chunks (default: two per
+    worker) are in flight, so a huge import never sits in memory at once.
+    Yields ``(user, hasher(password))`` in input order, or as chunks
+    finish when ``ordered`` is false. ``hasher`` must be picklable, e.g.
+    ``passwords.hash_password`` to import straight into the encoded
+    format. ``progress`` is called after every chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    it = iter(records)
+    chunks = iter(lambda: list(itertools.islice(it, chunk_size)), [])
+    started = time.perf_counter()
+    done = 0
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque[Future] = deque()
+
+    def fill() -> None:
+        while len(pending) < max_pending:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            pending.append(pool.submit(_hash_chunk, hasher, chunk))
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = finished.pop()
+                pending.remove(future)
+            results = future.result()
+            fill()
+            done += len(results)
+            if progress is not None:
+                progress(BatchProgress(done, time.perf_counter() - started))
+            yield from results
+    finally:
+        # Stopped early: drop the chunks no worker has started yet.
+        pool.shutdown(cancel_futures=True)
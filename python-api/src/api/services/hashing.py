@@ -0,0 +1,182 @@
+"""Non-blocking password hashing for async endpoints.
+
+``hash_password`` and ``verify_password`` run PBKDF2 synchronously, which
+stalls the event loop for the whole computation when called from an
+async endpoint. ``HashingPool`` runs them on a bounded executor instead:
+threads by default (hashlib releases the GIL while hashing), or
+processes. Requests beyond what the pool can serve in time are rejected
+with ``PoolOverloaded`` (an endpoint would answer 503) instead of piling
+up in the queue.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from .auth import hash_password, verify_password
+
+# Weight of the newest sample in the moving average of hashing time.
+_EWMA_ALPHA = 0.2
+
+T = TypeVar('T')
+
+
+class PoolOverloaded(RuntimeError):
+    """The pool refused a request to keep queueing delay bounded."""
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Snapshot of a HashingPool's load and history."""
+
+    workers: int
+    max_queue: int
+    in_flight: int
+    queued: int
+    completed: int
+    rejected: int
+    mean_wait_ms: float
+    mean_service_ms: float
+
+
+def _timed(func: Callable[..., T], *args: Any) -> tuple[float, T]:
+    """Run func in a worker; return when it started and its result."""
+    started = time.monotonic()
+    return started, func(*args)
+
+
+class HashingPool:
+    """Bounded executor for password hashing with admission control.
+
+    At most ``max_workers`` hashes run at once and at most ``max_queue``
+    more wait for a worker. A request is also refused when the expected
+    wait (queued requests per worker times the average hashing time)
+    exceeds ``max_wait`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_queue: int | None = None,
+        *,
+        max_wait: float | None = None,
+        processes: bool = False,
+    ):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self.max_wait = max_wait
+        executor_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._executor: Executor = executor_cls(max_workers=self.max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._service_ewma = 0.0
+
+    async def hash_password(self, password: str, salt: str | None = None) -> tuple[str, str]:
+        """Async counterpart of ``auth.hash_password``."""
+        return await self._submit(hash_password, password, salt)
+
+    async def verify_password(self, password: str, hashed: str, salt: str) -> bool:
+        """Async counterpart of ``auth.verify_password``."""
+        return await self._submit(verify_password, password, hashed, salt)
+
+    def stats(self) -> PoolStats:
+        """Current queue depth plus counters since the pool was created."""
+        with self._lock:
+            return PoolStats(
+                workers=self.max_workers,
+                max_queue=self.max_queue,
+                in_flight=self._in_flight,
+                queued=max(0, self._in_flight - self.max_workers),
+                completed=self._completed,
+                rejected=self._rejected,
+                mean_wait_ms=(
+                    self._wait_total / self._completed * 1000 if self._completed else 0.0
+                ),
+                mean_service_ms=self._service_ewma * 1000,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _admit(self) -> None:
+        with self._lock:
+            queued = self._in_flight - self.max_workers + 1
+            expected_wait = max(0, queued) / self.max_workers * self._service_ewma
+            if queued > self.max_queue or (
+                self.max_wait is not None and expected_wait > self.max_wait
+            ):
+                self._rejected += 1
+                raise PoolOverloaded(
+                    f"hashing pool overloaded: {self._in_flight} in flight, "
+                    f"expected wait {expected_wait * 1000:.0f} ms"
+                )
+            self._in_flight += 1
+
+    async def _submit(self, func: Callable[..., T], *args: Any) -> T:
+        self._admit()
+        submitted = time.monotonic()
+        try:
+            future = self._executor.submit(_timed, func, *args)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        # Accounted when the job itself ends: a cancelled caller does not
+        # stop a hash that is already running.
+        future.add_done_callback(functools.partial(self._finished, submitted))
+        _, result = await asyncio.wrap_future(future)
+        return result
+
+    def _finished(self, submitted: float, future: Future[tuple[float, Any]]) -> None:
+        finished = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            started, _ = future.result()
+            self._completed += 1
+            self._wait_total += max(0.0, started - submitted)
+            service = finished - started
+            self._service_ewma = (
+                service if self._completed == 1
+                else _EWMA_ALPHA * service + (1 - _EWMA_ALPHA) * self._service_ewma
+            )
+
+
+_default_pool: HashingPool | None = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> HashingPool:
+    """The shared pool, created with default settings on first use."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = HashingPool()
+        return _default_pool
+
+
+def set_default_pool(pool: HashingPool) -> None:
+    """Replace the shared pool, e.g. with one configured at app startup."""
+    global _default_pool
+    with _default_lock:
+        _default_pool = pool
+
+
+async def hash_password_async(password: str, salt: str | None = None) -> tuple[str, str]:
+    """Hash a password on the shared pool without blocking the event loop."""
+    return await default_pool().hash_password(password, salt)
+
+
+async def verify_password_async(password: str, hashed: str, salt: str) -> bool:
+    """Verify a password on the shared pool without blocking the event loop."""
+    return await default_pool().verify_password(password, hashed, salt)
@@ -0,0 +1,217 @@
+"""Self-describing password hashes with tunable cost.
+
+Hashes are encoded PHC-style, so each one carries everything needed to
+verify it::
+
+    $pbkdf2-sha256$i=600000$<salt>$<digest>
+    $scrypt$ln=15,r=8,p=1$<salt>$<digest>
+
+(salt and digest in unpadded base64). ``verify_password`` reports whether
+a hash was made with weaker parameters than the current ones, so it can
+be re-hashed on the next successful login. ``from_legacy`` converts the
+``(hex, salt)`` pairs of ``auth.hash_password`` without the password.
+
+``calibrate`` picks the parameters that take a target time on the
+current host::
+
+    python -m api.services.passwords --target-ms 250
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import secrets
+import statistics
+import time
+from dataclasses import dataclass, replace
+
+PBKDF2 = "pbkdf2-sha256"
+SCRYPT = "scrypt"
+
+# Parameters of the legacy auth.hash_password tuples.
+LEGACY_ITERATIONS = 100000
+
+
+@dataclass(frozen=True)
+class HashParams:
+    """Algorithm and cost of a password hash."""
+
+    algorithm: str = PBKDF2
+    iterations: int = 600000  # pbkdf2
+    log2_n: int = 15  # scrypt: N = 2**log2_n
+    r: int = 8
+    p: int = 1
+
+    def __post_init__(self):
+        if self.algorithm not in (PBKDF2, SCRYPT):
+            raise ValueError(f"Unsupported algorithm: {self.algorithm}")
+
+    def stronger_than(self, other: "HashParams") -> bool:
+        """Whether hashes made with *other* should be upgraded to these."""
+        if self.algorithm != other.algorithm:
+            return True
+        if self.algorithm == PBKDF2:
+            return self.iterations > other.iterations
+        return (self.log2_n, self.r, self.p) > (other.log2_n, other.r, other.p)
+
+
+DEFAULT_PARAMS = HashParams()
+
+
+@dataclass(frozen=True)
+class Verification:
+    """Outcome of checking a password; truthy when it matched."""
+
+    valid: bool
+    needs_rehash: bool = False
+
+    def __bool__(self):
+        return self.valid
+
+
+def hash_password(password: str, params: HashParams = DEFAULT_PARAMS) -> str:
+    """Hash a password with a fresh salt and return the encoded hash."""
+    salt = secrets.token_bytes(16)
+    return _encode(params, salt, _derive(password.encode('utf-8'), salt, params))
+
+
+def verify_password(
+    password: str, encoded: str, params: HashParams = DEFAULT_PARAMS
+) -> Verification:
+    """Check a password against an encoded hash.
+
+    ``needs_rehash`` is set when the password matched but the hash was
+    made with parameters weaker than *params*.
+    """
+    stored, salt, digest = parse(encoded)
+    candidate = _derive(password.encode('utf-8'), salt, stored, len(digest))
+    if not hmac.compare_digest(candidate, digest):
+        return Verification(valid=False)
+    return Verification(valid=True, needs_rehash=params.stronger_than(stored))
+
+
+def needs_rehash(encoded: str, params: HashParams = DEFAULT_PARAMS) -> bool:
+    """Whether an encoded hash is weaker than *params*."""
+    return params.stronger_than(parse(encoded)[0])
+
+
+def from_legacy(pwd_hash: str, salt: str) -> str:
+    """Encode a ``(hex, salt)`` pair from ``auth.hash_password``."""
+    params = HashParams(algorithm=PBKDF2, iterations=LEGACY_ITERATIONS)
+    return _encode(params, salt.encode('utf-8'), bytes.fromhex(pwd_hash))
+
+
+def parse(encoded: str) -> tuple[HashParams, bytes, bytes]:
+    """Split an encoded hash into its parameters, salt and digest."""
+    try:
+        _, algorithm, settings, salt, digest = encoded.split('$')
+        values = dict(item.split('=', 1) for item in settings.split(','))
+        if algorithm == PBKDF2:
+            params = HashParams(algorithm=PBKDF2, iterations=int(values['i']))
+        elif algorithm == SCRYPT:
+            params = HashParams(
+                algorithm=SCRYPT,
+                log2_n=int(values['ln']),
+                r=int(values['r']),
+                p=int(values['p']),
+            )
+        else:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        return params, _b64decode(salt), _b64decode(digest)
+    except (KeyError, ValueError) as exc:
+        raise ValueError(f"Malformed password hash: {exc}") from exc
+
+
+def calibrate(
+    target_ms: float,
+    algorithm: str = PBKDF2,
+    *,
+    samples: int = 5,
+    minimum: HashParams | None = None,
+) -> HashParams:
+    """The strongest parameters whose median hashing time fits *target_ms*.
+
+    PBKDF2 iterations are extrapolated from a probe run, then checked;
+    scrypt's N doubles while it fits. The result is never weaker than
+    *minimum* (by default the legacy 100,000 PBKDF2 iterations, or
+    scrypt's N=2**14).
+    """
+    if algorithm == PBKDF2:
+        minimum = minimum or HashParams(algorithm=PBKDF2, iterations=LEGACY_ITERATIONS)
+        probe = HashParams(algorithm=PBKDF2, iterations=LEGACY_ITERATIONS)
+        per_iteration = time_params(probe, samples) / probe.iterations
+        iterations = int(target_ms / 1000 / per_iteration) // 10000 * 10000
+        params = replace(probe, iterations=max(iterations, minimum.iterations))
+        while (
+            params.iterations > minimum.iterations
+            and time_params(params, samples) > target_ms / 1000
+        ):
+            params = replace(params, iterations=params.iterations - 10000)
+        return params
+
+    minimum = minimum or HashParams(algorithm=SCRYPT, log2_n=14)
+    params = minimum
+    while time_params(replace(params, log2_n=params.log2_n + 1), samples) <= target_ms / 1000:
+        params = replace(params, log2_n=params.log2_n + 1)
+    return params
+
+
+def time_params(params: HashParams, samples: int = 5) -> float:
+    """Median seconds to hash one password with *params*."""
+    salt = secrets.token_bytes(16)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        _derive(b'calibration', salt, params)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def _derive(password: bytes, salt: bytes, params: HashParams, length: int = 32) -> bytes:
+    if params.algorithm == PBKDF2:
+        return hashlib.pbkdf2_hmac('sha256', password, salt, params.iterations, length)
+    n = 2 ** params.log2_n
+    # hashlib's default 32 MiB limit is below N=2**15, r=8.
+    maxmem = 128 * params.r * (n + params.p + 2) + 1024 * 1024
+    return hashlib.scrypt(
+        password, salt=salt, n=n, r=params.r, p=params.p, maxmem=maxmem, dklen=length
+    )
+
+
+def _encode(params: HashParams, salt: bytes, digest: bytes) -> str:
+    if params.algorithm == PBKDF2:
+        settings = f"i={params.iterations}"
+    else:
+        settings = f"ln={params.log2_n},r={params.r},p={params.p}"
+    return f"${params.algorithm}${settings}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4), validate=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m api.services.passwords",
+        description="Pick password hash parameters for a target latency on this host.",
+    )
+    parser.add_argument('--target-ms', type=float, default=250.0)
+    parser.add_argument('--algorithm', choices=(PBKDF2, SCRYPT), default=PBKDF2)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    params = calibrate(args.target_ms, args.algorithm, samples=args.samples)
+    timings = sorted(time_params(params, 1) for _ in range(max(args.samples, 20)))
+    print(f"parameters: {_encode(params, b'', b'').rstrip('$')}")
+    print(f"median: {statistics.median(timings) * 1000:.1f} ms, "
+          f"max of {len(timings)}: {timings[-1] * 1000:.1f} ms "
+          f"(target {args.target_ms:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Token issuance and an expiry-ordered token store.
+
+``TokenPool`` reads randomness from the OS in large blocks, encodes a
+block at once and hands out ready-made tokens, so a burst of logins
+costs one ``getrandom`` call and one base64 pass per block instead of per
+token. Buffers are discarded in forked children, so two worker
+processes never issue the same token.
+
+``TokenStore`` keeps issued tokens in a dict for lookups and in a heap
+ordered by expiry, so ``sweep`` only touches the tokens that actually
+expired.
+"""
+
+import base64
+import heapq
+import os
+import threading
+import weakref
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+_pools: "weakref.WeakSet[TokenPool]" = weakref.WeakSet()
+
+
+def _reset_pools_after_fork() -> None:
+    for pool in _pools:
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+class TokenPool:
+    """Buffered source of cryptographically secure random tokens."""
+
+    def __init__(self, buffer_size: int = 4096):
+        self.buffer_size = buffer_size
+        self._reset()
+        _pools.add(self)
+
+    def token_urlsafe(self, nbytes: int = 32) -> str:
+        """Drop-in for ``secrets.token_urlsafe`` drawing from the pool.
+
+        Tokens have the same length and alphabet; every character is
+        uniformly random.
+        """
+        if nbytes <= 0:
+            return ''
+        length = -(-nbytes * 4 // 3)
+        try:
+            # list.pop is atomic, so concurrent callers need no lock.
+            return self._tokens[length].pop()
+        except (KeyError, IndexError):
+            return self._refill(length)
+
+    def token_bytes(self, nbytes: int = 32) -> bytes:
+        """Return *nbytes* random bytes, refilling the buffer as needed."""
+        with self._lock:
+            if nbytes > self.buffer_size:
+                return os.urandom(nbytes)
+            if self._offset + nbytes > len(self._buffer):
+                self._buffer = os.urandom(self.buffer_size)
+                self._offset = 0
+            start = self._offset
+            self._offset += nbytes
+            return self._buffer[start:self._offset]
+
+    def _refill(self, length: int) -> str:
+        count = max(1, self.buffer_size * 4 // 3 // length)
+        nbytes = -(-count * length * 3 // 4)
+        nbytes += -nbytes % 3  # a multiple of 3 bytes encodes without padding
+        text = base64.urlsafe_b64encode(os.urandom(nbytes)).decode('ascii')
+        batch = [text[i:i + length] for i in range(0, count * length, length)]
+        token = batch.pop()
+        with self._lock:
+            self._tokens.setdefault(length, []).extend(batch)
+        return token
+
+    def _reset(self) -> None:
+        # Also runs in freshly forked children, where the lock may be held
+        # by a thread that no longer exists.
+        self._lock = threading.Lock()
+        self._tokens: dict[int, list[str]] = {}
+        self._buffer = b''
+        self._offset = 0
+
+
+class TokenStore:
+    """Issued tokens with their subject and expiry, indexed by expiry."""
+
+    def __init__(
+        self,
+        pool: TokenPool | None = None,
+        default_ttl: timedelta = timedelta(hours=24),
+        token_bytes: int = 32,
+    ):
+        self.pool = pool or TokenPool()
+        self.default_ttl = default_ttl
+        self.token_bytes = token_bytes
+        self._lock = threading.Lock()
+        self._tokens: dict[str, tuple[Any, datetime]] = {}
+        self._expiry: list[tuple[datetime, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def issue(
+        self, subject: Any, ttl: timedelta | None = None, now: datetime | None = None
+    ) -> str:
+        """Create a token for *subject* that expires after *ttl*."""
+        token = self.pool.token_urlsafe(self.token_bytes)
+        expires_at = (now or datetime.now(UTC)) + (
+            self.default_ttl if ttl is None else ttl
+        )
+        with self._lock:
+            self._tokens[token] = (subject, expires_at)
+            heapq.heappush(self._expiry, (expires_at, token))
+        return token
+
+    def lookup(self, token: str, now: datetime | None = None) -> Any | None:
+        """The subject of a live token; ``None`` if unknown or expired."""
+        with self._lock:
+            entry = self._tokens.get(token)
+        if entry is None or (now or datetime.now(UTC)) > entry[1]:
+            return None
+        return entry[0]
+
+    def revoke(self, token: str) -> bool:
+        """Forget a token; its heap entry is dropped lazily."""
+        with self._lock:
+            removed = self._tokens.pop(token, None) is not None
+            # Rebuild when revoked entries outnumber live ones.
+            if removed and len(self._expiry) > 2 * len(self._tokens) + 64:
+                self._expiry = [
+                    (expires_at, t) for t, (_, expires_at) in self._tokens.items()
+                ]
+                heapq.heapify(self._expiry)
+            return removed
+
+    def sweep(self, now: datetime | None = None) -> list[str]:
+        """Remove and return every token that has expired by *now*.
+
+        Like ``auth.is_token_expired``, a token is expired once *now* is
+        past its expiry.
+        """
+        now = now or datetime.now(UTC)
+        expired = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < now:
+                expires_at, token = heapq.heappop(self._expiry)
+                entry = self._tokens.get(token)
+                if entry is not None and entry[1] == expires_at:
+                    del self._tokens[token]
+                    expired.append(token)
+        return expired
+
+    def next_expiry(self) -> datetime | None:
+        """When the earliest live token expires, e.g. to schedule a sweep."""
+        with self._lock:
+            while self._expiry:
+                expires_at, token = self._expiry[0]
+                entry = self._tokens.get(token)
+                if entry is not None and entry[1] == expires_at:
+                    return expires_at
+                heapq.heappop(self._expiry)
+            return None
@@ -6,18 +6,24 @@ These functions are intentionally left untested for nit to generate tests.
 import re
 from typing import Any
 
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_PHONE_RE = re.compile(r'^\+?1?\d{9,15}$')
+_UPPER_RE = re.compile(r'[A-Z]')
+_LOWER_RE = re.compile(r'[a-z]')
+_DIGIT_RE = re.compile(r'\d')
+_SPECIAL_RE = re.compile(r'[!@#$%^&*(),.?":{}|<>]')
+
 
 def validate_username(username: str) -> bool:
     """Validate username format."""
     if len(username) < 3 or len(username) > 20:
         return False
-    return re.match(r'^[a-zA-Z0-9_-]+$', username) is not None
+    return _USERNAME_RE.match(username) is not None
 
 
 def validate_phone(phone: str) -> bool:
     """Validate phone number format."""
-    pattern = r'^\+?1?\d{9,15}$'
-    return re.match(pattern, phone) is not None
+    return _PHONE_RE.match(phone) is not None
 
 
 def validate_age(age: int) -> bool:
@@ -31,13 +37,13 @@ def validate_password_strength(password: str) -> tuple[bool, list[str]]:
 
     if len(password) < 8:
         errors.append("Password must be at least 8 characters")
-    if not re.search(r'[A-Z]', password):
+    if not _UPPER_RE.search(password):
         errors.append("Password must contain an uppercase letter")
-    if not re.search(r'[a-z]', password):
+    if not _LOWER_RE.search(password):
         errors.append("Password must contain a lowercase letter")
-    if not re.search(r'\d', password):
+    if not _DIGIT_RE.search(password):
         errors.append("Password must contain a digit")
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+    if not _SPECIAL_RE.search(password):
         errors.append("Password must contain a special character")
 
     return len(errors) == 0, errors
@@ -55,3 +61,4 @@ def sanitize_input(text: str) -> str:
 def validate_json_structure(data: dict[str, Any], required_fields: list[str]) -> bool:
     """Validate JSON has required fields."""
     return all(field in data for field in required_fields)
+
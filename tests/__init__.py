@@ -0,0 +1,5 @@
+import pytest
+
+# Imported by the conftests as well as loaded through ``pytest_plugins``;
+# register it before the first import so its asserts are still rewritten.
+pytest.register_assert_rewrite("tests.project_fixtures")
@@ -5,6 +5,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any
 
+from tests.inventory import Inventory
 from tests.manifests import ProjectManifest
 from tests.nit_runner import NitResult
 
@@ -211,12 +212,15 @@ def assert_analyze_structure(analyze_data: dict[str, Any]) -> None:
 def assert_generate_files_valid(
     project_dir: Path,
     manifest: ProjectManifest,
+    before: Inventory | None = None,
 ) -> None:
-    """Assert generated test files exist and are non-empty."""
-    test_patterns = ["test_*.*", "*.test.*", "*.spec.*"]
-    test_files: list[Path] = []
-    for pattern in test_patterns:
-        test_files.extend(project_dir.rglob(pattern))
+    """Assert generated test files exist and are non-empty.
+
+    With *before* (an inventory taken before the command), only the test
+    files it created or modified are checked for content; otherwise all.
+    """
+    inventory = Inventory.scan(project_dir, manifest)
+    test_files = inventory.tests
 
     # At minimum, the existing test files should still be present
     assert len(test_files) >= len(manifest.existing_test_files), (
@@ -225,9 +229,9 @@ def assert_generate_files_valid(
     )
 
     # Any newly created test files should be non-empty
-    for f in test_files:
-        if f.is_file():
-            assert f.stat().st_size > 0, f"Generated test file is empty: {f}"
+    written = inventory.diff(before).tests if before is not None else test_files
+    for f in written:
+        assert f.size > 0, f"Generated test file is empty: {project_dir / f.path}"
 
 
 # ---------------------------------------------------------------------------
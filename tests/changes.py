@@ -0,0 +1,73 @@
+"""Change-aware project selection.
+
+Maps the files changed since a git ref to the example projects they
+belong to, so a change under ``rust-cli/`` only runs the rust-cli
+parametrizations. A change to the shared harness (anything under
+``tests/``, ``pyproject.toml``) selects every project; other files
+outside the projects (README, LICENSE, ...) select none.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import subprocess
+from collections.abc import Iterable
+from pathlib import Path
+
+from tests.manifests import ALL_PROJECTS, ProjectManifest
+
+# Paths (relative to the examples root) whose change affects every project.
+SHARED_PATTERNS = (
+    "tests/*",
+    "pyproject.toml",
+)
+
+
+def changed_paths(base: str, root: Path) -> list[str]:
+    """Files changed since *base*, relative to *root*, sorted.
+
+    Covers commits since the merge base with *base* (``git diff
+    base...HEAD``), uncommitted changes and untracked files. Raises
+    ``RuntimeError`` if git fails, e.g. for an unknown ref.
+    """
+    toplevel = Path(_git(root, "rev-parse", "--show-toplevel").strip())
+    listed = [
+        _git(root, "diff", "--name-only", "--no-renames", f"{base}...HEAD", "--"),
+        _git(root, "diff", "--name-only", "--no-renames", "HEAD", "--"),
+        _git(root, "ls-files", "--others", "--exclude-standard", "--full-name"),
+    ]
+    paths: set[str] = set()
+    for line in "\n".join(listed).splitlines():
+        if not line:
+            continue
+        relative = os.path.relpath(toplevel / line, root.resolve())
+        if not relative.startswith(".."):
+            paths.add(Path(relative).as_posix())
+    return sorted(paths)
+
+
+def affected_projects(
+    paths: Iterable[str],
+    projects: Iterable[ProjectManifest] = ALL_PROJECTS,
+) -> list[ProjectManifest]:
+    """The *projects* that the changed *paths* touch, in their given order."""
+    projects = list(projects)
+    hit: set[str] = set()
+    for path in paths:
+        if any(fnmatch.fnmatch(path, pattern) for pattern in SHARED_PATTERNS):
+            return projects
+        for manifest in projects:
+            if path == manifest.path or path.startswith(f"{manifest.path}/"):
+                hit.add(manifest.name)
+    return [m for m in projects if m.name in hit]
+
+
+def _git(cwd: Path, *args: str) -> str:
+    proc = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode:
+        msg = f"git {' '.join(args)} failed: {proc.stderr.strip()}"
+        raise RuntimeError(msg)
+    return proc.stdout
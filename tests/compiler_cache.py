@@ -0,0 +1,60 @@
+"""Shared compiler caches for the private build output of project copies.
+
+Every project copy that builds gets its own ``target``/``build``/``obj``/...
+(see :mod:`tests.snapshots`), so concurrent tests never write to the same
+output tree. What they share instead are the toolchains' own caches,
+which are built to be read-mostly and safe under concurrent use:
+
+* Rust: ``sccache`` as ``RUSTC_WRAPPER`` (when installed), cache in
+  ``SCCACHE_DIR``. Each copy keeps its own target dir; a shared
+  ``CARGO_TARGET_DIR`` would make every build wait on cargo's lock.
+* Go: ``GOCACHE``.
+* Gradle: the local build cache (``org.gradle.caching``) in the Gradle
+  user home.
+* .NET: the MSBuild server (the compiler server is on by default).
+* CMake: ``ccache`` as compiler launcher (when installed), with
+  ``CCACHE_BASEDIR`` set so that copies at different paths hit the same
+  entries.
+
+Variables already set in the environment are left alone.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from collections.abc import Mapping
+from pathlib import Path
+
+
+def compiler_cache_env(
+    root: Path,
+    *,
+    basedir: Path,
+    environ: Mapping[str, str] | None = None,
+) -> dict[str, str]:
+    """Environment that points every toolchain at a cache under *root*.
+
+    *basedir* is the directory the project copies live in; compilers that
+    hash absolute paths treat paths below it as relative.
+    """
+    environ = os.environ if environ is None else environ
+    env: dict[str, str] = {
+        "GOCACHE": str(root / "go-build"),
+        "DOTNET_CLI_USE_MSBUILD_SERVER": "1",
+    }
+    if shutil.which("sccache"):
+        env["RUSTC_WRAPPER"] = "sccache"
+        env["SCCACHE_DIR"] = str(root / "sccache")
+    if shutil.which("ccache"):
+        env["CMAKE_C_COMPILER_LAUNCHER"] = "ccache"
+        env["CMAKE_CXX_COMPILER_LAUNCHER"] = "ccache"
+        env["CCACHE_DIR"] = str(root / "ccache")
+        env["CCACHE_BASEDIR"] = str(basedir)
+        env["CCACHE_NOHASHDIR"] = "1"
+    env = {key: value for key, value in env.items() if key not in environ}
+
+    gradle_opts = environ.get("GRADLE_OPTS", "")
+    if "org.gradle.caching" not in gradle_opts:
+        env["GRADLE_OPTS"] = f"{gradle_opts} -Dorg.gradle.caching=true".strip()
+    return env
@@ -3,28 +3,447 @@
 from __future__ import annotations
 
 import os
-import shutil
-import subprocess
-from dataclasses import dataclass
+import time
+from collections.abc import Generator, Iterator
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Any
 
 import pytest
 
-from tests.manifests import ALL_PROJECTS, ProjectManifest, get_project
-from tests.nit_runner import NitRunner
+from tests.changes import affected_projects, changed_paths
+from tests.compiler_cache import compiler_cache_env
+from tests.deps import SetupResult, setup_projects
+from tests.durations import DurationHistory, default_history_path, longest_first
+from tests.fingerprint import hash_tree
+from tests.manifests import ProjectManifest, get_project, select_projects
+from tests.manifests import examples_root as default_examples_root
+from tests.nit_runner import (
+    AsyncNitRunner,
+    ForkServerBackend,
+    NitBackend,
+    NitResultCache,
+    NitRunner,
+    SubprocessBackend,
+)
+from tests.ollama_meter import OllamaMeter
+from tests.ollama_proxy import (
+    MODES,
+    ROUTED_ENV,
+    Cassettes,
+    Handler,
+    OllamaProxy,
+    Upstream,
+    client_url,
+    ollama_host,
+    scrub_paths,
+)
+from tests.project_fixtures import SELECTED_PROJECTS, BuildOutputSeeder, init_git_repo
+from tests.result_cache import ResultCache, harness_fingerprint, nit_fingerprint
+from tests.snapshots import HEAVY_DIRS, Snapshot, SnapshotStore, default_cache_dir
+from tests.usage import UsageLog
+
+pytest_plugins = ["tests.project_fixtures"]
 
 EXAMPLES_ROOT = Path(__file__).resolve().parent.parent
 
+_USAGE_LOG = pytest.StashKey[UsageLog]()
+_USAGE_FILES = pytest.StashKey[tuple[Path, Path]]()
+_OLLAMA_CASSETTES = pytest.StashKey[Cassettes]()
+_OLLAMA_METER = pytest.StashKey[OllamaMeter]()
+_OLLAMA_METER_FILES = pytest.StashKey[tuple[Path, Path]]()
+_DEPS_RESULTS = pytest.StashKey[list[SetupResult]]()
+_HISTORY = pytest.StashKey[DurationHistory]()
+_TEST_PROJECTS = pytest.StashKey[dict[str, str]]()
+# Running (total seconds or None once skipped, all phases passed) per test.
+_TEST_PHASES = pytest.StashKey[dict[str, tuple[float | None, bool]]]()
+_RESULT_CACHE = pytest.StashKey[ResultCache]()
+_RESULT_INPUTS = pytest.StashKey[dict[str, Any]]()
+_RESULT_EVICTED = pytest.StashKey[int]()
+_RESULT_KEY = pytest.StashKey[str]()
+_REPLAYED = pytest.StashKey[bool]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("nit", "nit integration tests")
+    group.addoption(
+        "--project",
+        action="append",
+        default=[],
+        dest="projects",
+        metavar="NAME",
+        help="Only run against the named example project (repeatable). "
+        "Use the --project=NAME form.",
+    )
+    group.addoption(
+        "--changed-since",
+        default=os.environ.get("NIT_CHANGED_SINCE") or None,
+        metavar="REF",
+        help="Only run against projects with files changed since git REF "
+        "(merge base, plus uncommitted and untracked files); a change to "
+        "the shared harness selects every project. Combines with "
+        "--project. Env: NIT_CHANGED_SINCE.",
+    )
+    group.addoption(
+        "--setup-deps",
+        action="store_true",
+        default=os.environ.get("NIT_SETUP_DEPS") == "1",
+        help="Before the session, run each selected project's setup commands, "
+        "or restore their output from the lockfile-keyed dependency cache. "
+        "Env: NIT_SETUP_DEPS=1.",
+    )
+    group.addoption(
+        "--no-nit-cache",
+        action="store_true",
+        default=False,
+        help="Launch nit for every read-only command instead of reusing "
+        "results across tests.",
+    )
+    group.addoption(
+        "--nit-backend",
+        choices=["subprocess", "forkserver"],
+        default=os.environ.get("NIT_BACKEND", "subprocess"),
+        help="How nit is launched: a new process per command (default) or "
+        "forks of pre-imported nit workers. Env: NIT_BACKEND.",
+    )
+    group.addoption(
+        "--fresh",
+        action="store_true",
+        default=os.environ.get("NIT_FRESH") == "1",
+        help="Run every heuristics test even if the result cache holds a "
+        "pass for the same test, project tree, nit and harness. Env: NIT_FRESH=1.",
+    )
+    group.addoption(
+        "--result-cache-mib",
+        type=int,
+        default=16,
+        metavar="MIB",
+        help="Size budget of the cross-session result cache; least recently "
+        "used entries are evicted beyond it (default: 16).",
+    )
+    group.addoption(
+        "--nit-history",
+        default=None,
+        metavar="FILE",
+        help="Duration history of tests and nit commands, shared across "
+        "sessions (default: durations.json in the harness cache dir). "
+        "Env: NIT_DURATION_HISTORY.",
+    )
+    group.addoption(
+        "--no-adaptive-timeouts",
+        action="store_true",
+        default=False,
+        help="Use the fixed per-command timeouts instead of ones derived "
+        "from the duration history.",
+    )
+    group.addoption(
+        "--nit-usage-dir",
+        default=None,
+        metavar="DIR",
+        help="Where to write the per-command resource usage JSON/CSV "
+        "(default: <rootdir>/.nit-usage).",
+    )
+    group.addoption(
+        "--ollama-mode",
+        choices=MODES,
+        default=os.environ.get("NIT_OLLAMA_MODE", "live"),
+        help="live: talk to Ollama directly (default). record: proxy to Ollama "
+        "and save cassettes. replay: answer from cassettes only, no Ollama "
+        "needed. Env: NIT_OLLAMA_MODE.",
+    )
+    group.addoption(
+        "--ollama-min-tier",
+        choices=_MODEL_PREFERENCES,
+        default=os.environ.get("NIT_OLLAMA_MIN_TIER") or None,
+        metavar="FAMILY",
+        help="Time every installed model of this family or a better one "
+        f"({', '.join(_MODEL_PREFERENCES)}; best first) and use the fastest. "
+        "Env: NIT_OLLAMA_MIN_TIER.",
+    )
+    group.addoption(
+        "--ollama-meter",
+        action="store_true",
+        default=os.environ.get("NIT_OLLAMA_METER") == "1",
+        help="Route Ollama traffic through a local proxy that logs tokens, "
+        "time to first byte and latency per nit command (written next to "
+        "the resource usage files). Env: NIT_OLLAMA_METER=1.",
+    )
+    group.addoption(
+        "--ollama-cassettes",
+        default=str(EXAMPLES_ROOT / "tests" / "cassettes" / "ollama"),
+        metavar="DIR",
+        help="Cassette directory for --ollama-mode=record/replay "
+        "(default: tests/cassettes/ollama).",
+    )
+
 
 def pytest_configure(config: pytest.Config) -> None:
     config.addinivalue_line("markers", "heuristics: No LLM needed — fast, deterministic")
     config.addinivalue_line("markers", "llm: Requires Ollama LLM — slow, tolerant")
+    try:
+        projects = select_projects(config.getoption("projects"))
+    except KeyError as exc:
+        raise pytest.UsageError(exc.args[0]) from exc
+    base = config.getoption("changed_since")
+    if base:
+        try:
+            paths = changed_paths(base, default_examples_root())
+        except RuntimeError as exc:
+            raise pytest.UsageError(f"--changed-since={base}: {exc}") from exc
+        projects = affected_projects(paths, projects)
+    config.stash[SELECTED_PROJECTS] = projects
+    config.stash[_USAGE_LOG] = UsageLog()
+    history = config.getoption("nit_history")
+    config.stash[_HISTORY] = DurationHistory(
+        Path(history) if history else default_history_path(),
+    )
+    config.stash[_TEST_PROJECTS] = {}
+    config.stash[_TEST_PHASES] = {}
+    config.stash[_RESULT_CACHE] = ResultCache(
+        default_cache_dir() / "results",
+        budget=config.getoption("result_cache_mib") * 1024 * 1024,
+    )
+    config.stash[_RESULT_INPUTS] = {}
+    if config.getoption("ollama_meter"):
+        config.stash[_OLLAMA_METER] = OllamaMeter()
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    """Install or restore project dependencies when ``--setup-deps`` is given."""
+    config = session.config
+    if config.getoption("setup_deps"):
+        # Runs before any fixture, so pass the shared compiler caches
+        # (see project_fixtures.compiler_caches) explicitly.
+        root = default_examples_root()
+        config.stash[_DEPS_RESULTS] = setup_projects(
+            config.stash[SELECTED_PROJECTS],
+            root,
+            env=compiler_cache_env(default_cache_dir() / "build", basedir=root),
+        )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item],
+) -> None:
+    """Remember each test's project, pick the passes to replay, order the rest.
+
+    Runs after deselection. Replayed tests are moved to the front: they set
+    up no fixtures, so running them before any other test leaves pytest's
+    fixture stack exactly as a real first test expects it. The others run
+    slowest first by the duration history (see
+    :func:`tests.durations.longest_first`).
+    """
+    projects = config.stash[_TEST_PROJECTS]
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        projects[item.nodeid] = callspec.params.get("project_manifest", "") if callspec else ""
+    fresh = config.getoption("fresh")
+    for item in items:
+        key = _result_key(item)
+        if key is None:
+            continue
+        item.stash[_RESULT_KEY] = key
+        if not fresh and config.stash[_RESULT_CACHE].lookup(key) is not None:
+            item.stash[_REPLAYED] = True
+            item.user_properties.append(("result_cache", "replayed"))
+    replayed = [item for item in items if item.stash.get(_REPLAYED, False)]
+    others = [item for item in items if not item.stash.get(_REPLAYED, False)]
+    items[:] = replayed + longest_first(
+        others,
+        config.stash[_HISTORY],
+        lambda item: (projects[item.nodeid], item.nodeid.partition("::")[0], item.nodeid),
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item: pytest.Item, nextitem: pytest.Item | None) -> bool | None:
+    """Report a replayed test's three phases as passed without running it."""
+    if not item.stash.get(_REPLAYED, False):
+        return None
+    ihook = item.ihook
+    ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    for when in ("setup", "call", "teardown"):
+        call = pytest.CallInfo.from_call(lambda: None, when=when)
+        ihook.pytest_runtest_logreport(report=ihook.pytest_runtest_makereport(item=item, call=call))
+    ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(
+    item: pytest.Item, call: pytest.CallInfo[None],
+) -> Generator[None, pytest.TestReport, pytest.TestReport]:
+    """Feed each test's outcome to the duration history and result cache.
+
+    The history gets setup + call + teardown time. Skipped tests are left
+    out; their few milliseconds say nothing about how long the test takes
+    when it runs. A heuristics test whose three phases passed is recorded
+    in the result cache. Replayed tests are neither.
+    """
+    report = yield
+    if item.stash.get(_REPLAYED, False):
+        return report
+    phases = item.config.stash[_TEST_PHASES]
+    total, passed = phases.get(item.nodeid, (0.0, True))
+    if report.skipped:
+        total = None
+    elif total is not None:
+        total += call.duration
+    passed = passed and report.passed and not hasattr(report, "wasxfail")
+    if call.when != "teardown":
+        phases[item.nodeid] = (total, passed)
+        return report
+    phases.pop(item.nodeid, None)
+    if total is not None:
+        project = item.config.stash[_TEST_PROJECTS].get(item.nodeid, "")
+        item.config.stash[_HISTORY].add_test(project, item.nodeid, total)
+    key = item.stash.get(_RESULT_KEY, None)
+    if key is not None and passed and total is not None:
+        item.config.stash[_RESULT_CACHE].record(key, item.nodeid, total)
+    return report
+
+
+def _result_key(item: pytest.Item) -> str | None:
+    """Result cache key of a heuristics test, ``None`` for other tests."""
+    if item.get_closest_marker("heuristics") is None:
+        return None
+    config = item.config
+    inputs = config.stash[_RESULT_INPUTS]
+    if "nit" not in inputs:
+        try:
+            inputs["nit"] = nit_fingerprint()
+        except OSError:
+            inputs["nit"] = None  # no nit to fingerprint: never replay
+        inputs["harness"] = harness_fingerprint(EXAMPLES_ROOT)
+    if inputs["nit"] is None:
+        return None
+    project = config.stash[_TEST_PROJECTS].get(item.nodeid, "")
+    tree = f"tree:{project}"
+    if tree not in inputs:
+        inputs[tree] = (
+            hash_tree(default_examples_root() / get_project(project).path, skip_dirs=HEAVY_DIRS)
+            if project else ""
+        )
+    return ResultCache.key(item.nodeid, inputs["nit"], inputs["harness"], inputs[tree])
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Write the session's nit resource usage, LLM metering, duration history and result cache."""
+    config = session.config
+    history = config.stash.get(_HISTORY, None)
+    if history is not None:
+        history.save()
+    results = config.stash.get(_RESULT_CACHE, None)
+    if results is not None and results.recorded:
+        config.stash[_RESULT_EVICTED] = results.evict()
+    directory = config.getoption("nit_usage_dir")
+    target = Path(directory) if directory else config.rootpath / ".nit-usage"
+    suffix = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    log = config.stash.get(_USAGE_LOG, None)
+    if log is not None and log.records:
+        config.stash[_USAGE_FILES] = log.write(target, f"usage-{suffix}")
+    meter = config.stash.get(_OLLAMA_METER, None)
+    if meter is not None and meter.records:
+        config.stash[_OLLAMA_METER_FILES] = meter.write(target, f"llm-{suffix}")
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+    """Show dependency setup, replayed results, costliest project/command pairs, cassette use."""
+    _report_deps(terminalreporter, config)
+    _report_result_cache(terminalreporter, config)
+    _report_usage(terminalreporter, config)
+    _report_llm_usage(terminalreporter, config)
+    _report_cassettes(terminalreporter, config)
+
+
+def _report_deps(tr: pytest.TerminalReporter, config: pytest.Config) -> None:
+    results = config.stash.get(_DEPS_RESULTS, None)
+    if not results:
+        return
+    tr.section("dependency setup")
+    tr.write_line(f"{'project':<16} {'deps':<10} {'time s':>8}")
+    for r in results:
+        tr.write_line(f"{r.project:<16} {r.status:<10} {r.seconds:>8.1f}")
+    for r in results:
+        if not r.ok:
+            tr.write_line(f"{r.project}: {r.detail}", red=True)
+
+
+def _report_result_cache(tr: pytest.TerminalReporter, config: pytest.Config) -> None:
+    results = config.stash.get(_RESULT_CACHE, None)
+    if results is None or not (results.hits or results.recorded):
+        return
+    tr.section("result cache")
+    tr.write_line(
+        f"{results.hits} replayed, {results.recorded} recorded, "
+        f"{config.stash.get(_RESULT_EVICTED, 0)} evicted ({results.root}); "
+        "--fresh reruns everything"
+    )
+
+
+def _report_usage(tr: pytest.TerminalReporter, config: pytest.Config) -> None:
+    log = config.stash.get(_USAGE_LOG, None)
+    if log is None or not log.records:
+        return
+    tr.section("nit resource usage")
+    tr.write_line(
+        f"{'project':<16} {'command':<18} {'calls':>5} {'cached':>6} "
+        f"{'wall s':>8} {'cpu s':>8} {'peak MiB':>8}"
+    )
+    for row in log.summarize()[:15]:
+        tr.write_line(
+            f"{row.project:<16} {row.command:<18} {row.calls:>5} {row.cached:>6} "
+            f"{row.wall_seconds:>8.1f} {row.cpu_seconds:>8.1f} "
+            f"{row.max_rss_kb / 1024:>8.1f}"
+        )
+    files = config.stash.get(_USAGE_FILES, None)
+    if files:
+        tr.write_line(f"details: {files[0]} / {files[1]}")
+
+
+def _report_llm_usage(tr: pytest.TerminalReporter, config: pytest.Config) -> None:
+    meter = config.stash.get(_OLLAMA_METER, None)
+    if meter is None or not meter.records:
+        return
+    tr.section("ollama tokens")
+    tr.write_line(
+        f"{'project':<16} {'command':<18} {'reqs':>5} {'hit %':>5} "
+        f"{'prompt':>8} {'compl':>7} {'ttfb s':>7} {'total s':>8}"
+    )
+    for row in meter.summarize()[:20]:
+        ttfb = "-" if row.mean_first_byte_seconds is None else f"{row.mean_first_byte_seconds:.2f}"
+        tr.write_line(
+            f"{row.project or '-':<16} {row.command:<18} {row.requests:>5} "
+            f"{row.cache_hit_rate:>5.0%} {row.prompt_tokens:>8} "
+            f"{row.completion_tokens:>7} {ttfb:>7} {row.latency_seconds:>8.1f}"
+        )
+    files = config.stash.get(_OLLAMA_METER_FILES, None)
+    if files:
+        tr.write_line(f"details: {files[0]} / {files[1]}")
+
+
+def _report_cassettes(tr: pytest.TerminalReporter, config: pytest.Config) -> None:
+    cassettes = config.stash.get(_OLLAMA_CASSETTES, None)
+    if cassettes is None:
+        return
+    tr.section("ollama cassettes")
+    tr.write_line(
+        f"{cassettes.mode}: {cassettes.hits} replayed, {cassettes.recorded} "
+        f"recorded, {len(cassettes.misses)} missing ({cassettes.root})"
+    )
+    for miss in cassettes.misses[:10]:
+        tr.write_line(f"  missing: {miss}")
 
 
 # ---------------------------------------------------------------------------
 # Ollama auto-discovery
 # ---------------------------------------------------------------------------
 
+# Best first: earlier entries are treated as a higher quality tier.
 _MODEL_PREFERENCES = [
     "qwen2.5-coder",
     "llama3.1",
@@ -33,26 +452,127 @@ _MODEL_PREFERENCES = [
     "codellama",
 ]
 
+# Warm-up/probe generation: short, deterministic, long enough to time.
+_PROBE_PROMPT = "Count from 1 to 30, separated by spaces."
+_PROBE_TOKENS = 32
+# Cap on a probe, model load included; a slower model just goes unwarmed.
+_PROBE_TIMEOUT = 30
+# How long Ollama keeps the chosen model loaded after the warm-up.
+_KEEP_ALIVE = "30m"
+# Throughput the fixed generate/pick timeouts were sized for.
+_REFERENCE_TOKENS_PER_SECOND = 20.0
+_TIMEOUT_SCALE_BOUNDS = (0.5, 8.0)
+
 
 @dataclass(frozen=True)
 class OllamaInfo:
-    """Result of Ollama auto-discovery."""
+    """Result of Ollama auto-discovery.
+
+    ``load_seconds`` and ``tokens_per_second`` come from the warm-up
+    generation and are ``None`` when it failed. ``routed`` means *host*
+    is a harness proxy that attributes requests to clients (see
+    :func:`~tests.ollama_proxy.client_url`).
+    """
 
     available: bool
     host: str
     model: str
+    load_seconds: float | None = None
+    tokens_per_second: float | None = None
+    routed: bool = False
+
+    @property
+    def timeout_scale(self) -> float:
+        """Factor for LLM command timeouts on this model and hardware."""
+        if not self.tokens_per_second:
+            return 1.0
+        low, high = _TIMEOUT_SCALE_BOUNDS
+        scale = _REFERENCE_TOKENS_PER_SECOND / self.tokens_per_second
+        return min(max(scale, low), high)
+
+
+@dataclass(frozen=True)
+class _ModelProbe:
+    load_seconds: float
+    tokens_per_second: float
+
+
+def _model_tier(name: str) -> int | None:
+    """Index of the first preference matching *name* (lower is better)."""
+    for tier, pref in enumerate(_MODEL_PREFERENCES):
+        if pref in name:
+            return tier
+    return None
+
+
+def _preferred_model(model_names: list[str]) -> str:
+    """Pick the best model by preference, else the first one listed."""
+    best = model_names[0]
+    for pref in _MODEL_PREFERENCES:
+        for name in model_names:
+            if pref in name:
+                best = name
+                break
+        else:
+            continue
+        break
+    return best
+
+
+def _probe_model(host: str, model: str, *, keep_alive: str) -> _ModelProbe | None:
+    """Run a short generation on *model* and time it.
+
+    Loads the model if needed (Ollama reports that as ``load_duration``)
+    and keeps it resident for *keep_alive* afterwards.
+    """
+    import httpx
 
+    try:
+        resp = httpx.post(
+            f"{host}/api/generate",
+            json={
+                "model": model,
+                "prompt": _PROBE_PROMPT,
+                "stream": False,
+                "keep_alive": keep_alive,
+                "options": {"num_predict": _PROBE_TOKENS, "temperature": 0, "seed": 0},
+            },
+            timeout=_PROBE_TIMEOUT,
+        )
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        eval_count = data.get("eval_count") or 0
+        eval_ns = data.get("eval_duration") or 0
+        if not eval_count or not eval_ns:
+            return None
+        return _ModelProbe(
+            load_seconds=(data.get("load_duration") or 0) / 1e9,
+            tokens_per_second=eval_count / (eval_ns / 1e9),
+        )
+    except Exception:
+        return None
 
-def _discover_ollama() -> OllamaInfo:
+
+def _discover_ollama(
+    host: str | None = None,
+    *,
+    min_tier: str | None = None,
+    probe: bool = True,
+) -> OllamaInfo:
     """Probe Ollama once and return host + best available model.
 
-    Checks ``OLLAMA_HOST`` env var (default ``http://localhost:11434``).
-    Picks a model using a preference list, falling back to the first
-    model returned by the API.
+    Probes *host*, or ``$OLLAMA_HOST`` when not given. Picks a model
+    using a preference list, falling back to the first model returned by
+    the API. With *min_tier* (an entry of ``_MODEL_PREFERENCES``), every
+    installed model at that tier or better is timed and the fastest wins.
+
+    The chosen model is then warmed up and kept loaded, so the first LLM
+    test doesn't pay the load time, and its throughput is measured.
+    Without *probe* no generation is run: the model is picked by
+    preference alone and the throughput is left unknown.
     """
-    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
-    if not host.startswith(("http://", "https://")):
-        host = f"http://{host}"
+    host = host or ollama_host()
 
     try:
         import httpx
@@ -69,46 +589,58 @@ def _discover_ollama() -> OllamaInfo:
         model_names = [m["name"] for m in models if m.get("name")]
         if not model_names:
             return OllamaInfo(available=False, host=host, model="")
-
-        # Pick the best model by preference
-        best = model_names[0]
-        for pref in _MODEL_PREFERENCES:
-            for name in model_names:
-                if pref in name:
-                    best = name
-                    break
-            else:
-                continue
-            break
-
-        return OllamaInfo(available=True, host=host, model=best)
     except Exception:
         return OllamaInfo(available=False, host=host, model="")
 
+    best = _preferred_model(model_names)
+    if not probe:
+        return OllamaInfo(available=True, host=host, model=best)
+    if min_tier is not None:
+        limit = _MODEL_PREFERENCES.index(min_tier)
+        candidates = [
+            name for name in model_names
+            if (tier := _model_tier(name)) is not None and tier <= limit
+        ]
+        # Unload each candidate right after timing it.
+        timed = {name: _probe_model(host, name, keep_alive="0") for name in candidates}
+        speeds = {name: p.tokens_per_second for name, p in timed.items() if p}
+        if speeds:
+            best = max(speeds, key=speeds.__getitem__)
+
+    probe = _probe_model(host, best, keep_alive=_KEEP_ALIVE)
+    return OllamaInfo(
+        available=True,
+        host=host,
+        model=best,
+        load_seconds=probe.load_seconds if probe else None,
+        tokens_per_second=probe.tokens_per_second if probe else None,
+    )
+
 
 # ---------------------------------------------------------------------------
 # Session-scoped helpers
 # ---------------------------------------------------------------------------
 
 
-def _resolve_examples_root() -> Path:
-    """Resolve the examples repo root, allowing env var override."""
-    env = os.environ.get("EXAMPLES_DIR")
-    if env:
-        return Path(env).resolve()
-    return EXAMPLES_ROOT
-
-
 def _configure_ollama_for_project(
     nit: NitRunner,
     info: OllamaInfo,
+    *,
+    client: str | None = None,
 ) -> None:
-    """Force Ollama config onto a project via ``nit config set``."""
-    nit.config_set("llm.mode", "ollama")
-    nit.config_set("llm.provider", "ollama")
-    nit.config_set("llm.model", info.model)
-    nit.config_set("llm.base_url", info.host)
-    nit.config_set("platform.mode", "disabled")
+    """Force Ollama config onto a project via ``nit config set``.
+
+    *client* names the test in ``llm.base_url`` when the host is a harness
+    proxy, so its scheduler can share Ollama fairly between tests.
+    """
+    base_url = client_url(info.host, client) if client and info.routed else info.host
+    nit.configure({
+        "llm.mode": "ollama",
+        "llm.provider": "ollama",
+        "llm.model": info.model,
+        "llm.base_url": base_url,
+        "platform.mode": "disabled",
+    })
 
 
 # ---------------------------------------------------------------------------
@@ -119,13 +651,69 @@ def _configure_ollama_for_project(
 @pytest.fixture(scope="session")
 def examples_root() -> Path:
     """Root directory of the examples repository."""
-    return _resolve_examples_root()
+    return default_examples_root()
+
+
+@pytest.fixture(scope="session")
+def ollama_cassettes(
+    pytestconfig: pytest.Config,
+    examples_root: Path,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Cassettes | None:
+    """Cassette recorder/replayer for ``--ollama-mode``, ``None`` when live."""
+    mode = pytestconfig.getoption("ollama_mode")
+    if mode == "live":
+        return None
+    cassettes = Cassettes(
+        Path(pytestconfig.getoption("ollama_cassettes")),
+        mode=mode,
+        inner=(
+            Upstream(ollama_host(), routed=os.environ.get(ROUTED_ENV) == "1")
+            if mode == "record" else None
+        ),
+        scrub=scrub_paths([
+            (tmp_path_factory.getbasetemp(), "<tmp>"),
+            (default_cache_dir(), "<cache>"),
+            (examples_root, "<examples>"),
+        ]),
+    )
+    pytestconfig.stash[_OLLAMA_CASSETTES] = cassettes
+    return cassettes
 
 
 @pytest.fixture(scope="session")
-def ollama_info() -> OllamaInfo:
-    """Ollama discovery result — host, model, availability."""
-    return _discover_ollama()
+def ollama_meter(pytestconfig: pytest.Config) -> OllamaMeter | None:
+    """Token/latency log of Ollama requests (``--ollama-meter``), else ``None``."""
+    return pytestconfig.stash.get(_OLLAMA_METER, None)
+
+
+@pytest.fixture(scope="session")
+def ollama_info(
+    pytestconfig: pytest.Config,
+    ollama_cassettes: Cassettes | None,
+    ollama_meter: OllamaMeter | None,
+) -> Iterator[OllamaInfo]:
+    """Ollama discovery result — host, model, availability, throughput.
+
+    With cassettes or metering the host is a local :class:`OllamaProxy`,
+    also exported as ``OLLAMA_HOST`` so nit can't bypass it. Replayed
+    responses take no real generation time, so nothing is probed then.
+    """
+    min_tier = pytestconfig.getoption("ollama_min_tier")
+    probe = pytestconfig.getoption("ollama_mode") != "replay"
+    routed = os.environ.get(ROUTED_ENV) == "1"
+    handler: Handler | None = ollama_cassettes
+    if ollama_meter is not None:
+        handler = ollama_meter.wrap(handler or Upstream(ollama_host(), routed=routed))
+    if handler is None:
+        info = _discover_ollama(min_tier=min_tier, probe=probe)
+        yield replace(info, routed=routed)
+        return
+    with OllamaProxy(handler) as proxy, pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OLLAMA_HOST", proxy.url)
+        mp.setenv(ROUTED_ENV, "1")
+        info = _discover_ollama(proxy.url, min_tier=min_tier, probe=probe)
+        yield replace(info, routed=True)
 
 
 @pytest.fixture(scope="session")
@@ -134,89 +722,198 @@ def ollama_available(ollama_info: OllamaInfo) -> bool:
     return ollama_info.available
 
 
-@pytest.fixture(
-    params=[p.name for p in ALL_PROJECTS],
-    scope="session",
-)
-def project_manifest(request: pytest.FixtureRequest) -> ProjectManifest:
-    """Parametrized fixture — yields each project manifest in turn."""
-    return get_project(request.param)
-
-
-# Directories that should be symlinked instead of copied (too large or
-# contain absolute paths that break when relocated).
-_SYMLINK_DIRS = {
-    "node_modules",
-    ".venv",
-    "__pycache__",
-    ".pytest_cache",
-    "target",       # Rust (cargo)
-    "build",        # C++ (cmake), Java (gradle)
-    ".gradle",      # Java (gradle cache)
-    "bin",          # C# (dotnet)
-    "obj",          # C# (dotnet)
-}
+@pytest.fixture(scope="session")
+def ollama_snapshot(
+    project_snapshot: Snapshot,
+    project_manifest: ProjectManifest,
+    snapshot_store: SnapshotStore,
+    ollama_info: OllamaInfo,
+    nit_backend: NitBackend,
+    nit_usage: UsageLog,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Snapshot:
+    """The project after ``nit init --auto`` and the Ollama config.
 
+    Built once per session and project; LLM tests clone it instead of
+    repeating init and config on every test.
+    """
+    if not ollama_info.available:
+        pytest.skip("Ollama not available")
+    name = f"{project_manifest.name}-ollama"
 
-@pytest.fixture(scope="session")
+    def prepare(path: Path) -> None:
+        nit = NitRunner(
+            path,
+            backend=nit_backend,
+            listeners=[nit_usage.listener(project=project_manifest.name, test=name)],
+        )
+        nit.init(auto=True)
+        _configure_ollama_for_project(nit, ollama_info)
+
+    dst = tmp_path_factory.mktemp(name)
+    return snapshot_store.derive(project_snapshot, dst, prepare, name=name)
+
+
+@pytest.fixture()
+def project_template(
+    request: pytest.FixtureRequest,
+    project_snapshot: Snapshot,
+) -> Snapshot:
+    """Template the current test's project copy is cloned from.
+
+    Tests that use ``nit_with_ollama`` get :func:`ollama_snapshot`.
+    """
+    if "nit_with_ollama" in request.fixturenames:
+        return request.getfixturevalue("ollama_snapshot")
+    return project_snapshot
+
+
+@pytest.fixture()
 def project_dir(
-    examples_root: Path,
+    project_template: Snapshot,
     project_manifest: ProjectManifest,
+    snapshot_store: SnapshotStore,
     tmp_path_factory: pytest.TempPathFactory,
 ) -> Path:
-    """Working copy of the project in a temp directory.
-
-    Copies the project so that nit commands (init, generate, etc.)
-    do not pollute the original source tree. Heavy directories
-    (node_modules, .venv) are symlinked to avoid slow copies and
-    broken paths.
+    """Private working copy of the project for the current test.
+
+    Cloned from the pristine template so that nit commands (init,
+    generate, etc.) neither pollute the original source tree nor leak
+    into other tests. Dependency directories (node_modules, .venv) are
+    symlinked to avoid slow copies and broken paths. Build output
+    directories are private to the copy and seeded from the source
+    tree's by :func:`build_output_seeder` when a command first builds.
     """
-    src = examples_root / project_manifest.path
-    assert src.is_dir(), f"Project not found: {src}"
-
     dst = tmp_path_factory.mktemp(project_manifest.name)
+    return snapshot_store.clone(project_template, dst)
+
+
+@pytest.fixture()
+def build_output_seeder(
+    project_dir: Path,
+    project_template: Snapshot,
+    snapshot_store: SnapshotStore,
+) -> BuildOutputSeeder:
+    """Listener that seeds the project copy's build output on its first build."""
+    return BuildOutputSeeder(snapshot_store, project_template, project_dir)
+
+
+@pytest.fixture(scope="session")
+def nit_result_cache(pytestconfig: pytest.Config) -> NitResultCache | None:
+    """Session-wide memo of read-only nit results (``--no-nit-cache`` disables)."""
+    if pytestconfig.getoption("no_nit_cache"):
+        return None
+    return NitResultCache(skip_dirs=HEAVY_DIRS)
+
+
+@pytest.fixture(scope="session")
+def nit_backend(pytestconfig: pytest.Config) -> Iterator[NitBackend]:
+    """Execution backend shared by every NitRunner in the session."""
+    backend: NitBackend
+    if pytestconfig.getoption("nit_backend") == "forkserver":
+        try:
+            backend = ForkServerBackend()
+        except RuntimeError as exc:
+            raise pytest.UsageError(f"--nit-backend=forkserver: {exc}") from exc
+    else:
+        backend = SubprocessBackend()
+    yield backend
+    backend.close()
+
+
+@pytest.fixture(scope="session")
+def nit_usage(pytestconfig: pytest.Config) -> UsageLog:
+    """Session log of every nit command's resource usage."""
+    return pytestconfig.stash[_USAGE_LOG]
 
-    def _ignore(directory: str, entries: list[str]) -> set[str]:
-        return {e for e in entries if e in _SYMLINK_DIRS}
 
-    shutil.copytree(src, dst, dirs_exist_ok=True, ignore=_ignore)
+@pytest.fixture(scope="session")
+def duration_history(pytestconfig: pytest.Config) -> DurationHistory:
+    """Past durations of tests and nit commands (see :mod:`tests.durations`)."""
+    return pytestconfig.stash[_HISTORY]
 
-    # Symlink heavy dirs from original so they work without reinstall.
-    # Walk the entire source tree to catch nested occurrences too
-    # (e.g. pnpm workspace per-package node_modules/).
-    for root, dirs, _files in os.walk(src):
-        for dirname in list(dirs):
-            if dirname in _SYMLINK_DIRS:
-                original = Path(root) / dirname
-                relative = original.relative_to(src)
-                link = dst / relative
-                # copytree's _ignore already excluded it, so just symlink
-                if not link.exists() and not link.is_symlink():
-                    link.symlink_to(original)
-                # Don't descend into symlinked dirs
-                dirs.remove(dirname)
 
-    return dst
+@pytest.fixture()
+def nit(
+    request: pytest.FixtureRequest,
+    project_dir: Path,
+    project_manifest: ProjectManifest,
+    nit_result_cache: NitResultCache | None,
+    nit_backend: NitBackend,
+    nit_usage: UsageLog,
+    ollama_meter: OllamaMeter | None,
+    duration_history: DurationHistory,
+    build_output_seeder: BuildOutputSeeder,
+) -> NitRunner:
+    """NitRunner bound to the current project copy.
+
+    Command timeouts adapt to the project's duration history unless
+    ``--no-adaptive-timeouts`` is given.
+    """
+    project, test = project_manifest.name, request.node.nodeid
+    listeners = [
+        build_output_seeder,
+        nit_usage.listener(project=project, test=test),
+        duration_history.listener(project=project),
+    ]
+    if ollama_meter is not None:
+        listeners.append(ollama_meter.listener(project=project, test=test))
+    adaptive = not request.config.getoption("no_adaptive_timeouts")
+    return NitRunner(
+        project_dir,
+        cache=nit_result_cache,
+        backend=nit_backend,
+        listeners=listeners,
+        timeout_policy=duration_history.timeout_policy(project) if adaptive else None,
+    )
 
 
 @pytest.fixture()
-def nit(project_dir: Path) -> NitRunner:
-    """NitRunner bound to the current project copy."""
-    return NitRunner(project_dir)
+def async_nit(
+    request: pytest.FixtureRequest,
+    project_dir: Path,
+    project_manifest: ProjectManifest,
+    nit_usage: UsageLog,
+    ollama_meter: OllamaMeter | None,
+    duration_history: DurationHistory,
+    build_output_seeder: BuildOutputSeeder,
+) -> AsyncNitRunner:
+    """AsyncNitRunner bound to the current project copy.
+
+    When metering, each command reaches the Ollama proxy as its own client,
+    so the requests of concurrent commands are not mixed up.
+    """
+    project, test = project_manifest.name, request.node.nodeid
+    listeners = [
+        build_output_seeder,
+        nit_usage.listener(project=project, test=test),
+        duration_history.listener(project=project),
+    ]
+    env = None
+    if ollama_meter is not None:
+        listeners.append(ollama_meter.listener(project=project, test=test))
+        ollama_info: OllamaInfo = request.getfixturevalue("ollama_info")
+        env = ollama_meter.command_env(ollama_info.host, test)
+    return AsyncNitRunner(project_dir, listeners=listeners, env=env)
 
 
 @pytest.fixture()
 def nit_with_ollama(
+    request: pytest.FixtureRequest,
     nit: NitRunner,
     ollama_info: OllamaInfo,
 ) -> NitRunner:
     """NitRunner that has been init'd and configured with discovered Ollama.
 
-    Calls ``nit init --auto``, then overrides LLM config with the
-    Ollama host and model found during session-scoped discovery.
+    The project copy comes from :func:`ollama_snapshot`, which already
+    ran ``nit init --auto`` and set the Ollama host and model found
+    during session-scoped discovery. Behind a harness proxy, the test's
+    own ``llm.base_url`` is set so requests are attributed to it. Command
+    timeouts are scaled by the measured model throughput.
     """
-    nit.init(auto=True)
-    _configure_ollama_for_project(nit, ollama_info)
+    nit.timeout_scale = ollama_info.timeout_scale
+    if ollama_info.routed:
+        nit.configure({"llm.base_url": client_url(ollama_info.host, request.node.nodeid)})
     return nit
 
 
@@ -225,27 +922,9 @@ def nit_with_ollama(
 # ---------------------------------------------------------------------------
 
 
-def _init_git_repo(path: Path) -> None:
-    """Initialize a git repo with an initial commit + v0.0.0 tag + second commit."""
-    env = {**os.environ, "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "t@t.com",
-           "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "t@t.com"}
-    run = lambda *args: subprocess.run(  # noqa: E731
-        args, cwd=str(path), capture_output=True, env=env, check=True,
-    )
-    run("git", "init")
-    run("git", "add", "-A")
-    run("git", "commit", "-m", "feat: initial commit")
-    run("git", "tag", "v0.0.0")
-    # Add a second commit so changelog has something to report
-    marker = path / ".nit-changelog-marker"
-    marker.write_text("test\n")
-    run("git", "add", "-A")
-    run("git", "commit", "-m", "fix: add changelog marker for testing")
-
-
-@pytest.fixture(scope="session")
+@pytest.fixture()
 def project_dir_with_git(project_dir: Path) -> Path:
     """Project copy with git history (initial commit + tag + second commit)."""
     if not (project_dir / ".git").exists():
-        _init_git_repo(project_dir)
+        init_git_repo(project_dir)
     return project_dir
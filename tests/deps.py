@@ -0,0 +1,342 @@
+"""Dependency setup for the example projects, cached by lockfile content.
+
+Each manifest's ``setup_commands`` (``npm install``, ``cargo build``, ...)
+produce its ``dependency_dirs`` (``node_modules``, ``target``, ...) inside
+the source tree, where :mod:`tests.snapshots` links them into every clone.
+:class:`DependencyCache` keys those directories by a hash of the
+project's ``lockfiles``: after a successful install they are stored under
+``<cache>/deps/<name>-<key>``, and a later setup with the same key
+restores them (reflinked where possible) instead of running the commands
+again. A setup whose key matches what is already installed does nothing.
+
+Projects without lockfiles are not cached and always run their commands;
+projects without dependency dirs (``pip install`` into the current
+interpreter, ``go mod download`` into the module cache) only remember
+which key was installed last.
+
+Usage::
+
+    python -m tests.deps
+    python -m tests.deps -j 4 --project nextjs-app --project rust-cli
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from tests.compiler_cache import compiler_cache_env
+from tests.manifests import ProjectManifest, select_projects
+from tests.manifests import examples_root as default_examples_root
+from tests.snapshots import clone_file, default_cache_dir
+
+STATUSES = ("current", "restored", "installed", "uncached", "failed")
+
+_OUTPUT_TAIL = 40
+
+
+@dataclass(frozen=True)
+class SetupResult:
+    """What setting up one project's dependencies took.
+
+    ``status`` is one of :data:`STATUSES`: already ``current``,
+    ``restored`` from the cache, ``installed`` by running the setup
+    commands (and stored), ``uncached`` (commands run, nothing to key on),
+    or ``failed`` (``detail`` holds the tail of the command output).
+    """
+
+    project: str
+    status: str
+    seconds: float
+    key: str = ""
+    detail: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+class DependencyCache:
+    """Content-addressed store of installed dependency directories."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def key(self, manifest: ProjectManifest, source: Path) -> str | None:
+        """Hash of everything that decides *manifest*'s dependencies.
+
+        ``None`` when the manifest declares no lockfiles. The source path
+        is part of the key because installed trees embed it (virtualenv
+        scripts, cargo fingerprints, ``obj/project.assets.json``).
+        """
+        if not manifest.lockfiles:
+            return None
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (
+            manifest.name,
+            os.fsdecode(source.resolve()),
+            sys.platform,
+            platform.machine(),
+            *manifest.setup_commands,
+        ):
+            digest.update(part.encode() + b"\0")
+        for path in _expand(source, manifest.lockfiles):
+            digest.update(path.relative_to(source).as_posix().encode() + b"\0")
+            digest.update(path.read_bytes())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def setup(
+        self,
+        manifest: ProjectManifest,
+        source: Path,
+        *,
+        force: bool = False,
+        env: Mapping[str, str] | None = None,
+    ) -> SetupResult:
+        """Make *source*'s dependencies match its lockfiles.
+
+        With *force*, the setup commands run even on a cache hit and
+        their result replaces the stored entry. *env* is added to the
+        environment of the setup commands.
+        """
+        start = time.monotonic()
+        key = self.key(manifest, source)
+
+        def result(status: str, detail: str = "") -> SetupResult:
+            return SetupResult(
+                manifest.name, status, time.monotonic() - start, key or "", detail,
+            )
+
+        if key is None:
+            error = _run_commands(manifest.setup_commands, source, env)
+            return result("failed", error) if error else result("uncached")
+        if not force and self._installed(manifest, source) == key:
+            return result("current")
+
+        entry = self._entry(manifest, key)
+        if not force and manifest.dependency_dirs and entry.is_dir():
+            self._restore(entry, source)
+            self._mark_installed(manifest, source, key)
+            return result("restored")
+
+        error = _run_commands(manifest.setup_commands, source, env)
+        if error:
+            return result("failed", error)
+        if manifest.dependency_dirs:
+            self._store(manifest, source, key)
+        self._mark_installed(manifest, source, key)
+        return result("installed")
+
+    def _entry(self, manifest: ProjectManifest, key: str) -> Path:
+        return self.root / f"{manifest.name}-{key[:16]}"
+
+    def _store(self, manifest: ProjectManifest, source: Path, key: str) -> None:
+        """Copy *source*'s dependency dirs into the store atomically.
+
+        Concurrent setups may race to store the same key; the loser
+        simply discards its copy.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(manifest, key)
+        staging = Path(tempfile.mkdtemp(prefix=f".{entry.name}-", dir=self.root))
+        dirs = [p for p in _expand(source, manifest.dependency_dirs) if p.is_dir()]
+        for path in dirs:
+            relative = path.relative_to(source)
+            shutil.copytree(
+                path, staging / "dirs" / relative, symlinks=True, copy_function=clone_file,
+            )
+        (staging / "entry.json").write_text(
+            json.dumps(
+                {
+                    "project": manifest.name,
+                    "key": key,
+                    "commands": manifest.setup_commands,
+                    "dirs": [p.relative_to(source).as_posix() for p in dirs],
+                },
+                indent=2,
+            )
+            + "\n",
+        )
+        try:
+            staging.rename(entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not entry.is_dir():
+                raise
+        self._prune(manifest.name, keep=entry)
+
+    def _restore(self, entry: Path, source: Path) -> None:
+        """Replace *source*'s dependency dirs with the stored ones."""
+        dirs = json.loads((entry / "entry.json").read_text())["dirs"]
+        for relative in dirs:
+            dst = source / relative
+            if dst.is_symlink() or dst.is_file():
+                dst.unlink()
+            elif dst.is_dir():
+                shutil.rmtree(dst)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copytree(
+                entry / "dirs" / relative, dst, symlinks=True, copy_function=clone_file,
+            )
+
+    def _prune(self, name: str, *, keep: Path) -> None:
+        """Remove stored dependencies of *name* for older lockfiles."""
+        for old in self.root.glob(f"{name}-*"):
+            if old != keep and old.is_dir():
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _state_file(self, manifest: ProjectManifest) -> Path:
+        return self.root / "installed" / f"{manifest.name}.json"
+
+    def _installed(self, manifest: ProjectManifest, source: Path) -> str | None:
+        """Key last installed into *source* by this interpreter, if still there."""
+        try:
+            state = json.loads(self._state_file(manifest).read_text())
+        except (OSError, ValueError):
+            return None
+        if state.get("source") != os.fsdecode(source.resolve()) or state.get("python") != sys.prefix:
+            return None
+        if any(not (source / d).is_dir() for d in state.get("dirs", [])):
+            return None
+        return state.get("key")
+
+    def _mark_installed(self, manifest: ProjectManifest, source: Path, key: str) -> None:
+        path = self._state_file(manifest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dirs = [p.relative_to(source).as_posix() for p in _expand(source, manifest.dependency_dirs)]
+        path.write_text(
+            json.dumps(
+                {
+                    "key": key,
+                    "source": os.fsdecode(source.resolve()),
+                    "python": sys.prefix,
+                    "dirs": dirs,
+                },
+            )
+            + "\n",
+        )
+
+
+def setup_projects(
+    manifests: Iterable[ProjectManifest],
+    examples_root: Path | None = None,
+    *,
+    cache: DependencyCache | None = None,
+    workers: int = 0,
+    force: bool = False,
+    env: Mapping[str, str] | None = None,
+) -> list[SetupResult]:
+    """Set up every project's dependencies, projects in parallel.
+
+    *examples_root* defaults to :func:`tests.manifests.examples_root`.
+    *env* (e.g. :func:`tests.compiler_cache.compiler_cache_env`) is added
+    to the environment of the setup commands.
+    """
+    cache = cache or DependencyCache(default_cache_dir() / "deps")
+    root = (examples_root or default_examples_root()).resolve()
+    manifests = list(manifests)
+    with ThreadPoolExecutor(max_workers=workers or len(manifests) or 1) as pool:
+        futures = [
+            pool.submit(cache.setup, m, root / m.path, force=force, env=env)
+            for m in manifests
+        ]
+        return [f.result() for f in futures]
+
+
+def print_results(results: list[SetupResult]) -> None:
+    """Print a per-project table of setup outcomes."""
+    print(f"\n{'project':<16} {'deps':<10} {'time':>9}")
+    for r in results:
+        print(f"{r.project:<16} {r.status:<10} {r.seconds:>8.1f}s")
+    for r in results:
+        if not r.ok:
+            print(f"\n===== {r.project} setup failed =====\n{r.detail}")
+
+
+def _expand(source: Path, patterns: Iterable[str]) -> list[Path]:
+    """Paths under *source* matching any glob in *patterns*, sorted."""
+    found: set[Path] = set()
+    for pattern in patterns:
+        found.update(source.glob(pattern))
+    return sorted(found)
+
+
+def _run_commands(
+    commands: Iterable[str], cwd: Path, env: Mapping[str, str] | None = None,
+) -> str:
+    """Run *commands* in order through the shell; the error output or ``""``."""
+    for command in commands:
+        proc = subprocess.run(
+            command,
+            shell=True,
+            cwd=cwd,
+            env={**os.environ, **env} if env else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+        if proc.returncode:
+            tail = "\n".join(proc.stdout.splitlines()[-_OUTPUT_TAIL:])
+            return f"$ {command}  (exit {proc.returncode})\n{tail}"
+    return ""
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.deps",
+        description="Install or restore the example projects' dependencies.",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        help="Concurrent setups (default: one per selected project).",
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        default=[],
+        dest="projects",
+        metavar="NAME",
+        help="Only set up the named project (repeatable).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the setup commands even when the cache has a match.",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        projects = select_projects(args.projects)
+    except KeyError as exc:
+        parser.error(exc.args[0])
+    root = default_examples_root().resolve()
+    results = setup_projects(
+        projects,
+        root,
+        workers=args.workers,
+        force=args.force,
+        env=compiler_cache_env(default_cache_dir() / "build", basedir=root),
+    )
+    print_results(results)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
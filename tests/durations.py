@@ -0,0 +1,244 @@
+"""Persistent duration history of tests and nit commands.
+
+:class:`DurationHistory` keeps the most recent durations of every test
+and of every nit command, per project, in one JSON file shared by all
+sessions (``durations.json`` in the harness cache dir). The harness uses
+it in two ways:
+
+* :mod:`tests.parallel` starts the slowest projects first
+  (longest-processing-time order), which shortens the run when there are
+  fewer workers than projects, and within a session
+  :func:`longest_first` runs the slowest tests first;
+* :meth:`DurationHistory.timeout_policy` replaces the fixed per-command
+  timeouts with a multiple of the observed 95th percentile, so a hung
+  command fails after about a minute instead of the full static limit.
+
+Sessions merge their new samples into the file under a lock, so parallel
+shards can share it.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+
+from tests.nit_runner import NitListener, NitResult, command_words
+from tests.snapshots import default_cache_dir
+
+HISTORY_ENV = "NIT_DURATION_HISTORY"
+
+# Samples kept per test and per command; older ones are dropped.
+_KEEP = 20
+# Commands need this many samples before their timeout adapts.
+_MIN_SAMPLES = 5
+_TIMEOUT_FACTOR = 3.0
+_TIMEOUT_FLOOR = 60.0
+
+TimeoutPolicy = Callable[[tuple[str, ...], float], float]
+
+T = TypeVar("T")
+
+
+def default_history_path() -> Path:
+    """``$NIT_DURATION_HISTORY``, else ``durations.json`` in the cache dir."""
+    env = os.environ.get(HISTORY_ENV)
+    return Path(env) if env else default_cache_dir() / "durations.json"
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """The *q*-th percentile (0-100) of *samples*, nearest-rank."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def command_shape(args: tuple[str, ...]) -> str:
+    """History key of a nit command: its sub-command words plus its flags.
+
+    Option values and positional arguments (paths, keys) are dropped and
+    flags sorted, so ``docs --changelog --no-llm --path /tmp/x`` and
+    ``docs --all --path /tmp/y`` are kept apart, while every run of the
+    same mode shares one history.
+    """
+    words = command_words(args)
+    flags = sorted({arg.partition("=")[0] for arg in args[len(words):] if arg.startswith("-")})
+    flags = [flag for flag in flags if flag != "--path"]
+    return " ".join([*words, *flags])
+
+
+def adaptive_timeout(samples: list[float], default: float) -> float:
+    """Timeout for a command that took *samples* seconds in the past.
+
+    ``_TIMEOUT_FACTOR`` times the 95th percentile, at least
+    ``_TIMEOUT_FLOOR`` and never more than *default*; *default* itself
+    until there are ``_MIN_SAMPLES`` samples.
+    """
+    if len(samples) < _MIN_SAMPLES:
+        return default
+    return min(default, max(_TIMEOUT_FLOOR, _TIMEOUT_FACTOR * percentile(samples, 95)))
+
+
+class _HistoryListener(NitListener):
+    def __init__(self, history: DurationHistory, project: str) -> None:
+        self.history = history
+        self.project = project
+
+    def command_finished(
+        self, runner: Any, args: tuple[str, ...], result: NitResult,
+    ) -> None:
+        if result.usage is not None:  # cached results took no time
+            self.history.add_command(self.project, command_shape(args), result.usage.wall_seconds)
+
+
+class DurationHistory:
+    """Recent durations per (project, test) and per (project, command).
+
+    Loaded from *path* on creation; :meth:`save` merges the samples added
+    since then back into the file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        data = _read(path)
+        self._tests: dict[str, dict[str, list[float]]] = data["tests"]
+        self._commands: dict[str, dict[str, list[float]]] = data["commands"]
+        self._new: dict[str, Any] = {"tests": {}, "commands": {}}
+
+    # --- Recording -----------------------------------------------------------
+
+    def add_test(self, project: str, nodeid: str, seconds: float) -> None:
+        self._add("tests", project, nodeid, seconds)
+
+    def add_command(self, project: str, command: str, seconds: float) -> None:
+        """Record a sample for *command*, a :func:`command_shape` key."""
+        self._add("commands", project, command, seconds)
+
+    def listener(self, *, project: str) -> NitListener:
+        """Listener that records the wall time of every command it sees."""
+        return _HistoryListener(self, project)
+
+    def save(self) -> None:
+        """Merge this session's samples into the file (atomically, locked)."""
+        with self._lock:
+            new = self._new
+            self._new = {"tests": {}, "commands": {}}
+        if not any(new.values()):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _locked(self.path.with_name(self.path.name + ".lock")):
+            data = _read(self.path)
+            for kind, projects in new.items():
+                for project, entries in projects.items():
+                    bucket = data[kind].setdefault(project, {})
+                    for key, samples in entries.items():
+                        bucket[key] = (bucket.get(key, []) + samples)[-_KEEP:]
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(data, fh, indent=1, sort_keys=True)
+                fh.write("\n")
+            os.replace(tmp, self.path)
+
+    # --- Queries -------------------------------------------------------------
+
+    def test_seconds(self, project: str, nodeid: str) -> float | None:
+        """Median duration of one test, ``None`` if never seen."""
+        with self._lock:
+            samples = self._tests.get(project, {}).get(nodeid)
+            return percentile(samples, 50) if samples else None
+
+    def project_seconds(self, project: str) -> float | None:
+        """Sum of the median durations of *project*'s tests, ``None`` if unknown."""
+        with self._lock:
+            tests = self._tests.get(project)
+            if not tests:
+                return None
+            return sum(percentile(samples, 50) for samples in tests.values() if samples)
+
+    def timeout_policy(self, project: str) -> TimeoutPolicy:
+        """``(args, default) -> timeout`` for *project*'s nit commands.
+
+        See :func:`adaptive_timeout`.
+        """
+
+        def policy(args: tuple[str, ...], default: float) -> float:
+            with self._lock:
+                samples = list(self._commands.get(project, {}).get(command_shape(args), ()))
+            return adaptive_timeout(samples, default)
+
+        return policy
+
+    def _add(self, kind: str, project: str, key: str, seconds: float) -> None:
+        with self._lock:
+            seen = getattr(self, f"_{kind}").setdefault(project, {}).setdefault(key, [])
+            seen.append(seconds)
+            del seen[:-_KEEP]
+            self._new[kind].setdefault(project, {}).setdefault(key, []).append(seconds)
+
+
+def longest_first(
+    tests: Sequence[T],
+    history: DurationHistory,
+    where: Callable[[T], tuple[str, str, str]],
+) -> list[T]:
+    """*tests* reordered slowest first, without splitting projects or modules.
+
+    *where* maps a test to ``(project, module, nodeid)``. Projects are
+    ordered by the summed median durations of their tests, then modules
+    within a project, then tests within a module, so session- and
+    module-scoped fixtures are still set up once per group. A test with
+    no history counts as slowest; ties keep their original order.
+    """
+
+    def seconds(test: T) -> float:
+        project, _, nodeid = where(test)
+        known = history.test_seconds(project, nodeid)
+        return math.inf if known is None else known
+
+    totals: dict[tuple[str, ...], float] = {}
+    for test in tests:
+        project, module, _ = where(test)
+        for group in ((project,), (project, module)):
+            totals[group] = totals.get(group, 0.0) + seconds(test)
+
+    def order(test: T) -> tuple[float, float, float]:
+        project, module, _ = where(test)
+        return -totals[(project,)], -totals[(project, module)], -seconds(test)
+
+    return sorted(tests, key=order)
+
+
+def _read(path: Path) -> dict[str, Any]:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    return {
+        "tests": data.get("tests") or {},
+        "commands": data.get("commands") or {},
+    }
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on *path* (no-op where ``fcntl`` is missing)."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover — non-POSIX
+        yield
+        return
+    with path.open("a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
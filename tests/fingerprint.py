@@ -0,0 +1,51 @@
+"""Content fingerprints for project trees.
+
+Used to decide whether two points in time saw the same project state,
+e.g. to reuse a nit result across tests.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections.abc import Collection
+from pathlib import Path
+
+
+def hash_tree(
+    root: Path,
+    *,
+    skip_dirs: Collection[str] = (),
+    relocatable: bool = False,
+) -> str:
+    """Return a hex digest over every file path and its contents under *root*.
+
+    Directories whose name is in *skip_dirs* are not descended into, and
+    symlinks are hashed by their target path rather than followed — the
+    harness symlinks heavy dependency directories back to the original
+    tree, and their contents are not part of the project state.
+
+    With *relocatable*, occurrences of *root* itself inside files are
+    ignored, so two copies of a project that only differ by where they
+    live (e.g. ``project.root`` in ``.nit.yml``) hash the same.
+    """
+    marker = os.fsencode(root) if relocatable else b""
+    digest = hashlib.blake2b(digest_size=20)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in skip_dirs)
+        base = Path(dirpath)
+        for name in sorted([*filenames, *(d for d in dirnames if (base / d).is_symlink())]):
+            path = base / name
+            rel = path.relative_to(root).as_posix()
+            digest.update(rel.encode())
+            digest.update(b"\0")
+            if path.is_symlink():
+                digest.update(b"->" + os.readlink(path).encode())
+            elif marker:
+                digest.update(path.read_bytes().replace(marker, b"\0root\0"))
+            else:
+                with path.open("rb") as fh:
+                    for chunk in iter(lambda: fh.read(1 << 16), b""):
+                        digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
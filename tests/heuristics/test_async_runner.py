@@ -0,0 +1,51 @@
+"""Heuristics: AsyncNitRunner reports what a command cost and kills stragglers."""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.nit_runner import AsyncNitRunner
+
+pytestmark = pytest.mark.heuristics
+
+# Stands in for nit: burns a little CPU, then sleeps for argv[-1] seconds.
+_FAKE_NIT = """
+import sys, time
+sum(range(10**6))
+print("out"); print("err", file=sys.stderr)
+time.sleep(float(sys.argv[-1]))
+"""
+
+
+def _runner(path: Path) -> AsyncNitRunner:
+    runner = AsyncNitRunner(path)
+    runner._nit_cmd = [sys.executable, "-c", _FAKE_NIT]
+    return runner
+
+
+class TestAsyncNitRunner:
+    """Children are reaped with their rusage, on success and on timeout."""
+
+    def test_usage_includes_cpu_and_rss(self, tmp_path: Path) -> None:
+        result = asyncio.run(_runner(tmp_path).run("0"))
+        assert result.success
+        assert (result.stdout, result.stderr) == ("out\n", "err\n")
+        assert result.usage is not None
+        assert result.usage.user_seconds is not None
+        assert result.usage.system_seconds is not None
+        assert result.usage.max_rss_kb
+
+    def test_timeout_kills_and_reaps(self, tmp_path: Path) -> None:
+        runner = _runner(tmp_path)
+
+        async def _run() -> None:
+            with pytest.raises(subprocess.TimeoutExpired):
+                await runner.run("30", timeout=1)
+            assert (await runner.run("0")).success
+
+        asyncio.run(_run())
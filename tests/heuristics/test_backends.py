@@ -0,0 +1,48 @@
+"""Heuristics: the forkserver backend must be indistinguishable from subprocess."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from tests.nit_runner import ForkServerBackend, NitRunner, SubprocessBackend
+
+pytestmark = pytest.mark.heuristics
+
+
+@pytest.fixture(scope="module")
+def forkserver() -> Iterator[ForkServerBackend]:
+    try:
+        backend = ForkServerBackend(size=1)
+    except RuntimeError as exc:
+        pytest.skip(f"forkserver backend unavailable: {exc}")
+    yield backend
+    backend.close()
+
+
+class TestForkServerParity:
+    """Same command, same project state -> same exit code and output."""
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ("scan", "--json-output"),
+            ("config", "show", "--json-output"),
+            ("memory", "show", "--json-output"),
+        ],
+        ids=["scan", "config-show", "memory-show"],
+    )
+    def test_same_result(
+        self,
+        project_dir: Path,
+        forkserver: ForkServerBackend,
+        args: tuple[str, ...],
+    ) -> None:
+        NitRunner(project_dir).init()
+        cmd = (*args, "--path", str(project_dir))
+        expected = NitRunner(project_dir, backend=SubprocessBackend()).run(*cmd)
+        actual = NitRunner(project_dir, backend=forkserver).run(*cmd)
+        assert actual.exit_code == expected.exit_code, actual.stderr
+        assert actual.json() == expected.json()
@@ -0,0 +1,75 @@
+"""Heuristics: a change selects exactly the projects it can affect."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from tests.changes import affected_projects, changed_paths
+from tests.manifests import ALL_PROJECTS
+
+pytestmark = pytest.mark.heuristics
+
+
+def _names(paths: list[str]) -> list[str]:
+    return [m.name for m in affected_projects(paths)]
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+class TestAffectedProjects:
+    """Project files pick their project, harness files every project."""
+
+    def test_project_file(self) -> None:
+        assert _names(["rust-cli/src/main.rs"]) == ["rust-cli"]
+
+    def test_several_projects_keep_manifest_order(self) -> None:
+        assert _names(["rust-cli/Cargo.toml", "go-api/main.go"]) == ["go-api", "rust-cli"]
+
+    def test_harness_change_selects_everything(self) -> None:
+        assert _names(["README.md", "tests/conftest.py"]) == [m.name for m in ALL_PROJECTS]
+
+    def test_other_files_select_nothing(self) -> None:
+        assert _names(["README.md", "LICENSE", ".github/workflows/ci.yml"]) == []
+
+    def test_name_prefix_is_not_a_match(self) -> None:
+        assert _names(["go-api-old/main.go", "python-api.md"]) == []
+
+
+class TestChangedPaths:
+    """Commits since the base, uncommitted edits and untracked files."""
+
+    @pytest.fixture()
+    def repo(self, tmp_path: Path) -> Path:
+        (tmp_path / "go-api").mkdir()
+        (tmp_path / "go-api" / "main.go").write_text("package main\n")
+        (tmp_path / "rust-cli").mkdir()
+        (tmp_path / "rust-cli" / "lib.rs").write_text("\n")
+        _git(tmp_path, "init", "-q", "-b", "main")
+        _git(tmp_path, "add", ".")
+        _git(tmp_path, "commit", "-q", "-m", "base")
+        return tmp_path
+
+    def test_all_sources_of_change(self, repo: Path) -> None:
+        _git(repo, "checkout", "-q", "-b", "topic")
+        (repo / "go-api" / "main.go").write_text("package main // edited\n")
+        _git(repo, "commit", "-q", "-am", "edit")
+        (repo / "rust-cli" / "lib.rs").write_text("// dirty\n")
+        (repo / "notes.txt").write_text("untracked\n")
+
+        assert changed_paths("main", repo) == ["go-api/main.go", "notes.txt", "rust-cli/lib.rs"]
+
+    def test_paths_are_relative_to_root(self, repo: Path) -> None:
+        (repo / "go-api" / "util.go").write_text("package main\n")
+        assert changed_paths("main", repo / "go-api") == ["util.go"]
+
+    def test_unknown_ref(self, repo: Path) -> None:
+        with pytest.raises(RuntimeError, match="failed"):
+            changed_paths("no-such-ref", repo)
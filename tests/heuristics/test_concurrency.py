@@ -0,0 +1,34 @@
+"""Heuristics: overlapping read-only nit commands on one project."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from tests.assertions import assert_json_parseable
+from tests.nit_runner import AsyncNitRunner, NitResult, NitRunner
+
+pytestmark = pytest.mark.heuristics
+
+
+class TestConcurrentReads:
+    """Independent read-only commands should not interfere with each other."""
+
+    def test_scan_config_memory_overlap(
+        self,
+        nit: NitRunner,
+        async_nit: AsyncNitRunner,
+    ) -> None:
+        nit.init()
+
+        async def _all() -> list[NitResult]:
+            return await asyncio.gather(
+                async_nit.scan(json_output=True, force=True),
+                async_nit.config_show(json_output=True),
+                async_nit.memory_show(json_output=True),
+            )
+
+        for result in asyncio.run(_all()):
+            assert result.success, f"concurrent command failed:\n{result.stderr}"
+            assert_json_parseable(result)
@@ -0,0 +1,145 @@
+"""Heuristics: timeouts and test order learned from recorded durations."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+
+from tests.durations import (
+    DurationHistory,
+    adaptive_timeout,
+    command_shape,
+    longest_first,
+    percentile,
+)
+from tests.nit_runner import NitResult, NitRunner
+
+pytestmark = pytest.mark.heuristics
+
+
+class _TimeoutRecorder:
+    """Backend that only records the timeout each command was given."""
+
+    nit_cmd = ["nit"]
+
+    def __init__(self) -> None:
+        self.timeouts: list[float] = []
+
+    def execute(
+        self, args: Sequence[str], *, cwd: Path, timeout: float,
+    ) -> NitResult:
+        self.timeouts.append(timeout)
+        return NitResult(exit_code=0, stdout="", stderr="")
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def history(tmp_path: Path) -> DurationHistory:
+    return DurationHistory(tmp_path / "durations.json")
+
+
+class TestAdaptiveTimeout:
+    """Three times the p95, floored, capped by the static timeout."""
+
+    @pytest.mark.parametrize(
+        ("samples", "default", "expected"),
+        [
+            ([100.0] * 4, 300, 300),      # too few samples: static timeout
+            ([100.0] * 5, 600, 300),      # 3 x p95
+            ([100.0] * 5, 200, 200),      # never above the static timeout
+            ([1.0] * 5, 300, 60),         # never below the floor
+            ([10.0] * 19 + [90.0], 600, 60),  # p95 ignores the single outlier
+            ([10.0] * 18 + [90.0] * 2, 600, 270),
+        ],
+    )
+    def test_math(self, samples: list[float], default: float, expected: float) -> None:
+        assert adaptive_timeout(samples, default) == expected
+
+    def test_percentile_is_nearest_rank(self) -> None:
+        samples = [float(n) for n in range(1, 11)]
+        assert percentile(samples, 50) == 5.0
+        assert percentile(samples, 95) == 10.0
+        assert percentile(samples, 0) == 1.0
+
+    def test_command_shape_drops_values_and_paths(self) -> None:
+        assert command_shape(("docs", "--changelog", "--path", "/tmp/x")) == "docs --changelog"
+        assert command_shape(("scan", "--force=true", "--json")) == "scan --force --json"
+        assert command_shape(("config", "set", "llm.model", "x")) == "config set"
+
+
+class TestTimeoutScale:
+    """The model speed factor scales the static timeout, not the learned one."""
+
+    def _limit(self, tmp_path: Path, history: DurationHistory) -> float:
+        backend = _TimeoutRecorder()
+        nit = NitRunner(
+            tmp_path,
+            backend=backend,  # type: ignore[arg-type]
+            timeout_scale=4.0,
+            timeout_policy=history.timeout_policy("p"),
+        )
+        nit.run("generate")
+        return backend.timeouts[0]
+
+    def test_unknown_command_gets_scaled_static_timeout(
+        self, tmp_path: Path, history: DurationHistory,
+    ) -> None:
+        assert self._limit(tmp_path, history) == 300 * 4.0
+
+    def test_learned_timeout_is_not_scaled_again(
+        self, tmp_path: Path, history: DurationHistory,
+    ) -> None:
+        for _ in range(5):
+            history.add_command("p", "generate", 100.0)
+        assert self._limit(tmp_path, history) == 300
+
+
+class TestLongestFirst:
+    """Slowest groups first, without splitting a project or a module."""
+
+    def test_order(self, history: DurationHistory) -> None:
+        durations = {
+            ("a", "m1::t1"): 1.0,
+            ("a", "m1::t2"): 2.0,
+            ("a", "m2::t1"): 5.0,
+            ("b", "m1::t1"): 10.0,
+        }
+        for (project, nodeid), seconds in durations.items():
+            history.add_test(project, nodeid, seconds)
+        tests = [*durations, ("a", "m1::t3")]
+
+        ordered = longest_first(
+            tests, history, lambda t: (t[0], t[1].partition("::")[0], t[1]),
+        )
+
+        # a's unknown test makes a and its m1 unknown, hence slowest.
+        assert ordered == [
+            ("a", "m1::t3"),
+            ("a", "m1::t2"),
+            ("a", "m1::t1"),
+            ("a", "m2::t1"),
+            ("b", "m1::t1"),
+        ]
+
+    def test_known_projects_by_total(self, history: DurationHistory) -> None:
+        history.add_test("a", "m::t1", 3.0)
+        history.add_test("a", "m::t2", 3.0)
+        history.add_test("b", "m::t1", 5.0)
+        tests = [("b", "m::t1"), ("a", "m::t1"), ("a", "m::t2")]
+
+        ordered = longest_first(tests, history, lambda t: (t[0], "m", t[1]))
+
+        assert ordered == [("a", "m::t1"), ("a", "m::t2"), ("b", "m::t1")]
+
+    def test_history_round_trip(self, tmp_path: Path, history: DurationHistory) -> None:
+        history.add_test("a", "m::t", 2.0)
+        history.add_command("a", "scan", 1.5)
+        history.save()
+        reloaded = DurationHistory(tmp_path / "durations.json")
+        assert reloaded.test_seconds("a", "m::t") == 2.0
+        assert reloaded.project_seconds("a") == 2.0
+        assert reloaded.test_seconds("a", "m::other") is None
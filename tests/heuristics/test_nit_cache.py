@@ -0,0 +1,113 @@
+"""Heuristics: the in-session nit result cache must never hide a real run."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+
+from tests.nit_runner import NitResult, NitResultCache, NitRunner
+
+pytestmark = pytest.mark.heuristics
+
+
+class _RecordingBackend:
+    """Backend that records each command and touches ``.nit/`` like scan."""
+
+    nit_cmd = ["nit"]
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, ...]] = []
+
+    def execute(
+        self, args: Sequence[str], *, cwd: Path, timeout: float,
+    ) -> NitResult:
+        self.calls.append(tuple(args))
+        if "init" in args or "--force" in args:
+            state = cwd / ".nit" / "state"
+            state.parent.mkdir(exist_ok=True)
+            state.write_text(f"{len(self.calls)}\n")
+        return NitResult(exit_code=0, stdout=f'{{"dir": "{cwd}"}}\n', stderr="")
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def backend() -> _RecordingBackend:
+    return _RecordingBackend()
+
+
+@pytest.fixture()
+def cache() -> NitResultCache:
+    return NitResultCache()
+
+
+def _project(path: Path) -> Path:
+    path.mkdir()
+    (path / "main.py").write_text("print('hi')\n")
+    return path
+
+
+def _runner(path: Path, cache: NitResultCache, backend: _RecordingBackend) -> NitRunner:
+    return NitRunner(path, cache=cache, backend=backend)  # type: ignore[arg-type]
+
+
+class TestNitResultCache:
+    """Hits need the same arguments and tree; anything else reaches nit."""
+
+    def test_repeated_scan_is_served_from_cache(
+        self, tmp_path: Path, cache: NitResultCache, backend: _RecordingBackend,
+    ) -> None:
+        nit = _runner(_project(tmp_path / "p"), cache, backend)
+        first = nit.scan()
+        second = nit.scan()
+        assert len(backend.calls) == 1
+        assert second.stdout == first.stdout
+        assert cache.hits == 1
+
+    def test_forced_scan_reaches_backend(
+        self, tmp_path: Path, cache: NitResultCache, backend: _RecordingBackend,
+    ) -> None:
+        nit = _runner(_project(tmp_path / "p"), cache, backend)
+        nit.scan(force=True)
+        nit.scan(force=True)
+        assert len(backend.calls) == 2
+        assert cache.hits == 0
+        assert not NitResultCache.is_read_only(("scan", "--force"))
+        assert not NitResultCache.is_read_only(("scan", "--force=true"))
+
+    def test_clones_share_entries_with_their_own_paths(
+        self, tmp_path: Path, cache: NitResultCache, backend: _RecordingBackend,
+    ) -> None:
+        a = _project(tmp_path / "a")
+        b = _project(tmp_path / "b")
+        _runner(a, cache, backend).scan()
+        result = _runner(b, cache, backend).scan()
+        assert len(backend.calls) == 1
+        assert result.json() == {"dir": str(b)}
+
+    def test_changed_tree_misses(
+        self, tmp_path: Path, cache: NitResultCache, backend: _RecordingBackend,
+    ) -> None:
+        path = _project(tmp_path / "p")
+        nit = _runner(path, cache, backend)
+        nit.scan()
+        (path / "main.py").write_text("print('bye')\n")
+        nit.scan()
+        assert len(backend.calls) == 2
+
+    def test_mutating_command_invalidates_replaced_state(
+        self, tmp_path: Path, cache: NitResultCache, backend: _RecordingBackend,
+    ) -> None:
+        path = _project(tmp_path / "p")
+        nit = _runner(path, cache, backend)
+        before = cache.tree_hash(path)
+        nit.config_show()
+        assert len(cache) == 1
+        nit.init()
+        assert cache.tree_hash(path) != before
+        assert len(cache) == 0
+        nit.config_show()
+        assert len(backend.calls) == 3
@@ -0,0 +1,34 @@
+"""Heuristics: JSON is found in nit's stdout whatever precedes it."""
+
+from __future__ import annotations
+
+import pytest
+
+from tests.nit_runner import NitResult
+
+pytestmark = pytest.mark.heuristics
+
+
+def _result(stdout: str) -> NitResult:
+    return NitResult(exit_code=0, stdout=stdout, stderr="")
+
+
+class TestNitResultJson:
+    """json() is the first document, last_json() the trailing one."""
+
+    def test_report_after_preamble(self) -> None:
+        result = _result('Scanning...\n{\n  "languages": []\n}\n')
+        assert result.json() == result.last_json() == {"languages": []}
+
+    def test_event_stream(self) -> None:
+        result = _result('{"event": "start"}\n{"event": "done"}\n{"passed": 3}\n')
+        assert result.json() == {"event": "start"}
+        assert result.last_json() == {"passed": 3}
+        assert len(result.json_documents()) == 3
+
+    def test_pure_json_of_any_type(self) -> None:
+        assert _result("[1, 2]").json() == [1, 2]
+
+    def test_no_json(self) -> None:
+        with pytest.raises(ValueError, match="No JSON"):
+            _result("nothing to see\n").json()
@@ -0,0 +1,60 @@
+"""Heuristics: metered requests land on the nit command that made them."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from tests.nit_runner import current_command
+from tests.ollama_meter import OllamaMeter, command_client
+from tests.ollama_proxy import ProxyRequest, ProxyResponse
+
+pytestmark = pytest.mark.heuristics
+
+TEST = "tests/heuristics/test_x.py::test_y"
+
+
+def _ollama(request: ProxyRequest) -> ProxyResponse:
+    return ProxyResponse(200, json.dumps({"prompt_eval_count": 3, "eval_count": 5}).encode())
+
+
+def _chat(meter: OllamaMeter, client: str) -> None:
+    meter.wrap(_ollama)(ProxyRequest("POST", "/api/chat", b"{}", {}, client))
+
+
+class TestOllamaMeter:
+    """Concurrent commands of one test keep their own attribution."""
+
+    def test_overlapping_commands_are_told_apart(self) -> None:
+        meter = OllamaMeter()
+        listener = meter.listener(project="python-api", test=TEST)
+        clients = {}
+        for command, args in ((1, ("generate",)), (2, ("drift",))):
+            token = current_command.set(command)
+            listener.command_started(None, args)
+            clients[args[0]] = command_client(TEST, command)
+            current_command.reset(token)
+
+        _chat(meter, clients["drift"])
+        _chat(meter, clients["generate"])
+
+        assert [(r.test, r.command) for r in meter.records] == [
+            (TEST, "drift"),
+            (TEST, "generate"),
+        ]
+
+    def test_sync_commands_use_the_plain_test_client(self) -> None:
+        meter = OllamaMeter()
+        listener = meter.listener(project="python-api", test=TEST)
+        listener.command_started(None, ("analyze",))
+        _chat(meter, TEST)
+        listener.command_finished(None, ("analyze",), None)  # type: ignore[arg-type]
+        _chat(meter, TEST)
+
+        assert [r.command for r in meter.records] == ["analyze", "(harness)"]
+
+    def test_command_env_routes_through_the_command_client(self) -> None:
+        env = OllamaMeter.command_env("http://127.0.0.1:9", TEST)(4)
+        assert env["OLLAMA_HOST"].startswith("http://127.0.0.1:9/t/")
+        assert env["OLLAMA_HOST"].endswith("%234")
@@ -0,0 +1,42 @@
+"""Heuristics: cassette keys must not depend on run-specific paths."""
+
+from __future__ import annotations
+
+import pytest
+
+from tests.ollama_proxy import Scrubber
+
+pytestmark = pytest.mark.heuristics
+
+
+@pytest.fixture()
+def scrub() -> Scrubber:
+    return Scrubber({
+        "/tmp/pytest-of-ci/pytest-7": "<tmp>",
+        "/root/package": "<examples>",
+    })
+
+
+class TestScrubber:
+    """Numbered pytest directories fold into the token; real paths are kept."""
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("/tmp/pytest-of-ci/pytest-7/python-api0/src/x.py", "<tmp>/src/x.py"),
+            ("/tmp/pytest-of-ci/pytest-7/python-api13/src/x.py", "<tmp>/src/x.py"),
+            ("/tmp/pytest-of-ci/pytest-7/go-api2", "<tmp>"),
+            ("/root/package/python-api/src/x.py", "<examples>/python-api/src/x.py"),
+            ("/root/package/go-api/src/x.py", "<examples>/go-api/src/x.py"),
+            ("/root/package/README.md", "<examples>/README.md"),
+            ("/root/package", "<examples>"),
+            ('"/root/package/rust-cli/src/main.rs"', '"<examples>/rust-cli/src/main.rs"'),
+        ],
+    )
+    def test_scrubs(self, scrub: Scrubber, text: str, expected: str) -> None:
+        assert scrub(text) == expected
+
+    def test_projects_stay_distinct(self, scrub: Scrubber) -> None:
+        assert scrub("/root/package/python-api/src/x.py") != scrub(
+            "/root/package/go-api/src/x.py",
+        )
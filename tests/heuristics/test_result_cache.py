@@ -0,0 +1,100 @@
+"""Heuristics: a replayed pass must be invalidated by any input change."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.result_cache import ResultCache, harness_fingerprint, nit_fingerprint
+
+pytestmark = pytest.mark.heuristics
+
+_INPUTS = ("tests/heuristics/test_scan.py::test_x[go-api]", "nit", "harness", "tree")
+
+
+def _harness(root: Path) -> Path:
+    (root / "tests" / "heuristics").mkdir(parents=True)
+    (root / "tests" / "conftest.py").write_text("# conftest\n")
+    (root / "tests" / "heuristics" / "test_a.py").write_text("def test_a(): pass\n")
+    (root / "pyproject.toml").write_text("[tool.pytest.ini_options]\n")
+    return root
+
+
+class TestKey:
+    """The key covers the test id and every fingerprint passed in."""
+
+    def test_stable(self) -> None:
+        assert ResultCache.key(*_INPUTS) == ResultCache.key(*_INPUTS)
+
+    @pytest.mark.parametrize("changed", range(len(_INPUTS)))
+    def test_any_input_changes_key(self, changed: int) -> None:
+        inputs = list(_INPUTS)
+        inputs[changed] += "'"
+        assert ResultCache.key(*inputs) != ResultCache.key(*_INPUTS)
+
+
+class TestHarnessFingerprint:
+    """Harness sources count; caches and cassettes do not."""
+
+    @pytest.mark.parametrize(
+        "edited", ["tests/conftest.py", "tests/heuristics/test_a.py", "pyproject.toml"],
+    )
+    def test_source_edit_invalidates(self, tmp_path: Path, edited: str) -> None:
+        root = _harness(tmp_path)
+        before = harness_fingerprint(root)
+        with (root / edited).open("a") as fh:
+            fh.write("# edited\n")
+        assert harness_fingerprint(root) != before
+
+    @pytest.mark.parametrize(
+        "added", ["tests/__pycache__/conftest.pyc", "tests/cassettes/ollama/x.json"],
+    )
+    def test_ignored_files(self, tmp_path: Path, added: str) -> None:
+        root = _harness(tmp_path)
+        before = harness_fingerprint(root)
+        (root / added).parent.mkdir(parents=True)
+        (root / added).write_text("{}\n")
+        assert harness_fingerprint(root) == before
+
+
+class TestNitFingerprint:
+    """Binaries are hashed as files; a missing nit is an error, not a hash."""
+
+    def test_binary_content(self, tmp_path: Path) -> None:
+        binary = tmp_path / "nit"
+        binary.write_bytes(b"\x7fELF v1")
+        before = nit_fingerprint([str(binary)])
+        binary.write_bytes(b"\x7fELF v2")
+        assert nit_fingerprint([str(binary)]) != before
+
+    def test_unimportable_module(self) -> None:
+        with pytest.raises(FileNotFoundError, match="cannot import"):
+            nit_fingerprint([sys.executable, "-m", "no_such_nit_package.cli"])
+
+
+class TestStore:
+    """Recorded passes are found again and evicted least recently used first."""
+
+    def test_record_and_lookup(self, tmp_path: Path) -> None:
+        cache = ResultCache(tmp_path, budget=1 << 20)
+        key = ResultCache.key(*_INPUTS)
+        assert cache.lookup(key) is None
+        cache.record(key, _INPUTS[0], 1.5)
+        entry = cache.lookup(key)
+        assert entry is not None
+        assert (entry["nodeid"], entry["duration"]) == (_INPUTS[0], 1.5)
+        assert cache.lookup(ResultCache.key(_INPUTS[0], "other nit")) is None
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        cache = ResultCache(tmp_path, budget=1 << 20)
+        keys = [ResultCache.key(f"test_{n}") for n in range(3)]
+        for age, key in enumerate(reversed(keys)):
+            cache.record(key, key, 1.0)
+            os.utime(cache.path(key), (1000 + age, 1000 + age))
+        size = cache.path(keys[0]).stat().st_size
+        cache.budget = 2 * size
+        assert cache.evict() == 1
+        assert [cache.path(k).exists() for k in keys] == [True, True, False]
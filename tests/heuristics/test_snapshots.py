@@ -0,0 +1,112 @@
+"""Heuristics: project templates and their clones stay independent."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.snapshots import SnapshotStore
+
+pytestmark = pytest.mark.heuristics
+
+
+def _source(path: Path, text: str) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "main.py").write_text(text)
+    return path
+
+
+class TestPrune:
+    """Templates for other source trees go only once no session uses them."""
+
+    def test_recently_used_template_survives_a_rebuild(self, tmp_path: Path) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        source = _source(tmp_path / "src" / "app", "v1\n")
+        old = store.snapshot(source, "app")
+        _source(source, "v2\n")
+        new = store.snapshot(source, "app")
+        assert new.template != old.template
+        assert old.template.is_dir()
+
+    def test_stale_template_is_removed(self, tmp_path: Path) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        source = _source(tmp_path / "src" / "app", "v1\n")
+        old = store.snapshot(source, "app")
+        day_ago = time.time() - 2 * 24 * 3600
+        os.utime(old.template, (day_ago, day_ago))
+        _source(source, "v2\n")
+        store.snapshot(source, "app")
+        assert not old.template.exists()
+
+    def test_other_projects_sharing_a_prefix_are_kept(self, tmp_path: Path) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        other = store.snapshot(_source(tmp_path / "src" / "app-api", "x\n"), "app-api")
+        day_ago = time.time() - 2 * 24 * 3600
+        os.utime(other.template, (day_ago, day_ago))
+        store.snapshot(_source(tmp_path / "src" / "app", "v1\n"), "app")
+        assert other.template.is_dir()
+
+
+class TestClone:
+    """Clones never write through to the template, the source or each other."""
+
+    @pytest.fixture()
+    def source(self, tmp_path: Path) -> Path:
+        source = _source(tmp_path / "src" / "app", "v1\n")
+        (source / "node_modules" / "dep").mkdir(parents=True)
+        (source / "build").mkdir()
+        (source / "build" / "flags.txt").write_text(f"-I{source}/include\n")
+        return source
+
+    def test_clones_are_private(self, tmp_path: Path, source: Path) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        snapshot = store.snapshot(source, "app")
+        a = store.clone(snapshot, tmp_path / "a")
+        b = store.clone(snapshot, tmp_path / "b")
+        (a / "main.py").write_text("changed\n")
+        (a / "new.py").write_text("new\n")
+
+        assert (b / "main.py").read_text() == "v1\n"
+        assert not (b / "new.py").exists()
+        assert (snapshot.template / "main.py").read_text() == "v1\n"
+        assert (source / "main.py").read_text() == "v1\n"
+
+    def test_dependencies_are_linked_and_outputs_left_out(
+        self, tmp_path: Path, source: Path,
+    ) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        clone = store.clone(store.snapshot(source, "app"), tmp_path / "a")
+        assert (clone / "node_modules").is_symlink()
+        assert (clone / "node_modules").resolve() == (source / "node_modules").resolve()
+        assert not (clone / "build").exists()
+
+    def test_seeded_outputs_are_private_and_relocated(
+        self, tmp_path: Path, source: Path,
+    ) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        snapshot = store.snapshot(source, "app")
+        clone = store.clone(snapshot, tmp_path / "a")
+        store.seed_outputs(snapshot, clone)
+
+        assert not (clone / "build").is_symlink()
+        assert (clone / "build" / "flags.txt").read_text() == f"-I{clone}/include\n"
+        (clone / "build" / "flags.txt").write_text("rebuilt\n")
+        assert (source / "build" / "flags.txt").read_text() == f"-I{source}/include\n"
+
+    def test_derived_template_paths_point_at_each_clone(
+        self, tmp_path: Path, source: Path,
+    ) -> None:
+        store = SnapshotStore(tmp_path / "store")
+        base = store.snapshot(source, "app")
+
+        def prepare(path: Path) -> None:
+            (path / ".nit.yml").write_text(f"root: {path}\n")
+
+        derived = store.derive(base, tmp_path / "derived", prepare)
+        clone = store.clone(derived, tmp_path / "a")
+
+        assert (clone / ".nit.yml").read_text() == f"root: {clone}\n"
+        assert (derived.template / ".nit.yml").read_text() == f"root: {derived.template}\n"
@@ -0,0 +1,163 @@
+"""Single-pass file inventory of a project copy.
+
+:meth:`Inventory.scan` walks a project once, pruning dependency and
+build directories (``HEAVY_DIRS``) and ``.git``, and classifies each file
+as a test, a source file or other, by the conventions of the manifest's
+languages. Two inventories taken around a command show exactly which
+files it created, modified or deleted::
+
+    before = Inventory.scan(project_dir, manifest)
+    nit.generate()
+    changes = Inventory.scan(project_dir, manifest).diff(before)
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+
+from tests.manifests import ProjectManifest
+from tests.snapshots import HEAVY_DIRS
+
+_SOURCE_EXTENSIONS: dict[str, tuple[str, ...]] = {
+    "python": (".py",),
+    "typescript": (".ts", ".tsx", ".mts", ".cts"),
+    "javascript": (".js", ".jsx", ".mjs", ".cjs"),
+    "go": (".go",),
+    "java": (".java",),
+    "rust": (".rs",),
+    "csharp": (".cs",),
+    "cpp": (".cpp", ".cc", ".cxx", ".h", ".hpp"),
+}
+
+# File name patterns of test files, per language.
+_TEST_NAMES: dict[str, tuple[str, ...]] = {
+    "python": ("test_*.py", "*_test.py"),
+    "typescript": ("*.test.*", "*.spec.*"),
+    "javascript": ("*.test.*", "*.spec.*"),
+    "go": ("*_test.go",),
+    "java": ("*Test.java", "*Tests.java", "Test*.java"),
+    "rust": (),
+    "csharp": ("*Test.cs", "*Tests.cs"),
+    "cpp": ("test_*.*", "*_test.*"),
+}
+
+# Languages whose files under a tests/ directory are tests whatever their
+# name (cargo integration tests).
+_TEST_DIR_LANGUAGES = {"rust"}
+
+_SKIP_DIRS = HEAVY_DIRS | {".git"}
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """One file of the project: what it is and its stat at scan time."""
+
+    path: str  # relative, POSIX separators
+    kind: str  # "test", "source" or "other"
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class InventoryDiff:
+    """Files created, modified and deleted between two inventories."""
+
+    created: tuple[FileEntry, ...]
+    modified: tuple[FileEntry, ...]
+    deleted: tuple[FileEntry, ...]
+
+    def __bool__(self) -> bool:
+        return bool(self.created or self.modified or self.deleted)
+
+    @property
+    def tests(self) -> list[FileEntry]:
+        """Created or modified test files."""
+        return [e for e in (*self.created, *self.modified) if e.kind == "test"]
+
+
+class Inventory:
+    """Every file of a project copy, indexed by relative path."""
+
+    def __init__(self, root: Path, files: dict[str, FileEntry]) -> None:
+        self.root = root
+        self.files = files
+
+    @classmethod
+    def scan(cls, root: Path, manifest: ProjectManifest) -> Inventory:
+        """Walk *root* once and classify its files for *manifest*."""
+        classify = _classifier(manifest)
+        files: dict[str, FileEntry] = {}
+        stack = [(root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _SKIP_DIRS:
+                            stack.append((Path(entry.path), f"{relative}/"))
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        files[relative] = FileEntry(
+                            relative, classify(relative), st.st_size, st.st_mtime_ns,
+                        )
+        return cls(root, files)
+
+    @property
+    def tests(self) -> list[FileEntry]:
+        return self._of_kind("test")
+
+    @property
+    def sources(self) -> list[FileEntry]:
+        return self._of_kind("source")
+
+    def diff(self, before: Inventory) -> InventoryDiff:
+        """What changed from *before* to this inventory."""
+        created, modified = [], []
+        for path, entry in self.files.items():
+            old = before.files.get(path)
+            if old is None:
+                created.append(entry)
+            elif (old.size, old.mtime_ns) != (entry.size, entry.mtime_ns):
+                modified.append(entry)
+        deleted = [e for p, e in before.files.items() if p not in self.files]
+        return InventoryDiff(
+            created=tuple(sorted(created, key=lambda e: e.path)),
+            modified=tuple(sorted(modified, key=lambda e: e.path)),
+            deleted=tuple(sorted(deleted, key=lambda e: e.path)),
+        )
+
+    def _of_kind(self, kind: str) -> list[FileEntry]:
+        return sorted((e for e in self.files.values() if e.kind == kind), key=lambda e: e.path)
+
+
+def _classifier(manifest: ProjectManifest) -> Callable[[str], str]:
+    languages = list(dict.fromkeys([manifest.primary_language, *manifest.expected_languages]))
+    extensions = _union(_SOURCE_EXTENSIONS.get(lang, ()) for lang in languages)
+    test_names = _union(_TEST_NAMES.get(lang, ()) for lang in languages)
+    test_dir_extensions = _union(
+        _SOURCE_EXTENSIONS[lang] for lang in languages if lang in _TEST_DIR_LANGUAGES
+    )
+    known_tests = set(manifest.existing_test_files)
+
+    def classify(relative: str) -> str:
+        path = PurePosixPath(relative)
+        if path.suffix not in extensions:
+            return "other"
+        if (
+            relative in known_tests
+            or any(fnmatch.fnmatchcase(path.name, pattern) for pattern in test_names)
+            or (path.suffix in test_dir_extensions and "tests" in path.parts[:-1])
+        ):
+            return "test"
+        return "source"
+
+    return classify
+
+
+def _union(groups: Iterable[tuple[str, ...]]) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(item for group in groups for item in group))
@@ -12,6 +12,7 @@ from pathlib import Path
 import pytest
 
 from tests.assertions import assert_generate_files_valid
+from tests.inventory import Inventory
 from tests.manifests import ProjectManifest
 from tests.nit_runner import NitRunner
 
@@ -44,10 +45,7 @@ class TestGenerate:
         nit_with_ollama.generate()
 
         # Count all test files in the project
-        test_patterns = ["test_*.*", "*.test.*", "*.spec.*"]
-        test_files: list[Path] = []
-        for pattern in test_patterns:
-            test_files.extend(project_dir.rglob(pattern))
+        test_files = Inventory.scan(project_dir, project_manifest).tests
 
         # At minimum, the existing test files should still be present
         assert len(test_files) >= len(project_manifest.existing_test_files), (
@@ -62,8 +60,9 @@ class TestGenerate:
         project_manifest: ProjectManifest,
     ) -> None:
         """Generated test files should exist and be non-empty."""
+        before = Inventory.scan(project_dir, project_manifest)
         nit_with_ollama.generate()
-        assert_generate_files_valid(project_dir, project_manifest)
+        assert_generate_files_valid(project_dir, project_manifest, before)
 
     def test_existing_tests_not_broken(self, nit_with_ollama: NitRunner) -> None:
         """Existing tests must still pass after generation."""
@@ -6,7 +6,10 @@ All parametrized tests run against it automatically.
 
 from __future__ import annotations
 
+import os
+from collections.abc import Iterable
 from dataclasses import dataclass, field
+from pathlib import Path
 
 
 @dataclass(frozen=True)
@@ -22,6 +25,10 @@ class ProjectManifest:
     untested_source_files: list[str]
     existing_test_files: list[str]
     setup_commands: list[str] = field(default_factory=list)
+    # Globs relative to the project: files whose content decides what
+    # setup_commands install, and the directories they install into.
+    lockfiles: list[str] = field(default_factory=list)
+    dependency_dirs: list[str] = field(default_factory=list)
     expected_test_count_min: int = 1
     expected_all_pass: bool = True
 
@@ -39,6 +46,8 @@ NEXTJS_APP = ProjectManifest(
     ],
     existing_test_files=["tests/utils/math.test.ts"],
     setup_commands=["npm install"],
+    lockfiles=["package.json", "package-lock.json"],
+    dependency_dirs=["node_modules"],
     expected_test_count_min=4,
     expected_all_pass=True,
 )
@@ -56,6 +65,7 @@ PYTHON_API = ProjectManifest(
     ],
     existing_test_files=["tests/services/test_auth.py"],
     setup_commands=["pip install -e '.[dev]'"],
+    lockfiles=["pyproject.toml"],
     expected_test_count_min=4,
     expected_all_pass=True,
 )
@@ -70,6 +80,7 @@ GO_API = ProjectManifest(
     untested_source_files=["main.go"],
     existing_test_files=["handlers/users_test.go"],
     setup_commands=["go mod download"],
+    lockfiles=["go.mod", "go.sum"],
     expected_test_count_min=1,
     expected_all_pass=True,
 )
@@ -98,6 +109,8 @@ JAVA_GRADLE = ProjectManifest(
     untested_source_files=["src/main/java/com/example/StringUtils.java"],
     existing_test_files=["src/test/java/com/example/CalculatorTest.java"],
     setup_commands=["gradle build"],
+    lockfiles=["build.gradle", "settings.gradle", "gradle.lockfile"],
+    dependency_dirs=[".gradle"],
     expected_test_count_min=1,
     expected_all_pass=True,
 )
@@ -112,6 +125,8 @@ RUST_CLI = ProjectManifest(
     untested_source_files=["src/main.rs"],
     existing_test_files=["src/lib.rs"],
     setup_commands=["cargo build"],
+    lockfiles=["Cargo.toml", "Cargo.lock"],
+    dependency_dirs=["target"],
     expected_test_count_min=1,
     expected_all_pass=True,
 )
@@ -126,6 +141,8 @@ CSHARP_DOTNET = ProjectManifest(
     untested_source_files=["src/StringProcessor.cs"],
     existing_test_files=["tests/StringProcessorTests.cs"],
     setup_commands=["dotnet build"],
+    lockfiles=["*.csproj", "packages.lock.json"],
+    dependency_dirs=["obj"],
     expected_test_count_min=1,
     expected_all_pass=True,
 )
@@ -143,6 +160,13 @@ MONOREPO = ProjectManifest(
         "packages/utils/tests/test_helpers.py",
     ],
     setup_commands=["pnpm install"],
+    lockfiles=[
+        "package.json",
+        "pnpm-lock.yaml",
+        "pnpm-workspace.yaml",
+        "packages/*/package.json",
+    ],
+    dependency_dirs=["node_modules", "packages/*/node_modules"],
     expected_test_count_min=1,
     expected_all_pass=True,
 )
@@ -166,3 +190,26 @@ def get_project(name: str) -> ProjectManifest:
             return p
     msg = f"No manifest for project: {name}"
     raise KeyError(msg)
+
+
+def select_projects(names: Iterable[str] = ()) -> list[ProjectManifest]:
+    """Resolve a list of project names to manifests.
+
+    An empty selection means every project. Unknown names raise
+    ``KeyError`` just like :func:`get_project`.
+    """
+    wanted = list(dict.fromkeys(names))
+    if not wanted:
+        return list(ALL_PROJECTS)
+    return [get_project(name) for name in wanted]
+
+
+def examples_root() -> Path:
+    """Directory the manifest paths are relative to.
+
+    ``EXAMPLES_DIR`` overrides; otherwise the root of this repository.
+    """
+    env = os.environ.get("EXAMPLES_DIR")
+    if env:
+        return Path(env).resolve()
+    return Path(__file__).resolve().parent.parent
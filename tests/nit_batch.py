@@ -0,0 +1,41 @@
+"""Run several nit commands in one Python process.
+
+Used by :meth:`tests.nit_runner.NitRunner.configure` so that a handful of
+``nit config set`` calls cost one interpreter start and one nit import
+instead of one each. Like :mod:`nit_forkserver` it is started with the
+interpreter that has nit installed, so it stays stdlib-only.
+
+Usage: ``python nit_batch.py SCRIPT COMMANDS_JSON`` (or ``-m MODULE``
+instead of ``SCRIPT``) where ``COMMANDS_JSON`` is a list of argument
+lists. Each command calls nit's entry point as resolved by
+:func:`nit_forkserver.load_entry_point`. Commands run in order and the
+batch stops at the first one that fails; the exit code is that
+command's (or 0).
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import sys
+
+from nit_forkserver import load_entry_point, run_entry_point
+
+
+def main() -> int:
+    target, commands = sys.argv[1:-1], json.loads(sys.argv[-1])
+    entry, argv0 = load_entry_point(target)
+    code = 0
+    for args in commands:
+        sys.argv = [argv0, *args]
+        code = run_entry_point(entry)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if code:
+            break
+    atexit._run_exitfuncs()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
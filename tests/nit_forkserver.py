@@ -0,0 +1,202 @@
+"""Fork server for the nit CLI — import nit once, fork once per command.
+
+Started by :class:`tests.nit_runner.ForkServerBackend` with the Python
+interpreter that has nit installed, so this file must stay stdlib-only
+and must not import anything from ``tests``.
+
+Usage: ``python nit_forkserver.py SCRIPT`` for a console-script wrapper,
+or ``python nit_forkserver.py -m MODULE`` for ``python -m MODULE``.
+Commands call the same function the wrapper would (see
+:func:`load_entry_point`).
+
+Protocol — one JSON object per line on stdin/stdout:
+
+* server -> client ``{"ready": true}`` once nit's entry point is imported
+  (or ``{"error": "..."}`` if the import failed).
+* client -> server ``{"args", "cwd", "env", "stdout", "stderr"}``
+  where ``stdout``/``stderr`` are files the command's output goes to.
+* server -> client ``{"pid": N}`` as soon as the command is forked and
+  leads its own process group ``N`` (the client kills that group on
+  timeout).
+* server -> client ``{"exit_code", "user_seconds", "system_seconds",
+  "max_rss"}`` once it has exited (rusage from ``os.wait4``).
+"""
+
+from __future__ import annotations
+
+import atexit
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import re
+import runpy
+import sys
+import traceback
+from collections.abc import Callable
+from typing import IO, Any
+
+# ``from nit.cli import main`` in a pip/uv-generated console-script wrapper,
+# which then calls ``sys.exit(main())``.
+_WRAPPER_IMPORT = re.compile(r"^from\s+([\w.]+)\s+import\s+(\w+)\s*$", re.MULTILINE)
+
+
+def _send(channel: IO[str], message: dict[str, Any]) -> None:
+    channel.write(json.dumps(message) + "\n")
+    channel.flush()
+
+
+def exit_code(code: object) -> int:
+    """Translate a ``SystemExit.code`` the way the interpreter does."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def load_entry_point(target: list[str]) -> tuple[Callable[[], object], str]:
+    """Import what *target* runs; return ``(entry, argv0)``.
+
+    *target* is ``["-m", MODULE]`` or ``[SCRIPT]``. A console script is
+    resolved to its ``module:function`` through the ``console_scripts``
+    entry points of this interpreter (or, failing that, the import line
+    of the wrapper), and *entry* calls that function, exactly as the
+    wrapper's ``sys.exit(main())`` would. A module runs as ``__main__``,
+    like ``python -m``. Any other script runs as ``__main__`` from its
+    path, with nothing pre-imported.
+    """
+    if target[0] == "-m":
+        module = target[1]
+        importlib.import_module(module)
+        spec = importlib.util.find_spec(module)
+
+        def run_module() -> None:
+            # Re-execute the module itself as __main__; everything it
+            # imports stays warm in sys.modules.
+            sys.modules.pop(module, None)
+            runpy.run_module(module, run_name="__main__", alter_sys=False)
+
+        return run_module, spec.origin if spec and spec.origin else module
+
+    script = target[0]
+    resolved = _console_script(script)
+    if resolved is None:
+
+        def run_script() -> None:
+            runpy.run_path(script, run_name="__main__")
+
+        return run_script, script
+    module, attr = resolved
+    entry: Any = importlib.import_module(module)
+    for name in attr.split("."):
+        entry = getattr(entry, name)
+    return entry, script
+
+
+def run_entry_point(entry: Callable[[], object]) -> int:
+    """Call *entry* and return the exit code the process would have."""
+    try:
+        return exit_code(entry())
+    except SystemExit as exc:
+        return exit_code(exc.code)
+    except BaseException as exc:
+        # Drop this frame so the traceback reads like a plain run.
+        tb = exc.__traceback__.tb_next if exc.__traceback__ else None
+        traceback.print_exception(type(exc), exc, tb)
+        return 1
+
+
+def _console_script(script: str) -> tuple[str, str] | None:
+    """``(module, attribute)`` of the function a console script calls."""
+    name = os.path.basename(script)
+    for ep in importlib.metadata.entry_points(group="console_scripts", name=name):
+        return ep.module, ep.attr
+    try:
+        with open(script, encoding="utf-8", errors="replace") as fh:
+            source = fh.read()
+    except OSError:
+        return None
+    for match in _WRAPPER_IMPORT.finditer(source):
+        if f"sys.exit({match[2]}())" in source:
+            return match[1], match[2]
+    return None
+
+
+def _run_command(request: dict[str, Any], entry: Callable[[], object], argv0: str) -> None:
+    """Run one nit command in the freshly forked child. Never returns."""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        for fd, path in ((1, request["stdout"]), (2, request["stderr"])):
+            target = os.open(path, os.O_WRONLY | os.O_TRUNC)
+            os.dup2(target, fd)
+            os.close(target)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = [argv0, *request["args"]]
+        code = run_entry_point(entry)
+        atexit._run_exitfuncs()
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(code)
+
+
+def main() -> int:
+    target = sys.argv[1:]
+
+    # Keep private copies of the protocol pipes and point fds 0/1 at
+    # /dev/null so nothing nit prints (at import or in a child) can
+    # corrupt the protocol stream.
+    replies = os.fdopen(os.dup(1), "w")
+    requests = os.fdopen(os.dup(0), "r")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    try:
+        entry, argv0 = load_entry_point(target)
+    except BaseException as exc:
+        _send(replies, {"error": f"cannot import {' '.join(target)}: {exc!r}"})
+        return 1
+    _send(replies, {"ready": True})
+
+    for line in requests:
+        request = json.loads(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            replies.close()
+            requests.close()
+            _run_command(request, entry, argv0)
+        # The child calls setpgid too; doing it here as well means the
+        # group exists before the client can try to kill it.
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass  # the child got there first, or has already exited
+        _send(replies, {"pid": pid})
+        # wait4 rusage covers the child and every descendant it reaped.
+        _, status, usage = os.wait4(pid, 0)
+        _send(
+            replies,
+            {
+                "exit_code": os.waitstatus_to_exitcode(status),
+                "user_seconds": usage.ru_utime,
+                "system_seconds": usage.ru_stime,
+                "max_rss": usage.ru_maxrss,
+            },
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
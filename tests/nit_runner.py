@@ -6,14 +6,33 @@ and parse their output.
 
 from __future__ import annotations
 
+import abc
+import asyncio
+import itertools
 import json
+import locale
 import os
+import queue
+import re
+import select
+import selectors
 import shutil
+import signal
 import subprocess
 import sys
-from dataclasses import dataclass
+import tempfile
+import threading
+import time
+from collections.abc import Awaitable, Callable, Collection, Mapping, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import IO, TYPE_CHECKING, Any, Generic, TypeVar
+
+from tests.fingerprint import hash_tree
+
+if TYPE_CHECKING:
+    import resource
 
 
 def _find_nit_binary() -> list[str]:
@@ -48,13 +67,81 @@ def _find_nit_binary() -> list[str]:
     return [sys.executable, "-m", "nit.cli"]
 
 
+_JSON_DECODER = json.JSONDecoder()
+
+# A line whose first non-blank character opens a JSON object.
+_OBJECT_LINE = re.compile(r"^[ \t]*\{", re.MULTILINE)
+
+
+def _scan_json(text: str) -> list[Any]:
+    """Decode every top-level JSON object that starts a line in *text*.
+
+    One forward pass: after a successful decode the scan resumes at the
+    end of that value, so nested lines are never re-parsed and no suffix
+    copies of *text* are made. Lines that merely start with ``{`` but do
+    not decode (log noise) are skipped.
+    """
+    stripped = text.strip()
+    if stripped:
+        # Pure JSON output (any value type, not only objects).
+        start = text.index(stripped[0])
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if not text[end:].strip():
+                return [value]
+
+    documents: list[Any] = []
+    pos = 0
+    while (match := _OBJECT_LINE.search(text, pos)) is not None:
+        start = match.end() - 1
+        try:
+            value, pos = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pos = match.end()
+            continue
+        documents.append(value)
+    return documents
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """What one nit invocation cost.
+
+    CPU times and peak RSS cover the nit process and every descendant it
+    waited for (test runners, compilers, ...). They are ``None`` when the
+    backend cannot observe them.
+    """
+
+    wall_seconds: float
+    stdout_bytes: int
+    stderr_bytes: int
+    user_seconds: float | None = None
+    system_seconds: float | None = None
+    max_rss_kb: int | None = None
+
+
+def _max_rss_kb(ru_maxrss: int) -> int:
+    """Normalize ``ru_maxrss`` to KiB (macOS reports bytes, Linux KiB)."""
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
 @dataclass
 class NitResult:
-    """Result of a nit CLI invocation."""
+    """Result of a nit CLI invocation.
+
+    ``usage`` is ``None`` for results served from a :class:`NitResultCache`.
+    """
 
     exit_code: int
     stdout: str
     stderr: str
+    usage: ResourceUsage | None = None
+    _documents: list[Any] | None = field(
+        default=None, init=False, repr=False, compare=False,
+    )
 
     @property
     def success(self) -> bool:
@@ -66,63 +153,495 @@ class NitResult:
         nit --ci may emit human-readable lines before the JSON blob.
         This method finds and parses the first JSON object in stdout.
         """
-        # Try the full output first (pure JSON commands)
-        try:
-            return json.loads(self.stdout)
-        except (json.JSONDecodeError, ValueError):
-            pass
+        return self._document(0)
 
-        # Find the first line that starts a JSON object
-        lines = self.stdout.splitlines()
-        for i, line in enumerate(lines):
-            stripped = line.lstrip()
-            if stripped.startswith("{"):
-                candidate = "\n".join(lines[i:])
-                try:
-                    return json.loads(candidate)
-                except (json.JSONDecodeError, ValueError):
-                    continue
+    def last_json(self) -> Any:
+        """The last JSON object in stdout, e.g. the report after NDJSON events."""
+        return self._document(-1)
 
-        msg = f"No JSON found in stdout: {self.stdout[:200]!r}"
-        raise ValueError(msg)
+    def json_documents(self) -> list[Any]:
+        """Every JSON object in stdout, in order (parsed once, then cached)."""
+        if self._documents is None:
+            self._documents = _scan_json(self.stdout)
+        return self._documents
 
+    def _document(self, index: int) -> Any:
+        documents = self.json_documents()
+        if not documents:
+            msg = f"No JSON found in stdout: {self.stdout[:200]!r}"
+            raise ValueError(msg)
+        return documents[index]
 
-class NitRunner:
-    """Wraps subprocess calls to the nit CLI.
 
-    Always runs with ``--ci`` for machine-readable output and
-    ``--path`` pointing to the project directory.
+# Commands that only read project state. Their results can be shared
+# between tests as long as the project tree is unchanged. Anything else
+# (init, config set, generate, memory reset, ...) is treated as mutating.
+_READ_ONLY_COMMANDS = {
+    ("scan",),
+    ("config", "show"),
+    ("config", "validate"),
+    ("memory", "show"),
+    ("memory", "export"),
+}
+
+# Flags that ask nit to redo work it could otherwise take from its own
+# caches. A command carrying one must really run, so it is never served
+# from (or stored in) the result cache.
+_CACHE_BUSTING_FLAGS = frozenset({"--force"})
+
+
+def command_words(args: tuple[str, ...]) -> tuple[str, ...]:
+    """Return the leading sub-command words of *args* (before any flag)."""
+    words: list[str] = []
+    for arg in args[:2]:
+        if arg.startswith("-"):
+            break
+        words.append(arg)
+    return tuple(words)
+
+
+class NitResultCache:
+    """Session-level memo of read-only nit command results.
+
+    Entries are keyed on (argument vector, project tree hash), so a hit
+    is only possible when the tree is byte-for-byte the state the
+    original command saw. Keys and stored output are made relative to the
+    project directory, so per-test clones of the same project share
+    entries. Mutating commands that change the tree drop the entries
+    recorded for the state they replaced.
     """
 
-    def __init__(self, project_dir: Path, *, timeout: int = 300) -> None:
-        self.project_dir = project_dir
-        self.timeout = timeout
-        self._nit_cmd = _find_nit_binary()
+    _PLACEHOLDER = "\x00nit-project-dir\x00"
 
-    def run(self, *args: str, timeout: int | None = None) -> NitResult:
-        """Execute ``nit --ci <args>`` in the project directory.
+    def __init__(self, *, skip_dirs: Collection[str] = ()) -> None:
+        self.skip_dirs = frozenset(skip_dirs)
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple[tuple[str, ...], str], NitResult] = {}
+        self._lock = threading.Lock()
 
-        The ``--ci`` flag is prepended automatically. Callers should NOT
-        include ``--path`` — it is injected by the convenience methods.
-        For raw invocations, pass ``--path`` explicitly if needed.
-        """
-        cmd = [*self._nit_cmd, "--ci", *args]
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout or self.timeout,
-            cwd=str(self.project_dir),
+    @staticmethod
+    def is_read_only(args: tuple[str, ...]) -> bool:
+        """Whether *args* may be answered from (and recorded in) the cache."""
+        if command_words(args) not in _READ_ONLY_COMMANDS:
+            return False
+        return not any(arg.split("=", 1)[0] in _CACHE_BUSTING_FLAGS for arg in args)
+
+    def tree_hash(self, project_dir: Path) -> str:
+        return hash_tree(project_dir, skip_dirs=self.skip_dirs, relocatable=True)
+
+    def get(
+        self, project_dir: Path, args: tuple[str, ...], tree: str,
+    ) -> NitResult | None:
+        key = (self._relativize_args(project_dir, args), tree)
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        here = str(project_dir)
+        return NitResult(
+            exit_code=stored.exit_code,
+            stdout=stored.stdout.replace(self._PLACEHOLDER, here),
+            stderr=stored.stderr.replace(self._PLACEHOLDER, here),
         )
+
+    def put(
+        self,
+        project_dir: Path,
+        args: tuple[str, ...],
+        trees: Collection[str],
+        result: NitResult,
+    ) -> None:
+        here = str(project_dir)
+        stored = NitResult(
+            exit_code=result.exit_code,
+            stdout=result.stdout.replace(here, self._PLACEHOLDER),
+            stderr=result.stderr.replace(here, self._PLACEHOLDER),
+        )
+        rel_args = self._relativize_args(project_dir, args)
+        with self._lock:
+            for tree in trees:
+                self._entries[(rel_args, tree)] = stored
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def invalidate(self, tree: str) -> None:
+        """Forget every result recorded against project state *tree*."""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == tree]:
+                del self._entries[key]
+
+    def _relativize_args(
+        self, project_dir: Path, args: tuple[str, ...],
+    ) -> tuple[str, ...]:
+        here = str(project_dir)
+        return tuple(a.replace(here, self._PLACEHOLDER) for a in args)
+
+
+class SubprocessBackend:
+    """Launch a fresh nit process for every command (the default)."""
+
+    def __init__(self, nit_cmd: list[str] | None = None) -> None:
+        self.nit_cmd = nit_cmd or _find_nit_binary()
+
+    def execute(
+        self, args: Sequence[str], *, cwd: Path, timeout: float,
+    ) -> NitResult:
+        cmd = [*self.nit_cmd, *args]
+        start = time.monotonic()
+        deadline = start + timeout
+        with subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=str(cwd),
+        ) as proc:
+            try:
+                stdout, stderr = _drain(proc, deadline)
+                rusage = _reap(proc, deadline)
+            except TimeoutError:
+                proc.kill()
+                proc.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout) from None
+        wall = time.monotonic() - start
+
+        assert proc.returncode is not None
         return NitResult(
-            exit_code=result.returncode,
-            stdout=result.stdout,
-            stderr=result.stderr,
+            exit_code=proc.returncode,
+            stdout=_decode(stdout),
+            stderr=_decode(stderr),
+            usage=ResourceUsage(
+                wall_seconds=wall,
+                stdout_bytes=len(stdout),
+                stderr_bytes=len(stderr),
+                user_seconds=rusage.ru_utime if rusage else None,
+                system_seconds=rusage.ru_stime if rusage else None,
+                max_rss_kb=_max_rss_kb(rusage.ru_maxrss) if rusage else None,
+            ),
         )
 
+    def close(self) -> None:
+        pass
+
+
+def _drain(proc: subprocess.Popen[bytes], deadline: float) -> tuple[bytes, bytes]:
+    """Read the child's stdout and stderr to EOF (TimeoutError past *deadline*)."""
+    assert proc.stdout is not None and proc.stderr is not None
+    chunks: dict[int, list[bytes]] = {proc.stdout.fileno(): [], proc.stderr.fileno(): []}
+    with selectors.DefaultSelector() as sel:
+        for fd in chunks:
+            sel.register(fd, selectors.EVENT_READ)
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            for key, _ in sel.select(remaining):
+                data = os.read(key.fd, 65536)
+                if data:
+                    chunks[key.fd].append(data)
+                else:
+                    sel.unregister(key.fd)
+    out, err = (b"".join(c) for c in chunks.values())
+    return out, err
+
+
+def _reap(proc: subprocess.Popen[bytes], deadline: float) -> resource.struct_rusage | None:
+    """Wait for the child and return its rusage (children included).
+
+    ``Popen.wait`` discards rusage, so reap with ``os.wait4`` directly and
+    hand the exit status back to the ``Popen`` object. ``wait4`` blocks on
+    a helper thread, so waiting costs no polling; past *deadline* the
+    child is killed, reaped by that thread, and ``TimeoutError`` raised.
+    """
+    if not hasattr(os, "wait4"):  # pragma: no cover — non-POSIX
+        proc.wait(max(deadline - time.monotonic(), 0))
+        return None
+    reaped: list[resource.struct_rusage] = []
+
+    def wait() -> None:
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        reaped.append(rusage)
+
+    waiter = threading.Thread(target=wait, name=f"nit-reap-{proc.pid}", daemon=True)
+    waiter.start()
+    waiter.join(max(deadline - time.monotonic(), 0))
+    if waiter.is_alive():
+        # Not proc.kill(): its poll() would race the waiter for the pid.
+        try:
+            os.kill(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        waiter.join()
+        raise TimeoutError
+    return reaped[0]
+
+
+_FORKSERVER_SCRIPT = Path(__file__).with_name("nit_forkserver.py")
+_BATCH_SCRIPT = Path(__file__).with_name("nit_batch.py")
+
+
+def _nit_entry_point(nit_cmd: list[str]) -> tuple[str, list[str]]:
+    """Return ``(python, target)`` for running nit inside Python.
+
+    *target* is ``["-m", MODULE]`` for the ``python -m nit.cli`` fallback
+    and ``[SCRIPT]`` for a console-script wrapper whose shebang names a
+    Python interpreter; ``nit_forkserver.load_entry_point`` resolves the
+    function the wrapper calls.
+    """
+    if len(nit_cmd) == 3 and nit_cmd[1] == "-m":
+        return nit_cmd[0], nit_cmd[1:]
+
+    script = shutil.which(nit_cmd[0]) or nit_cmd[0]
+    try:
+        with open(script, "rb") as fh:
+            first = fh.readline().decode(errors="replace").strip()
+    except OSError as exc:
+        msg = f"Cannot read nit entry point {script}: {exc}"
+        raise RuntimeError(msg) from exc
+    interpreter = first[2:].split() if first.startswith("#!") else []
+    if interpreter[:1] == ["/usr/bin/env"]:
+        interpreter = [shutil.which(interpreter[1]) or interpreter[1]] if len(interpreter) > 1 else []
+    if not interpreter or "python" not in Path(interpreter[0]).name:
+        msg = f"{script} is not a Python entry point; cannot pre-import nit"
+        raise RuntimeError(msg)
+    return interpreter[0], [script]
+
+
+# How long a fork server may take to reap a child it was told to kill.
+_REAP_TIMEOUT = 30.0
+
+
+class _ForkServer:
+    """One pre-imported nit process that forks a child per command."""
+
+    def __init__(self, python: str, target: list[str]) -> None:
+        self.proc = subprocess.Popen(
+            [python, str(_FORKSERVER_SCRIPT), *target],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        self._stdin = self.proc.stdin
+        self._fd = self.proc.stdout.fileno()
+        self._buffer = bytearray()
+        hello = self._read(None)
+        if not hello.get("ready"):
+            self.close()
+            raise RuntimeError(hello.get("error", "nit fork server failed to start"))
+
+    def request(self, payload: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """Run one command; return its exit code and rusage.
+
+        On timeout the command's process group is killed and
+        ``TimeoutError`` raised. A server that then fails to report the
+        reaped child within ``_REAP_TIMEOUT`` is killed as well (see
+        :attr:`alive`).
+        """
+        self._stdin.write(json.dumps(payload).encode() + b"\n")
+        self._stdin.flush()
+        pid = self._read(None)["pid"]
+        try:
+            return self._read(timeout)
+        except TimeoutError:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # No such group (any more): make sure the child itself is gone.
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            try:
+                self._read(_REAP_TIMEOUT)  # the server reaps the child
+            except (TimeoutError, RuntimeError):
+                self.proc.kill()
+                self.proc.wait()
+            raise
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self._stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def _read(self, timeout: float | None) -> dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(self._fd, 65536)
+            if not chunk:
+                msg = "nit fork server exited unexpectedly"
+                raise RuntimeError(msg)
+            self._buffer += chunk
+        line, _, rest = bytes(self._buffer).partition(b"\n")
+        self._buffer = bytearray(rest)
+        return json.loads(line)
+
+
+class ForkServerBackend:
+    """Run nit commands in forks of pre-imported nit processes.
+
+    Each worker in the pool imports nit's CLI once. Every command then
+    runs in a fresh fork of a worker, which skips interpreter start-up
+    and import time. The fork still starts from pristine module state,
+    and its exit code, stdout and stderr are captured byte-for-byte
+    through files, exactly as :class:`SubprocessBackend` would capture
+    them. Up to *size* commands run at once.
+    """
+
+    def __init__(
+        self, *, size: int | None = None, nit_cmd: list[str] | None = None,
+    ) -> None:
+        self.nit_cmd = nit_cmd or _find_nit_binary()
+        self.python, self.target = _nit_entry_point(self.nit_cmd)
+        self.size = size or os.cpu_count() or 1
+        self._idle: queue.SimpleQueue[_ForkServer] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._servers: list[_ForkServer] = []
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="nit-forkserver-")
+        # Fail fast (e.g. nit not importable) instead of on the first command.
+        self._idle.put(self._spawn())
+
+    def execute(
+        self, args: Sequence[str], *, cwd: Path, timeout: float,
+    ) -> NitResult:
+        cmd = [*self.nit_cmd, *args]
+        with self._slots:
+            server = self._acquire()
+            out_fd, out_path = tempfile.mkstemp(dir=self._tmpdir.name)
+            err_fd, err_path = tempfile.mkstemp(dir=self._tmpdir.name)
+            os.close(out_fd)
+            os.close(err_fd)
+            start = time.monotonic()
+            try:
+                reply = server.request(
+                    {
+                        "args": list(args),
+                        "cwd": str(cwd),
+                        "env": dict(os.environ),
+                        "stdout": out_path,
+                        "stderr": err_path,
+                    },
+                    timeout,
+                )
+            except TimeoutError:
+                if server.alive:
+                    self._idle.put(server)
+                else:
+                    self._discard(server)
+                raise subprocess.TimeoutExpired(cmd, timeout) from None
+            except BaseException:
+                self._discard(server)
+                raise
+            else:
+                wall = time.monotonic() - start
+                self._idle.put(server)
+                stdout = Path(out_path).read_bytes()
+                stderr = Path(err_path).read_bytes()
+                return NitResult(
+                    exit_code=reply["exit_code"],
+                    stdout=_decode(stdout),
+                    stderr=_decode(stderr),
+                    usage=ResourceUsage(
+                        wall_seconds=wall,
+                        stdout_bytes=len(stdout),
+                        stderr_bytes=len(stderr),
+                        user_seconds=reply["user_seconds"],
+                        system_seconds=reply["system_seconds"],
+                        max_rss_kb=_max_rss_kb(reply["max_rss"]),
+                    ),
+                )
+            finally:
+                os.unlink(out_path)
+                os.unlink(err_path)
+
+    def close(self) -> None:
+        with self._lock:
+            servers, self._servers = self._servers, []
+        for server in servers:
+            server.close()
+        self._tmpdir.cleanup()
+
+    def _acquire(self) -> _ForkServer:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._spawn()
+
+    def _spawn(self) -> _ForkServer:
+        server = _ForkServer(self.python, self.target)
+        with self._lock:
+            self._servers.append(server)
+        return server
+
+    def _discard(self, server: _ForkServer) -> None:
+        with self._lock:
+            if server in self._servers:
+                self._servers.remove(server)
+        server.close()
+
+
+NitBackend = SubprocessBackend | ForkServerBackend
+
+
+class NitListener:
+    """Observer notified around every command a runner executes.
+
+    Subclass and override what you need; the defaults do nothing.
+    """
+
+    def command_started(self, runner: Any, args: tuple[str, ...]) -> None:
+        pass
+
+    def command_finished(
+        self, runner: Any, args: tuple[str, ...], result: NitResult,
+    ) -> None:
+        pass
+
+    def command_failed(
+        self, runner: Any, args: tuple[str, ...], error: BaseException,
+    ) -> None:
+        pass
+
+
+R = TypeVar("R")
+
+
+class _NitCommands(abc.ABC, Generic[R]):
+    """Convenience methods shared by the sync and async runners.
+
+    Each method builds the argument vector and hands it to :meth:`run`,
+    so ``R`` is ``NitResult`` for :class:`NitRunner` and an awaitable of
+    it for :class:`AsyncNitRunner`.
+    """
+
+    project_dir: Path
+
+    @abc.abstractmethod
+    def run(self, *args: str, timeout: int | None = None) -> R:
+        """Execute a nit command with the given arguments."""
+
     # --- Convenience methods -------------------------------------------------
 
-    def init(self, *, auto: bool = True) -> NitResult:
+    def init(self, *, auto: bool = True) -> R:
         """Run ``nit init``."""
         args = ["init", "--path", str(self.project_dir)]
         if auto:
@@ -134,7 +653,7 @@ class NitRunner:
         *,
         json_output: bool = True,
         force: bool = False,
-    ) -> NitResult:
+    ) -> R:
         """Run ``nit scan``."""
         args = ["scan", "--path", str(self.project_dir)]
         if json_output:
@@ -143,11 +662,11 @@ class NitRunner:
             args.append("--force")
         return self.run(*args)
 
-    def run_tests(self) -> NitResult:
+    def run_tests(self) -> R:
         """Run ``nit run`` to execute the project's test suite."""
         return self.run("run", "--path", str(self.project_dir))
 
-    def generate(self, *, test_type: str = "unit") -> NitResult:
+    def generate(self, *, test_type: str = "unit") -> R:
         """Run ``nit generate``."""
         return self.run(
             "generate",
@@ -158,14 +677,14 @@ class NitRunner:
             timeout=600,
         )
 
-    def analyze(self, *, json_output: bool = True) -> NitResult:
+    def analyze(self, *, json_output: bool = True) -> R:
         """Run ``nit analyze``."""
         args = ["analyze", "--path", str(self.project_dir)]
         if json_output:
             args.append("--json-output")
         return self.run(*args, timeout=600)
 
-    def pick(self, *, test_type: str = "unit") -> NitResult:
+    def pick(self, *, test_type: str = "unit") -> R:
         """Run ``nit pick`` — the full pipeline."""
         return self.run(
             "pick",
@@ -176,37 +695,37 @@ class NitRunner:
             timeout=900,
         )
 
-    def config_validate(self) -> NitResult:
+    def config_validate(self) -> R:
         """Run ``nit config validate``."""
         return self.run("config", "validate", "--path", str(self.project_dir))
 
-    def config_show(self, *, json_output: bool = True) -> NitResult:
+    def config_show(self, *, json_output: bool = True) -> R:
         """Run ``nit config show``."""
         args = ["config", "show", "--path", str(self.project_dir)]
         if json_output:
             args.append("--json-output")
         return self.run(*args)
 
-    def config_set(self, key: str, value: str) -> NitResult:
+    def config_set(self, key: str, value: str) -> R:
         """Run ``nit config set <key> <value>``."""
         return self.run(
             "config", "set", key, value, "--path", str(self.project_dir)
         )
 
-    def memory_show(self, *, json_output: bool = True) -> NitResult:
+    def memory_show(self, *, json_output: bool = True) -> R:
         """Run ``nit memory show``."""
         args = ["memory", "show", "--path", str(self.project_dir)]
         if json_output:
             args.append("--json-output")
         return self.run(*args)
 
-    def memory_reset(self) -> NitResult:
+    def memory_reset(self) -> R:
         """Run ``nit memory reset --confirm``."""
         return self.run(
             "memory", "reset", "--confirm", "--path", str(self.project_dir)
         )
 
-    def memory_export(self) -> NitResult:
+    def memory_export(self) -> R:
         """Run ``nit memory export``."""
         return self.run("memory", "export", "--path", str(self.project_dir))
 
@@ -217,7 +736,7 @@ class NitRunner:
         *,
         files: list[str] | None = None,
         output_dir: str | None = None,
-    ) -> NitResult:
+    ) -> R:
         """Run ``nit docs --all`` or ``nit docs --file <f>``."""
         args = ["docs", "--path", str(self.project_dir)]
         if files:
@@ -229,7 +748,7 @@ class NitRunner:
             args.extend(["--output-dir", output_dir])
         return self.run(*args, timeout=600)
 
-    def docs_readme(self) -> NitResult:
+    def docs_readme(self) -> R:
         """Run ``nit docs --readme``."""
         return self.run(
             "docs", "--readme", "--path", str(self.project_dir), timeout=600,
@@ -241,7 +760,7 @@ class NitRunner:
         *,
         no_llm: bool = False,
         output: str | None = None,
-    ) -> NitResult:
+    ) -> R:
         """Run ``nit docs --changelog <tag>``."""
         args = ["docs", "--changelog", tag, "--path", str(self.project_dir)]
         if no_llm:
@@ -250,7 +769,7 @@ class NitRunner:
             args.extend(["--output", output])
         return self.run(*args, timeout=300)
 
-    def docs_check(self) -> NitResult:
+    def docs_check(self) -> R:
         """Run ``nit docs --check``."""
         return self.run(
             "docs", "--check", "--path", str(self.project_dir), timeout=600,
@@ -262,7 +781,7 @@ class NitRunner:
         self,
         *,
         tests_file: str | None = None,
-    ) -> NitResult:
+    ) -> R:
         """Run ``nit drift``."""
         args = ["drift", "--path", str(self.project_dir)]
         if tests_file:
@@ -273,7 +792,7 @@ class NitRunner:
         self,
         *,
         tests_file: str | None = None,
-    ) -> NitResult:
+    ) -> R:
         """Run ``nit drift --baseline``."""
         args = ["drift", "--baseline", "--path", str(self.project_dir)]
         if tests_file:
@@ -282,20 +801,20 @@ class NitRunner:
 
     # --- Debug, Report, Watch ------------------------------------------------
 
-    def debug(self, *, dry_run: bool = False) -> NitResult:
+    def debug(self, *, dry_run: bool = False) -> R:
         """Run ``nit debug``."""
         args = ["debug", "--path", str(self.project_dir)]
         if dry_run:
             args.append("--dry-run")
         return self.run(*args, timeout=600)
 
-    def report_html(self) -> NitResult:
+    def report_html(self) -> R:
         """Run ``nit report --html``."""
         return self.run(
             "report", "--html", "--path", str(self.project_dir), timeout=300,
         )
 
-    def watch(self, *, max_runs: int = 1, interval: int = 10) -> NitResult:
+    def watch(self, *, max_runs: int = 1, interval: int = 10) -> R:
         """Run ``nit watch --max-runs N``."""
         return self.run(
             "watch",
@@ -304,3 +823,349 @@ class NitRunner:
             "--path", str(self.project_dir),
             timeout=300,
         )
+
+
+_Execute = Callable[[tuple[str, ...], int | None], NitResult]
+
+
+class NitRunner(_NitCommands[NitResult]):
+    """Wraps subprocess calls to the nit CLI.
+
+    Always runs with ``--ci`` for machine-readable output and
+    ``--path`` pointing to the project directory.
+
+    When a :class:`NitResultCache` is given, read-only commands reuse a
+    previous result for the same arguments and project tree instead of
+    launching nit again. *backend* decides how nit is launched (a new
+    process per command by default). *listeners* are notified around
+    every command, e.g. to account for its resource usage.
+
+    *timeout_scale* multiplies the static timeout, e.g. to give a slow
+    local model more time for ``generate``/``pick``. *timeout_policy*
+    maps ``(args, scaled static timeout)`` to the timeout to use, e.g. one
+    derived from past durations, which already reflect the model's speed.
+    """
+
+    def __init__(
+        self,
+        project_dir: Path,
+        *,
+        timeout: int = 300,
+        cache: NitResultCache | None = None,
+        backend: NitBackend | None = None,
+        listeners: Sequence[NitListener] = (),
+        timeout_scale: float = 1.0,
+        timeout_policy: Callable[[tuple[str, ...], float], float] | None = None,
+    ) -> None:
+        self.project_dir = project_dir
+        self.timeout = timeout
+        self.cache = cache
+        self.backend = backend or SubprocessBackend()
+        self.listeners = list(listeners)
+        self.timeout_scale = timeout_scale
+        self.timeout_policy = timeout_policy
+
+    def run(self, *args: str, timeout: int | None = None) -> NitResult:
+        """Execute ``nit --ci <args>`` in the project directory.
+
+        The ``--ci`` flag is prepended automatically. Callers should NOT
+        include ``--path`` — it is injected by the convenience methods.
+        For raw invocations, pass ``--path`` explicitly if needed.
+        """
+        return self._invoke(args, timeout, self._execute)
+
+    def configure(self, settings: Mapping[str, str]) -> NitResult:
+        """Apply several ``nit config set`` keys with a single nit launch.
+
+        The ``config set`` commands run back to back in one Python process
+        (``tests/nit_batch.py``) and stop at the first failure. When nit
+        is not a Python entry point, falls back to one :meth:`config_set`
+        per key. Listeners see one ``config set`` command either way.
+        """
+        if not settings:
+            msg = "configure() needs at least one setting"
+            raise ValueError(msg)
+        path = str(self.project_dir)
+        try:
+            launcher = self._batch_backend()
+        except RuntimeError:
+            for key, value in settings.items():
+                result = self.config_set(key, value)
+                if not result.success:
+                    break
+            return result
+
+        commands = [
+            ["--ci", "config", "set", key, value, "--path", path]
+            for key, value in settings.items()
+        ]
+
+        def execute(args: tuple[str, ...], timeout: int | None) -> NitResult:
+            return launcher.execute(
+                (json.dumps(commands),),
+                cwd=self.project_dir,
+                timeout=self._limit(args, timeout),
+            )
+
+        args = ("config", "set", *itertools.chain.from_iterable(settings.items()), "--path", path)
+        return self._invoke(args, None, execute)
+
+    def _batch_backend(self) -> SubprocessBackend:
+        """Backend that runs a JSON list of nit commands in one process."""
+        python, target = _nit_entry_point(self.backend.nit_cmd)
+        return SubprocessBackend([python, str(_BATCH_SCRIPT), *target])
+
+    def _invoke(
+        self, args: tuple[str, ...], timeout: int | None, execute: _Execute,
+    ) -> NitResult:
+        """Notify listeners around running *args* with *execute*."""
+        for listener in self.listeners:
+            listener.command_started(self, args)
+        try:
+            result = self._run(args, timeout, execute)
+        except Exception as exc:
+            for listener in self.listeners:
+                listener.command_failed(self, args, exc)
+            raise
+        for listener in self.listeners:
+            listener.command_finished(self, args, result)
+        return result
+
+    def _run(
+        self, args: tuple[str, ...], timeout: int | None, execute: _Execute,
+    ) -> NitResult:
+        """Run through the result cache, if any."""
+        if self.cache is None:
+            return execute(args, timeout)
+
+        if not self.cache.is_read_only(args):
+            return self._run_mutating(args, timeout, execute)
+
+        before = self.cache.tree_hash(self.project_dir)
+        cached = self.cache.get(self.project_dir, args, before)
+        if cached is not None:
+            return cached
+
+        result = execute(args, timeout)
+        if result.success:
+            # A read-only command may still refresh nit's own caches (e.g.
+            # scan writes .nit/). Re-running it on that state yields the
+            # same answer, so the result is valid for both trees.
+            after = self.cache.tree_hash(self.project_dir)
+            self.cache.put(self.project_dir, args, {before, after}, result)
+        return result
+
+    def _run_mutating(
+        self, args: tuple[str, ...], timeout: int | None, execute: _Execute,
+    ) -> NitResult:
+        """Run a command that may change the project and drop stale entries.
+
+        ``init`` on an already-initialized project usually rewrites the
+        same files, so entries are only dropped when the tree really
+        changed.
+        """
+        assert self.cache is not None
+        if not len(self.cache):
+            return execute(args, timeout)
+        before = self.cache.tree_hash(self.project_dir)
+        try:
+            return execute(args, timeout)
+        finally:
+            if self.cache.tree_hash(self.project_dir) != before:
+                self.cache.invalidate(before)
+
+    def _execute(self, args: tuple[str, ...], timeout: int | None) -> NitResult:
+        """Launch nit and wait for it to finish."""
+        return self.backend.execute(
+            ("--ci", *args),
+            cwd=self.project_dir,
+            timeout=self._limit(args, timeout),
+        )
+
+    def _limit(self, args: tuple[str, ...], timeout: int | None) -> float:
+        """Seconds *args* may run: the policy's pick for its scaled static timeout."""
+        limit = (timeout or self.timeout) * self.timeout_scale
+        if self.timeout_policy is not None:
+            limit = self.timeout_policy(args, limit)
+        return limit
+
+
+# Id of the AsyncNitRunner command running in this context (0 outside
+# one), so listeners can tell a test's concurrent commands apart.
+current_command: ContextVar[int] = ContextVar("current_command", default=0)
+_command_ids = itertools.count(1)
+
+
+class AsyncNitRunner(_NitCommands[Awaitable[NitResult]]):
+    """asyncio counterpart of :class:`NitRunner`.
+
+    Every convenience method returns a coroutine, so independent commands
+    can overlap::
+
+        scan, config, memory = await asyncio.gather(
+            nit.scan(), nit.config_show(), nit.memory_show(),
+        )
+
+    At most *concurrency* commands run at once. Pass a shared *limiter*
+    to bound several runners together (e.g. when fanning out across
+    projects). A command that exceeds its timeout is killed and raises
+    ``subprocess.TimeoutExpired``, like the sync runner; cancelling the
+    awaiting task kills the child as well.
+
+    Each command gets a fresh :data:`current_command` id while it runs;
+    *env* maps that id to extra environment variables for the command.
+    """
+
+    def __init__(
+        self,
+        project_dir: Path,
+        *,
+        timeout: int = 300,
+        concurrency: int = 4,
+        limiter: asyncio.Semaphore | None = None,
+        listeners: Sequence[NitListener] = (),
+        env: Callable[[int], Mapping[str, str]] | None = None,
+    ) -> None:
+        self.project_dir = project_dir
+        self.timeout = timeout
+        self.limiter = limiter or asyncio.Semaphore(concurrency)
+        self.listeners = list(listeners)
+        self.env = env
+        self._nit_cmd = _find_nit_binary()
+
+    async def run(self, *args: str, timeout: int | None = None) -> NitResult:
+        """Execute ``nit --ci <args>`` in the project directory."""
+        command = next(_command_ids)
+        token = current_command.set(command)
+        try:
+            for listener in self.listeners:
+                listener.command_started(self, args)
+            try:
+                result = await self._execute(args, timeout or self.timeout, command)
+            except BaseException as exc:
+                # Timeouts, launch errors and cancellation alike.
+                for listener in self.listeners:
+                    listener.command_failed(self, args, exc)
+                raise
+            for listener in self.listeners:
+                listener.command_finished(self, args, result)
+            return result
+        finally:
+            current_command.reset(token)
+
+    async def _execute(
+        self, args: tuple[str, ...], limit: float, command: int,
+    ) -> NitResult:
+        cmd = [*self._nit_cmd, "--ci", *args]
+        env = {**os.environ, **self.env(command)} if self.env else None
+        async with self.limiter:
+            start = time.monotonic()
+            # Not asyncio's subprocess: its child watcher reaps with a plain
+            # waitpid, which discards the rusage.
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=str(self.project_dir),
+                env=env,
+            )
+            reaped = _wait4(proc)
+            assert proc.stdout is not None and proc.stderr is not None
+            try:
+                stdout, stderr, rusage = await asyncio.wait_for(
+                    asyncio.gather(
+                        _read_pipe(proc.stdout),
+                        _read_pipe(proc.stderr),
+                        asyncio.shield(reaped),
+                    ),
+                    limit,
+                )
+            except TimeoutError:
+                await _kill(proc, reaped)
+                raise subprocess.TimeoutExpired(cmd, limit) from None
+            except asyncio.CancelledError:
+                await asyncio.shield(_kill(proc, reaped))
+                raise
+            wall = time.monotonic() - start
+
+        assert proc.returncode is not None
+        return NitResult(
+            exit_code=proc.returncode,
+            stdout=_decode(stdout),
+            stderr=_decode(stderr),
+            usage=ResourceUsage(
+                wall_seconds=wall,
+                stdout_bytes=len(stdout),
+                stderr_bytes=len(stderr),
+                user_seconds=rusage.ru_utime if rusage else None,
+                system_seconds=rusage.ru_stime if rusage else None,
+                max_rss_kb=_max_rss_kb(rusage.ru_maxrss) if rusage else None,
+            ),
+        )
+
+
+async def _read_pipe(pipe: IO[bytes]) -> bytes:
+    """Read *pipe* to EOF without blocking the event loop, then close it."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe,
+    )
+    try:
+        return await reader.read()
+    finally:
+        transport.close()
+
+
+def _wait4(proc: subprocess.Popen[bytes]) -> asyncio.Future[resource.struct_rusage | None]:
+    """Future of *proc*'s rusage (children included), like :func:`_reap`.
+
+    ``os.wait4`` blocks on a helper thread, which hands the exit status
+    back to the ``Popen`` object and settles the future on the loop.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[resource.struct_rusage | None] = loop.create_future()
+
+    def settle(rusage: resource.struct_rusage | None, error: BaseException | None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(rusage)
+
+    def wait() -> None:
+        try:
+            if not hasattr(os, "wait4"):  # pragma: no cover — non-POSIX
+                proc.wait()
+                loop.call_soon_threadsafe(settle, None, None)
+                return
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        except BaseException as exc:  # noqa: BLE001 — surfaced through the future
+            loop.call_soon_threadsafe(settle, None, exc)
+        else:
+            loop.call_soon_threadsafe(settle, rusage, None)
+
+    threading.Thread(target=wait, name=f"nit-reap-{proc.pid}", daemon=True).start()
+    return future
+
+
+async def _kill(
+    proc: subprocess.Popen[bytes],
+    reaped: asyncio.Future[resource.struct_rusage | None],
+) -> None:
+    """Kill *proc* if it is still running and wait until it is reaped."""
+    if proc.returncode is None:
+        # Not proc.kill(): its poll() would race the reaper for the pid.
+        try:
+            os.kill(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    await reaped
+
+
+def _decode(data: bytes) -> str:
+    """Decode child output the way ``subprocess.run(text=True)`` does."""
+    text = data.decode(locale.getpreferredencoding(False))
+    return text.replace("\r\n", "\n").replace("\r", "\n")
@@ -0,0 +1,264 @@
+"""Token and latency metering of nit's Ollama traffic.
+
+An :class:`OllamaMeter` wraps an :mod:`tests.ollama_proxy` handler chain
+and logs one :class:`LLMRequestRecord` per inference request: model,
+prompt and completion tokens (as reported by Ollama), time to first byte,
+total latency, and whether the answer was reused instead of computed
+(cassette replay, coalesced duplicate).
+
+Requests are attributed to the nit command that caused them. The test
+id arrives as the proxy client (see :func:`~tests.ollama_proxy.client_url`)
+and the meter's :class:`~tests.nit_runner.NitListener` tracks which
+command each test is running at that moment. Concurrent commands of one
+:class:`~tests.nit_runner.AsyncNitRunner` are told apart by a client
+that also carries the command id (see :func:`command_client`).
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from tests.nit_runner import NitListener, NitResult, command_words, current_command
+from tests.ollama_proxy import (
+    INFERENCE_PATHS,
+    Handler,
+    ProxyRequest,
+    ProxyResponse,
+    client_url,
+)
+
+
+@dataclass(frozen=True)
+class LLMRequestRecord:
+    """One inference request and what it cost."""
+
+    project: str
+    test: str
+    command: str
+    model: str
+    path: str
+    status: int
+    cached: bool
+    prompt_tokens: int | None
+    completion_tokens: int | None
+    first_byte_seconds: float | None
+    latency_seconds: float
+
+
+@dataclass(frozen=True)
+class LLMSummary:
+    """Aggregated LLM usage of one command on one project."""
+
+    project: str
+    command: str
+    requests: int
+    cached: int
+    prompt_tokens: int
+    completion_tokens: int
+    mean_first_byte_seconds: float | None
+    latency_seconds: float
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached / self.requests if self.requests else 0.0
+
+
+@dataclass(frozen=True)
+class _Call:
+    project: str
+    test: str
+    command: str
+
+
+def command_client(test: str, command: int) -> str:
+    """Proxy client name for *test*'s command *command* (0: any command)."""
+    return f"{test}#{command}" if command else test
+
+
+def token_counts(body: bytes) -> tuple[int | None, int | None]:
+    """``(prompt, completion)`` token counts from an Ollama response body.
+
+    Understands Ollama's native fields (``prompt_eval_count``,
+    ``eval_count``; in the final object of a streamed NDJSON response) and
+    the OpenAI-compatible ``usage`` block.
+    """
+    text = body.decode("utf-8", "replace").strip()
+    try:
+        candidates = [json.loads(text)]
+    except ValueError:
+        candidates = []
+        for line in reversed(text.splitlines()):
+            try:
+                candidates.append(json.loads(line))
+            except ValueError:
+                continue
+            break
+    for data in candidates:
+        if not isinstance(data, dict):
+            continue
+        usage = data.get("usage")
+        if isinstance(usage, dict):
+            return usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if "eval_count" in data or "prompt_eval_count" in data:
+            return data.get("prompt_eval_count"), data.get("eval_count")
+    return None, None
+
+
+class _MeterListener(NitListener):
+    def __init__(self, meter: OllamaMeter, project: str, test: str) -> None:
+        self.meter = meter
+        self.project = project
+        self.test = test
+
+    def command_started(self, runner: Any, args: tuple[str, ...]) -> None:
+        command = " ".join(command_words(args) or args[:1])
+        self.meter._begin(self._client(), _Call(self.project, self.test, command))
+
+    def command_finished(
+        self, runner: Any, args: tuple[str, ...], result: NitResult,
+    ) -> None:
+        self.meter._end(self._client())
+
+    def command_failed(
+        self, runner: Any, args: tuple[str, ...], error: BaseException,
+    ) -> None:
+        self.meter._end(self._client())
+
+    def _client(self) -> str:
+        return command_client(self.test, current_command.get())
+
+
+class OllamaMeter:
+    """Thread-safe log of :class:`LLMRequestRecord` for one session."""
+
+    def __init__(self) -> None:
+        self.records: list[LLMRequestRecord] = []
+        self._active: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, inner: Handler) -> Handler:
+        """Handler that meters every inference request passed to *inner*."""
+
+        def metered(request: ProxyRequest) -> ProxyResponse:
+            start = time.monotonic()
+            response = inner(request)
+            if request.method == "POST" and request.path in INFERENCE_PATHS:
+                self._observe(request, response, time.monotonic() - start)
+            return response
+
+        return metered
+
+    def listener(self, *, project: str, test: str) -> NitListener:
+        """Listener that attributes *test*'s requests to its nit commands.
+
+        *test* must be the client name the test's ``llm.base_url`` carries.
+        Commands of an :class:`~tests.nit_runner.AsyncNitRunner` must also
+        reach the proxy through :meth:`command_env`.
+        """
+        return _MeterListener(self, project, test)
+
+    @staticmethod
+    def command_env(host: str, test: str) -> Callable[[int], dict[str, str]]:
+        """``AsyncNitRunner(env=...)`` routing each command as its own client.
+
+        Points ``OLLAMA_HOST`` at the proxy *host* under
+        :func:`command_client`, so a project without ``llm.base_url``
+        attributes every request to the command that made it.
+        """
+        return lambda command: {"OLLAMA_HOST": client_url(host, command_client(test, command))}
+
+    def summarize(self) -> list[LLMSummary]:
+        """Per (project, command) totals, most tokens first."""
+        groups: dict[tuple[str, str], list[LLMRequestRecord]] = defaultdict(list)
+        with self._lock:
+            for record in self.records:
+                groups[(record.project, record.command)].append(record)
+
+        summaries = []
+        for (project, command), records in groups.items():
+            ttfb = [r.first_byte_seconds for r in records if r.first_byte_seconds is not None]
+            summaries.append(
+                LLMSummary(
+                    project=project,
+                    command=command,
+                    requests=len(records),
+                    cached=sum(r.cached for r in records),
+                    prompt_tokens=sum(r.prompt_tokens or 0 for r in records),
+                    completion_tokens=sum(r.completion_tokens or 0 for r in records),
+                    mean_first_byte_seconds=sum(ttfb) / len(ttfb) if ttfb else None,
+                    latency_seconds=sum(r.latency_seconds for r in records),
+                ),
+            )
+        return sorted(
+            summaries,
+            key=lambda s: s.prompt_tokens + s.completion_tokens,
+            reverse=True,
+        )
+
+    def write(self, directory: Path, stem: str) -> tuple[Path, Path]:
+        """Write ``<stem>.json`` and ``<stem>.csv`` into *directory*."""
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            rows = [asdict(r) for r in self.records]
+
+        json_path = directory / f"{stem}.json"
+        json_path.write_text(
+            json.dumps(
+                {
+                    "records": rows,
+                    "summary": [
+                        {**asdict(s), "cache_hit_rate": round(s.cache_hit_rate, 4)}
+                        for s in self.summarize()
+                    ],
+                },
+                indent=2,
+            )
+            + "\n",
+        )
+
+        csv_path = directory / f"{stem}.csv"
+        with csv_path.open("w", newline="") as fh:
+            writer = csv.DictWriter(
+                fh, fieldnames=[f.name for f in fields(LLMRequestRecord)],
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+        return json_path, csv_path
+
+    def _begin(self, client: str, call: _Call) -> None:
+        with self._lock:
+            self._active[client] = call
+
+    def _end(self, client: str) -> None:
+        with self._lock:
+            self._active.pop(client, None)
+
+    def _observe(
+        self, request: ProxyRequest, response: ProxyResponse, latency: float,
+    ) -> None:
+        prompt, completion = token_counts(response.body)
+        with self._lock:
+            call = self._active.get(request.client)
+            self.records.append(
+                LLMRequestRecord(
+                    project=call.project if call else "",
+                    test=call.test if call else request.client,
+                    command=call.command if call else "(harness)",
+                    model=request.model or "",
+                    path=request.path,
+                    status=response.status,
+                    cached=response.cached,
+                    prompt_tokens=prompt,
+                    completion_tokens=completion,
+                    first_byte_seconds=response.first_byte_seconds,
+                    latency_seconds=latency,
+                ),
+            )
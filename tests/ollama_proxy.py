@@ -0,0 +1,372 @@
+"""Local stand-in for Ollama — proxy, recorder and replayer.
+
+nit talks to Ollama over plain HTTP (``/api/tags``, ``/api/chat``,
+``/api/generate``, ...). :class:`OllamaProxy` listens on a loopback port
+and answers those requests through a chain of handlers:
+
+* :class:`Upstream` forwards to a real Ollama.
+* :class:`Cassettes` wraps another handler. In ``record`` mode it stores
+  every exchange as a JSON cassette keyed by a hash of the request; in
+  ``replay`` mode it answers from cassettes only and never touches the
+  network.
+
+Prompts contain absolute paths of per-test project copies, which differ
+between runs, so request bodies are scrubbed (see :class:`Scrubber`)
+before hashing.
+
+Clients identify themselves through the base URL: a request for
+``<proxy>/t/<client>/api/chat`` reaches the handlers as ``/api/chat``
+with :attr:`ProxyRequest.client` set (see :func:`client_url`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote, unquote
+
+MODES = ("live", "record", "replay")
+
+# Set to "1" in the environment when OLLAMA_HOST is one of these proxies,
+# i.e. when it understands ``/t/<client>`` base URLs.
+ROUTED_ENV = "NIT_OLLAMA_ROUTED"
+
+_CLIENT_PREFIX = re.compile(r"^/t/([^/]+)(/.*)?$")
+
+# Marks responses that were not computed by Ollama for this request
+# (cassette replay, coalesced duplicate), across chained proxies.
+_CACHED_HEADER = "X-Nit-Cached"
+
+# Endpoints that run the model, as opposed to listing or describing models.
+INFERENCE_PATHS = frozenset({
+    "/api/generate",
+    "/api/chat",
+    "/api/embed",
+    "/api/embeddings",
+    "/v1/chat/completions",
+    "/v1/completions",
+    "/v1/embeddings",
+})
+
+
+def ollama_host() -> str:
+    """Ollama URL from ``OLLAMA_HOST`` (default ``http://localhost:11434``)."""
+    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    if not host.startswith(("http://", "https://")):
+        host = f"http://{host}"
+    return host
+
+
+def client_url(base: str, client: str) -> str:
+    """Base URL through which *client*'s requests are attributed to it."""
+    return f"{base.rstrip('/')}/t/{quote(client, safe='')}"
+
+
+@dataclass(frozen=True)
+class ProxyRequest:
+    """One HTTP request received by the proxy."""
+
+    method: str
+    path: str
+    body: bytes = b""
+    headers: Mapping[str, str] = field(default_factory=dict)
+    client: str = ""
+
+    @property
+    def model(self) -> str | None:
+        """The ``model`` field of a JSON request body, if any."""
+        body = self.json()
+        model = body.get("model") if isinstance(body, dict) else None
+        return model if isinstance(model, str) else None
+
+    def json(self) -> Any:
+        """The decoded JSON body, or ``None`` if it isn't JSON."""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+
+@dataclass(frozen=True)
+class ProxyResponse:
+    """What the proxy sends back.
+
+    ``first_byte_seconds`` is how long Ollama took to send the first body
+    bytes (the first token, for streamed responses); ``cached`` is set
+    when the response was reused rather than computed for this request.
+    """
+
+    status: int
+    body: bytes
+    content_type: str = "application/json"
+    first_byte_seconds: float | None = None
+    cached: bool = False
+
+    @classmethod
+    def error(cls, status: int, message: str) -> ProxyResponse:
+        """An error in Ollama's own ``{"error": ...}`` shape."""
+        return cls(status, json.dumps({"error": message}).encode())
+
+
+Handler = Callable[[ProxyRequest], ProxyResponse]
+
+
+class Upstream:
+    """Forward requests to the Ollama at *host*.
+
+    With *routed*, *host* is itself one of these proxies and the client
+    prefix is passed along.
+    """
+
+    def __init__(self, host: str, *, timeout: float = 900, routed: bool = False) -> None:
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.routed = routed
+
+    def __call__(self, request: ProxyRequest) -> ProxyResponse:
+        base = self.host
+        if self.routed and request.client:
+            base = client_url(base, request.client)
+        req = urllib.request.Request(
+            base + request.path,
+            data=request.body or None,
+            method=request.method,
+            headers={"Content-Type": request.headers.get("Content-Type", "application/json")},
+        )
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                first = resp.read1()
+                first_byte = time.monotonic() - start
+                return ProxyResponse(
+                    resp.status,
+                    first + resp.read(),
+                    resp.headers.get("Content-Type", "application/json"),
+                    first_byte_seconds=first_byte,
+                    cached=resp.headers.get(_CACHED_HEADER) == "1",
+                )
+        except urllib.error.HTTPError as exc:
+            return ProxyResponse(
+                exc.code,
+                exc.read(),
+                exc.headers.get("Content-Type", "application/json"),
+            )
+        except OSError as exc:
+            return ProxyResponse.error(502, f"upstream {self.host}: {exc}")
+
+
+class Scrubber:
+    """Replace run-specific paths in request bodies with stable tokens.
+
+    Each entry of *paths* maps a prefix to its token. A numbered directory
+    directly under a prefix (pytest's ``python-api0``, ``python-api13``)
+    is folded into the token too, so the same test always hashes alike;
+    any other path below the prefix is kept.
+    """
+
+    def __init__(self, paths: Mapping[str, str] | None = None) -> None:
+        self._patterns = [
+            (
+                re.compile(re.escape(prefix.rstrip("/\\")) + r"(?:[/\\][\w.-]*?\d+(?=[/\\\"'\s]|$))?"),
+                token,
+            )
+            for prefix, token in sorted((paths or {}).items(), key=lambda kv: -len(kv[0]))
+            if prefix
+        ]
+
+    def __call__(self, text: str) -> str:
+        for pattern, token in self._patterns:
+            text = pattern.sub(token, text)
+        return text
+
+
+class Cassettes:
+    """Record or replay exchanges with *inner* under *root*.
+
+    Cassettes live at ``<root>/<key[:2]>/<key>.json``: one small file per
+    exchange, so re-recording shows up as a readable diff. ``record`` mode
+    still answers from existing cassettes and only forwards new requests;
+    delete *root* to re-record from scratch. Failed upstream calls (5xx)
+    are never recorded.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        mode: str,
+        inner: Handler | None = None,
+        scrub: Scrubber | None = None,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            msg = f"Unknown cassette mode: {mode!r}"
+            raise ValueError(msg)
+        if mode == "record" and inner is None:
+            msg = "record mode needs an upstream handler"
+            raise ValueError(msg)
+        self.root = root
+        self.mode = mode
+        self.inner = inner
+        self.scrub = scrub or Scrubber()
+        self.hits = 0
+        self.recorded = 0
+        self.misses: list[str] = []
+        self._lock = threading.Lock()
+
+    def key(self, request: ProxyRequest) -> str:
+        """Stable hash of the request after scrubbing."""
+        return hashlib.sha256(
+            json.dumps(self._canonical(request), sort_keys=True).encode(),
+        ).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def __call__(self, request: ProxyRequest) -> ProxyResponse:
+        key = self.key(request)
+        path = self.path(key)
+        if self.mode == "replay" or path.is_file():
+            try:
+                data = json.loads(path.read_text())
+            except FileNotFoundError:
+                with self._lock:
+                    self.misses.append(f"{request.method} {request.path} {key[:12]}")
+                return ProxyResponse.error(
+                    404,
+                    f"no cassette for {request.method} {request.path} ({key[:12]}); "
+                    "re-record with --ollama-mode=record",
+                )
+            with self._lock:
+                self.hits += 1
+            resp = data["response"]
+            return ProxyResponse(
+                resp["status"], resp["body"].encode(), resp["content_type"], cached=True,
+            )
+
+        assert self.inner is not None
+        response = self.inner(request)
+        if response.status < 500:
+            self._write(path, request, response)
+        return response
+
+    def _canonical(self, request: ProxyRequest) -> dict[str, Any]:
+        body: Any = request.json()
+        if body is None:
+            body = self.scrub(request.body.decode("utf-8", "replace"))
+        else:
+            body = json.loads(self.scrub(json.dumps(body, sort_keys=True)))
+        return {"method": request.method, "path": request.path, "body": body}
+
+    def _write(self, path: Path, request: ProxyRequest, response: ProxyResponse) -> None:
+        data = {
+            "request": self._canonical(request),
+            "response": {
+                "status": response.status,
+                "content_type": response.content_type,
+                "body": response.body.decode("utf-8", "replace"),
+            },
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+        with self._lock:
+            self.recorded += 1
+
+
+class OllamaProxy:
+    """Serve *handler* on a loopback port in a background thread.
+
+    Use as a context manager; :attr:`url` is what nit's ``llm.base_url``
+    should point at.
+    """
+
+    def __init__(self, handler: Handler, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.handler = handler
+        self._server = ThreadingHTTPServer((host, port), _make_request_handler(handler))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="ollama-proxy", daemon=True,
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> OllamaProxy:
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> OllamaProxy:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _make_request_handler(handler: Handler) -> type[BaseHTTPRequestHandler]:
+    class _RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            path, client = self.path, ""
+            if match := _CLIENT_PREFIX.match(path):
+                client, path = unquote(match.group(1)), match.group(2) or "/"
+            if self.command in ("GET", "HEAD") and path == "/":
+                # Liveness probe clients send before anything else.
+                response = ProxyResponse(200, b"Ollama is running", "text/plain")
+            else:
+                try:
+                    response = handler(
+                        ProxyRequest(self.command, path, body, dict(self.headers), client),
+                    )
+                except Exception as exc:  # noqa: BLE001 — report, don't drop the socket
+                    response = ProxyResponse.error(500, f"ollama proxy: {exc!r}")
+            self.send_response(response.status)
+            self.send_header("Content-Type", response.content_type)
+            self.send_header("Content-Length", str(len(response.body)))
+            if response.cached:
+                self.send_header(_CACHED_HEADER, "1")
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(response.body)
+
+        do_GET = do_POST = do_HEAD = do_DELETE = _dispatch
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    return _RequestHandler
+
+
+def scrub_paths(paths: Iterable[tuple[Path | str, str]]) -> Scrubber:
+    """Build a :class:`Scrubber` from ``(path, token)`` pairs, resolving symlinks."""
+    mapping: dict[str, str] = {}
+    for path, token in paths:
+        mapping[str(path)] = token
+        mapping[os.path.realpath(path)] = token
+    return Scrubber(mapping)
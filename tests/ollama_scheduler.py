@@ -0,0 +1,238 @@
+"""Fair scheduling of LLM requests from concurrent tests onto one Ollama.
+
+:class:`Scheduler` is an :mod:`tests.ollama_proxy` handler. Inference
+requests (``/api/generate``, ``/api/chat``, embeddings, OpenAI-style
+completions) are queued per client and admitted under these rules:
+
+* at most *per_model* requests of one model run at once; Ollama batches
+  concurrent requests to a loaded model (``OLLAMA_NUM_PARALLEL``), so a
+  cap above 1 lets it do that without overcommitting;
+* at most *max_models* distinct models are active at once, so tests
+  asking for different models don't make Ollama swap them in and out.
+  Requests for an already-active model go first; once a request for
+  another model has waited *switch_after* seconds, the active model
+  stops taking new work and drains so the switch can happen;
+* among admissible requests, clients are served round-robin;
+* identical requests already in flight are coalesced: the duplicate waits
+  for the first one's response instead of running again.
+
+Every request is timed as queue wait (before admission) and inference
+(the upstream call), see :meth:`Scheduler.summarize`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field, replace
+
+from tests.ollama_proxy import INFERENCE_PATHS, Handler, ProxyRequest, ProxyResponse
+
+
+@dataclass(frozen=True)
+class ScheduledRequest:
+    """Timing of one inference request that went through the scheduler."""
+
+    client: str
+    model: str
+    path: str
+    queue_seconds: float
+    inference_seconds: float
+    coalesced: bool = False
+
+
+@dataclass(frozen=True)
+class SchedulerSummary:
+    """Aggregated timings for one model."""
+
+    model: str
+    requests: int
+    coalesced: int
+    clients: int
+    queue_seconds: float
+    max_queue_seconds: float
+    inference_seconds: float
+    max_inference_seconds: float
+
+
+@dataclass
+class _Ticket:
+    client: str
+    model: str
+    enqueued: float = field(default_factory=time.monotonic)
+    granted: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    response: ProxyResponse | None = None
+
+
+class Scheduler:
+    """Admission control in front of *inner* (usually an ``Upstream``)."""
+
+    def __init__(
+        self,
+        inner: Handler,
+        *,
+        per_model: int = 1,
+        max_models: int = 1,
+        switch_after: float = 30.0,
+        coalesce: bool = True,
+    ) -> None:
+        if per_model < 1 or max_models < 1:
+            msg = "per_model and max_models must be at least 1"
+            raise ValueError(msg)
+        self.inner = inner
+        self.per_model = per_model
+        self.max_models = max_models
+        self.switch_after = switch_after
+        self.coalesce = coalesce
+        self.records: list[ScheduledRequest] = []
+        self._lock = threading.Lock()
+        self._queues: dict[str, deque[_Ticket]] = {}
+        self._turns: deque[str] = deque()  # clients with queued tickets, in serving order
+        self._running: Counter[str] = Counter()
+        self._flights: dict[str, _Flight] = {}
+
+    def __call__(self, request: ProxyRequest) -> ProxyResponse:
+        model = request.model
+        if request.method != "POST" or request.path not in INFERENCE_PATHS or model is None:
+            return self.inner(request)
+
+        key = self._flight_key(request) if self.coalesce else None
+        if key is not None:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+            assert flight is not None
+            if not leader:
+                start = time.monotonic()
+                flight.done.wait()
+                self._record(request, model, time.monotonic() - start, 0.0, coalesced=True)
+                assert flight.response is not None
+                return replace(flight.response, cached=True, first_byte_seconds=None)
+
+        try:
+            response = self._run(request, model)
+        except Exception as exc:
+            response = ProxyResponse.error(502, f"scheduler: {exc!r}")
+        if key is not None:
+            with self._lock:
+                flight = self._flights.pop(key)
+            flight.response = response
+            flight.done.set()
+        return response
+
+    def summarize(self) -> list[SchedulerSummary]:
+        """Per-model totals, busiest model first."""
+        with self._lock:
+            records = list(self.records)
+        by_model: dict[str, list[ScheduledRequest]] = {}
+        for record in records:
+            by_model.setdefault(record.model, []).append(record)
+        rows = [
+            SchedulerSummary(
+                model=model,
+                requests=len(rs),
+                coalesced=sum(r.coalesced for r in rs),
+                clients=len({r.client for r in rs}),
+                queue_seconds=sum(r.queue_seconds for r in rs),
+                max_queue_seconds=max(r.queue_seconds for r in rs),
+                inference_seconds=sum(r.inference_seconds for r in rs),
+                max_inference_seconds=max(r.inference_seconds for r in rs),
+            )
+            for model, rs in by_model.items()
+        ]
+        return sorted(rows, key=lambda r: -(r.queue_seconds + r.inference_seconds))
+
+    # --- Admission -----------------------------------------------------------
+
+    def _run(self, request: ProxyRequest, model: str) -> ProxyResponse:
+        ticket = _Ticket(request.client, model)
+        with self._lock:
+            if ticket.client not in self._queues:
+                self._queues[ticket.client] = deque()
+                self._turns.append(ticket.client)
+            self._queues[ticket.client].append(ticket)
+            self._admit()
+        ticket.granted.wait()
+        started = time.monotonic()
+        try:
+            return self.inner(request)
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._running[model] -= 1
+                if not self._running[model]:
+                    del self._running[model]
+                self._admit()
+            self._record(request, model, started - ticket.enqueued, finished - started)
+
+    def _admit(self) -> None:
+        """Grant every ticket that may run now (caller holds the lock)."""
+        while (ticket := self._next_ticket()) is not None:
+            queue = self._queues[ticket.client]
+            queue.popleft()
+            self._turns.remove(ticket.client)
+            if queue:
+                self._turns.append(ticket.client)  # back of the line
+            else:
+                del self._queues[ticket.client]
+            self._running[ticket.model] += 1
+            ticket.granted.set()
+
+    def _next_ticket(self) -> _Ticket | None:
+        heads = [self._queues[client][0] for client in self._turns]
+        if not heads:
+            return None
+        active = set(self._running)
+        now = time.monotonic()
+        starving = any(
+            t.model not in active and now - t.enqueued >= self.switch_after
+            for t in heads
+        )
+        # Keep feeding loaded models unless another model has waited too long.
+        if not starving:
+            for ticket in heads:
+                if ticket.model in active and self._running[ticket.model] < self.per_model:
+                    return ticket
+        if len(active) < self.max_models:
+            others = [t for t in heads if t.model not in active]
+            if others:
+                # A model switch goes to whoever has waited longest for one.
+                return min(others, key=lambda t: t.enqueued) if starving else others[0]
+        return None
+
+    # --- Bookkeeping ---------------------------------------------------------
+
+    @staticmethod
+    def _flight_key(request: ProxyRequest) -> str:
+        return hashlib.sha256(
+            request.path.encode() + b"\0" + request.body,
+        ).hexdigest()
+
+    def _record(
+        self,
+        request: ProxyRequest,
+        model: str,
+        queue_seconds: float,
+        inference_seconds: float,
+        *,
+        coalesced: bool = False,
+    ) -> None:
+        record = ScheduledRequest(
+            client=request.client,
+            model=model,
+            path=request.path,
+            queue_seconds=queue_seconds,
+            inference_seconds=inference_seconds,
+            coalesced=coalesced,
+        )
+        with self._lock:
+            self.records.append(record)
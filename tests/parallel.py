@@ -0,0 +1,302 @@
+"""Project-sharded parallel runner for the integration suite.
+
+Runs one pytest worker process per example project (``--project NAME``)
+so every stack gets its own session: its own ``project_dir`` copies,
+its own ``ollama_info`` discovery, its own toolchain processes. The
+per-shard JUnit reports are merged into a single report at the end.
+Shards start longest first, by the projects' recorded test durations
+(see :mod:`tests.durations`); projects with no history go first of all.
+
+With ``--ollama-scheduler`` the runner also hosts a
+:class:`~tests.ollama_scheduler.Scheduler` proxy in front of Ollama and
+points every shard at it, so concurrent LLM tests share the model fairly
+instead of thrashing it.
+
+Usage::
+
+    python -m tests.parallel tests/heuristics/ -v
+    python -m tests.parallel -j 4 --project go-api --project rust-cli tests/
+    python -m tests.parallel --ollama-scheduler --ollama-per-model 2 tests/llm/
+    python -m tests.parallel --setup-deps tests/
+    python -m tests.parallel --changed-since origin/main tests/heuristics/
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from tests.changes import affected_projects, changed_paths
+from tests.deps import print_results, setup_projects
+from tests.durations import DurationHistory, default_history_path
+from tests.manifests import ProjectManifest, examples_root, select_projects
+from tests.ollama_proxy import ROUTED_ENV, OllamaProxy, Upstream, ollama_host
+from tests.ollama_scheduler import Scheduler
+
+# pytest exit code for "no tests were collected" — an empty shard is fine.
+_NO_TESTS_COLLECTED = 5
+
+_COUNTERS = ("tests", "failures", "errors", "skipped")
+
+
+@dataclass
+class ShardResult:
+    """Outcome of one project's pytest worker."""
+
+    project: str
+    exit_code: int
+    duration: float
+    log: Path
+    junit: Path
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code in (0, _NO_TESTS_COLLECTED)
+
+
+def _run_shard(
+    manifest: ProjectManifest,
+    pytest_args: list[str],
+    workdir: Path,
+    env: Mapping[str, str] | None = None,
+) -> ShardResult:
+    """Run pytest restricted to a single project and capture its output."""
+    junit = workdir / f"{manifest.name}.xml"
+    log = workdir / f"{manifest.name}.log"
+    cmd = [
+        sys.executable,
+        "-m",
+        "pytest",
+        *pytest_args,
+        # ``=`` form: pytest pre-parses args before conftest options exist,
+        # so a separate value would be mistaken for a path.
+        f"--project={manifest.name}",
+        f"--junitxml={junit}",
+        # Shards would otherwise race on .pytest_cache/lastfailed.
+        "-p",
+        "no:cacheprovider",
+    ]
+    start = time.monotonic()
+    with log.open("w") as fh:
+        proc = subprocess.run(
+            cmd,
+            stdout=fh,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, **(env or {}), "PYTHONUNBUFFERED": "1"},
+            check=False,
+        )
+    return ShardResult(
+        project=manifest.name,
+        exit_code=proc.returncode,
+        duration=time.monotonic() - start,
+        log=log,
+        junit=junit,
+    )
+
+
+def merge_junit(shards: list[ShardResult], output: Path) -> ET.Element:
+    """Merge per-shard JUnit XML files into one ``<testsuites>`` document."""
+    merged = ET.Element("testsuites", name="nit-integration")
+    totals = dict.fromkeys(_COUNTERS, 0)
+    total_time = 0.0
+
+    for shard in shards:
+        if not shard.junit.is_file():
+            continue
+        root = ET.parse(shard.junit).getroot()
+        suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+        for suite in suites:
+            suite.set("name", shard.project)
+            for key in _COUNTERS:
+                totals[key] += int(suite.get(key, 0))
+            total_time += float(suite.get("time", 0))
+            merged.append(suite)
+
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    merged.set("time", f"{total_time:.3f}")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(merged).write(output, encoding="utf-8", xml_declaration=True)
+    return merged
+
+
+def longest_first(
+    projects: list[ProjectManifest], history: DurationHistory,
+) -> list[ProjectManifest]:
+    """*projects* ordered by expected duration, slowest (or unknown) first."""
+
+    def expected(manifest: ProjectManifest) -> float:
+        seconds = history.project_seconds(manifest.name)
+        return float("inf") if seconds is None else seconds
+
+    return sorted(projects, key=expected, reverse=True)
+
+
+def _print_summary(shards: list[ShardResult], wall: float) -> None:
+    """Print a per-project table plus the wall-clock vs. serial time."""
+    print(f"\n{'project':<16} {'exit':>4} {'time':>9}")
+    for shard in shards:
+        marker = "" if shard.ok else "  FAILED"
+        print(f"{shard.project:<16} {shard.exit_code:>4} {shard.duration:>8.1f}s{marker}")
+    serial = sum(s.duration for s in shards)
+    print(f"\nwall {wall:.1f}s — serial would have been {serial:.1f}s")
+
+
+def _print_scheduler_summary(scheduler: Scheduler) -> None:
+    """Print queue wait vs. inference time per model."""
+    rows = scheduler.summarize()
+    if not rows:
+        return
+    print(
+        f"\n{'model':<24} {'reqs':>5} {'merged':>6} {'clients':>7} "
+        f"{'queue s':>8} {'max q':>7} {'infer s':>8} {'max i':>7}"
+    )
+    for row in rows:
+        print(
+            f"{row.model:<24} {row.requests:>5} {row.coalesced:>6} {row.clients:>7} "
+            f"{row.queue_seconds:>8.1f} {row.max_queue_seconds:>7.1f} "
+            f"{row.inference_seconds:>8.1f} {row.max_inference_seconds:>7.1f}"
+        )
+
+
+@contextmanager
+def _ollama_scheduler(
+    per_model: int,
+    max_models: int,
+) -> Iterator[tuple[Scheduler, dict[str, str]]]:
+    """Serve a scheduler in front of ``$OLLAMA_HOST``; yield it and the shard env."""
+    upstream = Upstream(ollama_host(), routed=os.environ.get(ROUTED_ENV) == "1")
+    scheduler = Scheduler(upstream, per_model=per_model, max_models=max_models)
+    with OllamaProxy(scheduler) as proxy:
+        yield scheduler, {"OLLAMA_HOST": proxy.url, ROUTED_ENV: "1"}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.parallel",
+        description="Run the integration suite with one worker per project.",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        help="Concurrent workers (default: one per selected project).",
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        default=[],
+        dest="projects",
+        metavar="NAME",
+        help="Only shard the named project (repeatable).",
+    )
+    parser.add_argument(
+        "--junitxml",
+        type=Path,
+        default=Path("parallel-report.xml"),
+        help="Where to write the merged JUnit report.",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only shard projects with files changed since git REF "
+        "(all of them if the shared harness changed).",
+    )
+    parser.add_argument(
+        "--setup-deps",
+        action="store_true",
+        help="Install or restore every selected project's dependencies "
+        "(see tests.deps) before starting the shards.",
+    )
+    parser.add_argument(
+        "--ollama-scheduler",
+        action="store_true",
+        help="Route every shard's Ollama traffic through one fair scheduler.",
+    )
+    parser.add_argument(
+        "--ollama-per-model",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Concurrent requests per model under --ollama-scheduler (default: 1).",
+    )
+    parser.add_argument(
+        "--ollama-max-models",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Models active at once under --ollama-scheduler (default: 1).",
+    )
+    args, pytest_args = parser.parse_known_args(argv)
+
+    try:
+        projects = select_projects(args.projects)
+    except KeyError as exc:
+        parser.error(exc.args[0])
+    if args.changed_since:
+        try:
+            paths = changed_paths(args.changed_since, examples_root())
+        except RuntimeError as exc:
+            parser.error(str(exc))
+        projects = affected_projects(paths, projects)
+        if not projects:
+            print(f"no project changed since {args.changed_since}")
+            return 0
+    projects = longest_first(projects, DurationHistory(default_history_path()))
+    workers = args.workers or len(projects)
+    if args.setup_deps:
+        print_results(setup_projects(projects, workers=workers))
+
+    with ExitStack() as stack:
+        scheduler: Scheduler | None = None
+        env: dict[str, str] = {}
+        if args.ollama_scheduler:
+            try:
+                scheduler, env = stack.enter_context(
+                    _ollama_scheduler(args.ollama_per_model, args.ollama_max_models),
+                )
+            except ValueError as exc:
+                parser.error(str(exc))
+        workdir = Path(stack.enter_context(
+            tempfile.TemporaryDirectory(prefix="nit-shards-"),
+        ))
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_run_shard, manifest, pytest_args, workdir, env)
+                for manifest in projects
+            ]
+            shards = [f.result() for f in futures]
+        wall = time.monotonic() - start
+
+        for shard in shards:
+            print(f"\n===== {shard.project} (exit {shard.exit_code}) =====")
+            print(shard.log.read_text(), end="")
+
+        merged = merge_junit(shards, args.junitxml)
+
+    _print_summary(shards, wall)
+    if scheduler is not None:
+        _print_scheduler_summary(scheduler)
+    print(
+        f"merged report: {args.junitxml} "
+        f"({merged.get('tests')} tests, {merged.get('failures')} failures, "
+        f"{merged.get('errors')} errors, {merged.get('skipped')} skipped)"
+    )
+    return 0 if all(s.ok for s in shards) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
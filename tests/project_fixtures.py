@@ -0,0 +1,134 @@
+"""Project fixtures shared by the test suite and the benchmarks.
+
+Loaded as a pytest plugin through ``pytest_plugins`` in
+``tests/conftest.py`` and ``benchmarks/conftest.py``, along with the
+session's shared compiler caches. Each conftest stores the projects it
+selected (from its own options) under :data:`SELECTED_PROJECTS` in
+``pytest_configure``; ``project_manifest`` is parametrized with them.
+:class:`BuildOutputSeeder` gives a runner's project copy its build
+output only once a command needs it.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tests.compiler_cache import compiler_cache_env
+from tests.manifests import ProjectManifest, examples_root, get_project, select_projects
+from tests.nit_runner import NitListener, command_words
+from tests.snapshots import Snapshot, SnapshotStore, default_cache_dir
+
+SELECTED_PROJECTS = pytest.StashKey[list[ProjectManifest]]()
+
+# nit commands that never build the project. Any other command (run,
+# generate, pick, debug, watch, drift, ...) may compile it.
+_NON_BUILDING_COMMANDS = {"init", "scan", "config", "memory", "docs", "report"}
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize ``project_manifest`` with the selected projects."""
+    if "project_manifest" not in metafunc.fixturenames:
+        return
+    projects = metafunc.config.stash.get(SELECTED_PROJECTS, None)
+    if projects is None:
+        projects = select_projects()
+    metafunc.parametrize(
+        "project_manifest",
+        [p.name for p in projects],
+        indirect=True,
+        scope="session",
+    )
+
+
+@pytest.fixture(scope="session")
+def project_manifest(request: pytest.FixtureRequest) -> ProjectManifest:
+    """Parametrized fixture — yields each selected project manifest in turn.
+
+    Parametrization happens in :func:`pytest_generate_tests` so that
+    options such as ``--project`` and ``--changed-since`` can narrow the
+    set.
+    """
+    return get_project(request.param)
+
+
+@pytest.fixture(scope="session")
+def snapshot_store() -> SnapshotStore:
+    """Persistent store of pristine project templates."""
+    return SnapshotStore(default_cache_dir() / "snapshots")
+
+
+@pytest.fixture(scope="session")
+def project_snapshot(
+    project_manifest: ProjectManifest,
+    snapshot_store: SnapshotStore,
+) -> Snapshot:
+    """Pristine template of the current project, built once per source tree."""
+    src = examples_root() / project_manifest.path
+    assert src.is_dir(), f"Project not found: {src}"
+    return snapshot_store.snapshot(src, project_manifest.name)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def compiler_caches(tmp_path_factory: pytest.TempPathFactory) -> Iterator[dict[str, str]]:
+    """Export shared compiler cache settings for the whole session.
+
+    Project copies build into private output directories; these caches
+    (``GOCACHE``, sccache, ccache, Gradle's build cache, ...) keep those
+    builds incremental across copies. See :mod:`tests.compiler_cache`.
+    """
+    env = compiler_cache_env(
+        default_cache_dir() / "build", basedir=tmp_path_factory.getbasetemp(),
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in env.items():
+            mp.setenv(key, value)
+        yield env
+
+
+def init_git_repo(path: Path) -> None:
+    """Initialize a git repo with an initial commit + v0.0.0 tag + second commit."""
+    env = {**os.environ, "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "t@t.com",
+           "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "t@t.com"}
+    run = lambda *args: subprocess.run(  # noqa: E731
+        args, cwd=str(path), capture_output=True, env=env, check=True,
+    )
+    run("git", "init")
+    run("git", "add", "-A")
+    run("git", "commit", "-m", "feat: initial commit")
+    run("git", "tag", "v0.0.0")
+    # Add a second commit so changelog has something to report
+    marker = path / ".nit-changelog-marker"
+    marker.write_text("test\n")
+    run("git", "add", "-A")
+    run("git", "commit", "-m", "fix: add changelog marker for testing")
+
+
+class BuildOutputSeeder(NitListener):
+    """Seeds a clone's build output just before its first building command.
+
+    Clones start without build output (see :mod:`tests.snapshots`), so
+    tests that never build never pay for copying it.
+    """
+
+    def __init__(self, store: SnapshotStore, snapshot: Snapshot, path: Path) -> None:
+        self.store = store
+        self.snapshot = snapshot
+        self.path = path
+        self._lock = threading.Lock()
+        self._seeded = False
+
+    def command_started(self, runner: Any, args: tuple[str, ...]) -> None:
+        words = command_words(args)
+        if not words or words[0] in _NON_BUILDING_COMMANDS:
+            return
+        with self._lock:
+            if not self._seeded:
+                self.store.seed_outputs(self.snapshot, self.path)
+                self._seeded = True
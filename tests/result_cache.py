@@ -0,0 +1,159 @@
+"""Cross-session cache of passing deterministic tests.
+
+A ``heuristics`` test that passed against a project tree is replayed as a
+pass, without running nit, as long as none of its inputs changed. Its
+key covers:
+
+* the test's node id,
+* the content hash of the project source tree,
+* a fingerprint of the nit installation (its package sources when nit is
+  a Python entry point, the binary itself otherwise),
+* a hash of the harness (``tests/`` and ``pyproject.toml``),
+* the platform and Python version.
+
+Entries are small JSON files under ``<cache>/results``. A hit refreshes
+the entry's mtime. :meth:`ResultCache.evict` drops the least recently
+used entries until the store fits its byte budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from tests.fingerprint import hash_tree
+from tests.nit_runner import _find_nit_binary, _nit_entry_point
+
+# Directories under tests/ that don't influence test outcomes.
+_HARNESS_SKIP = {"__pycache__", "cassettes"}
+
+# Prints the directory of nit's top-level package (or its module file),
+# or nothing when the interpreter cannot import it.
+_PACKAGE_DIR = (
+    "import importlib.util, sys; "
+    "spec = importlib.util.find_spec(sys.argv[1].partition('.')[0]); "
+    "print(([*(spec.submodule_search_locations or [])] or [spec.origin])[0] "
+    "if spec and (spec.submodule_search_locations or spec.origin) else '')"
+)
+
+
+class ResultCache:
+    """Recorded passes under *root*, kept within *budget* bytes."""
+
+    def __init__(self, root: Path, *, budget: int) -> None:
+        self.root = root
+        self.budget = budget
+        self.hits = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(nodeid: str, *inputs: str) -> str:
+        """Hash of a test id and the fingerprints of everything it depends on."""
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (nodeid, platform.system(), platform.machine(), sys.version, *inputs):
+            digest.update(part.encode() + b"\0")
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def lookup(self, key: str) -> dict[str, Any] | None:
+        """The recorded pass for *key*, or ``None``; marks it recently used."""
+        path = self.path(key)
+        try:
+            entry = json.loads(path.read_text())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def record(self, key: str, nodeid: str, duration: float) -> None:
+        """Store a pass of *nodeid* that took *duration* seconds."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump({"nodeid": nodeid, "duration": duration, "recorded": time.time()}, fh)
+        os.replace(tmp, path)
+        with self._lock:
+            self.recorded += 1
+
+    def evict(self) -> int:
+        """Delete least recently used entries until within budget; the count."""
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.budget:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def nit_fingerprint(nit_cmd: list[str] | None = None) -> str:
+    """Content hash of the nit installation that would run the tests.
+
+    Hashes nit's package sources when the interpreter behind *nit_cmd* can
+    import them, otherwise the executable itself. Raises
+    ``FileNotFoundError`` when nit cannot be located, including the
+    ``python -m nit.cli`` fallback without an importable nit (hashing the
+    interpreter would fingerprint a nit that does not exist).
+    """
+    nit_cmd = nit_cmd or _find_nit_binary()
+    try:
+        python, target = _nit_entry_point(nit_cmd)
+    except RuntimeError:
+        package = ""
+        as_module = False
+    else:
+        as_module = target[0] == "-m"
+        module = target[1] if as_module else "nit"
+        proc = subprocess.run(
+            [python, "-c", _PACKAGE_DIR, module],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        package = proc.stdout.strip() if proc.returncode == 0 else ""
+    if package:
+        path = Path(package)
+        if path.is_dir():
+            return hash_tree(path, skip_dirs={"__pycache__"})
+        return hashlib.blake2b(path.read_bytes(), digest_size=20).hexdigest()
+    if as_module:
+        msg = f"{python} cannot import {module}; is nit installed?"
+        raise FileNotFoundError(msg)
+
+    binary = Path(shutil.which(nit_cmd[0]) or nit_cmd[0])
+    return hashlib.blake2b(binary.read_bytes(), digest_size=20).hexdigest()
+
+
+def harness_fingerprint(root: Path) -> str:
+    """Hash of the harness under *root*: ``tests/`` plus ``pyproject.toml``."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(hash_tree(root / "tests", skip_dirs=_HARNESS_SKIP).encode())
+    pyproject = root / "pyproject.toml"
+    if pyproject.is_file():
+        digest.update(pyproject.read_bytes())
+    return digest.hexdigest()
@@ -0,0 +1,359 @@
+"""Project snapshots — pristine templates and cheap per-test clones.
+
+Each example project is copied once into a persistent template keyed by
+the hash of its source tree. Every test then gets a private clone of that
+template, so mutations from ``generate``/``pick`` never leak into the next
+test. Clones use reflinks (copy-on-write) when the filesystem supports
+them and fall back to a plain copy otherwise. Installed dependencies are
+symlinked from the original tree. Build output (e.g. the ``build/`` CI
+configured) is not part of the template or of a fresh clone: copying it
+for every test would cost more than most tests spend. Before a clone's
+first build, :meth:`SnapshotStore.seed_outputs` gives it a private copy
+of the source tree's output dirs, with the source path rewritten in
+their text files, so builds start warm but never write to a shared tree.
+
+Templates can also be derived from one another (e.g. a project after
+``nit init`` and ``nit config set``); files that embed the derived
+template's own path are rewritten to point at each clone (text files only).
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Collection
+from dataclasses import dataclass
+from pathlib import Path
+
+from tests.fingerprint import hash_tree
+
+# Installed dependencies: symlinked into clones instead of copied (too
+# large, and contain absolute paths that break when relocated).
+SYMLINK_DIRS = {
+    "node_modules",
+    ".venv",
+    "__pycache__",
+    ".pytest_cache",
+}
+
+# Build output: never shared. A clone that builds is seeded with a private
+# copy (reflinked where possible) of the source tree's output dirs and
+# builds into it, backed by the shared compiler caches of
+# tests.compiler_cache.
+OUTPUT_DIRS = {
+    "target",       # Rust (cargo)
+    "build",        # C++ (cmake), Java (gradle)
+    ".gradle",      # Java (gradle project cache)
+    "bin",          # C# (dotnet)
+    "obj",          # C# (dotnet)
+}
+
+# Neither part of the template nor of a project's content hash.
+HEAVY_DIRS = SYMLINK_DIRS | OUTPUT_DIRS
+
+# ioctl(2) request number for FICLONE on Linux (btrfs, xfs, bcachefs, ...).
+_FICLONE = 0x40049409
+
+_REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL}
+
+# A NUL byte in this many leading bytes marks a file as binary.
+_SNIFF_BYTES = 8192
+
+# Superseded templates unused for this long are removed. Every session
+# marks its templates used, so one still cloning keeps them meanwhile.
+_PRUNE_AFTER = 24 * 3600
+
+
+def default_cache_dir() -> Path:
+    """Persistent cache root for the harness.
+
+    ``NIT_EXAMPLES_CACHE`` overrides; otherwise ``$XDG_CACHE_HOME/nit-examples``
+    (``~/.cache/nit-examples``).
+    """
+    env = os.environ.get("NIT_EXAMPLES_CACHE")
+    if env:
+        return Path(env).expanduser().resolve()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "nit-examples"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """A pristine project template plus the dependency dirs to link into clones."""
+
+    name: str
+    source: Path
+    template: Path
+    tree_hash: str
+    links: tuple[str, ...]
+    # Files (relative) that contain the template's absolute path.
+    relocate: tuple[str, ...] = ()
+    # OUTPUT_DIRS (relative) that seed_outputs copies from the source, and
+    # the text files in them that contain the source's absolute path.
+    outputs: tuple[str, ...] = ()
+    relocate_outputs: tuple[str, ...] = ()
+
+
+class SnapshotStore:
+    """Builds persistent project templates and clones them on demand."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.reflink: bool | None = None  # unknown until the first clone
+
+    def snapshot(self, source: Path, name: str) -> Snapshot:
+        """Return the template for *source*, building it on first use."""
+        tree = hash_tree(source, skip_dirs=HEAVY_DIRS)
+        template = self.root / f"{name}-{tree[:16]}"
+        if not template.is_dir():
+            self._build(source, template)
+            self._prune(name, keep=template)
+        # Mark it used (copytree gave it the source's mtime).
+        os.utime(template)
+        links, outputs = _find_heavy_dirs(source)
+        spellings = _path_spellings(source)
+        return Snapshot(
+            name=name,
+            source=source,
+            template=template,
+            tree_hash=tree,
+            links=tuple(links),
+            outputs=tuple(outputs),
+            relocate_outputs=tuple(
+                f"{relative}/{path}"
+                for relative in outputs
+                for path in _files_containing(source / relative, spellings, skip_dirs={".git"})
+            ),
+        )
+
+    def clone(self, snapshot: Snapshot, dst: Path) -> Path:
+        """Materialize a private, writable copy of *snapshot* at *dst*.
+
+        The copy has no build output until :meth:`seed_outputs` runs.
+        """
+        shutil.copytree(
+            snapshot.template,
+            dst,
+            symlinks=True,
+            dirs_exist_ok=True,
+            copy_function=self._copy_file,
+        )
+        # Symlink dependency dirs from the original so they work without reinstall.
+        for relative in snapshot.links:
+            link = dst / relative
+            if not link.exists() and not link.is_symlink():
+                link.symlink_to(snapshot.source / relative)
+        _relocate(dst, snapshot.relocate, snapshot.template)
+        return dst
+
+    def seed_outputs(self, snapshot: Snapshot, dst: Path) -> None:
+        """Give the clone at *dst* a private copy of the source's build output."""
+        for relative in snapshot.outputs:
+            shutil.copytree(
+                snapshot.source / relative,
+                dst / relative,
+                symlinks=True,
+                dirs_exist_ok=True,
+                copy_function=self._copy_file,
+            )
+        _relocate(dst, snapshot.relocate_outputs, snapshot.source)
+
+    def derive(
+        self,
+        base: Snapshot,
+        dst: Path,
+        prepare: Callable[[Path], object],
+        *,
+        name: str | None = None,
+    ) -> Snapshot:
+        """Clone *base* to *dst*, run *prepare* on it and use it as a template.
+
+        Derived templates live wherever the caller puts them (usually a
+        session temp dir) rather than in the persistent store.
+        """
+        self.clone(base, dst)
+        prepare(dst)
+        # Clones of the derived template are seeded from the same source.
+        return Snapshot(
+            name=name or base.name,
+            source=base.source,
+            template=dst,
+            tree_hash=base.tree_hash,
+            links=base.links,
+            relocate=tuple(
+                _files_containing(dst, _path_spellings(dst), skip_dirs=SYMLINK_DIRS | {".git"}),
+            ),
+            outputs=base.outputs,
+            relocate_outputs=base.relocate_outputs,
+        )
+
+    def _build(self, source: Path, template: Path) -> None:
+        """Copy *source* into *template* atomically.
+
+        Concurrent sessions (e.g. parallel shards) may race to build the
+        same template; the loser simply discards its copy.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{template.name}-", dir=self.root))
+
+        def _ignore(directory: str, entries: list[str]) -> set[str]:
+            return {e for e in entries if e in HEAVY_DIRS}
+
+        shutil.copytree(source, staging, dirs_exist_ok=True, ignore=_ignore)
+        try:
+            staging.rename(template)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not template.is_dir():
+                raise
+
+    def _prune(self, name: str, *, keep: Path) -> None:
+        """Remove templates of *name* for other source trees, once unused.
+
+        A template's mtime records when a session last used it, so a
+        concurrent session (e.g. another shard on an older checkout) keeps
+        the template it is cloning from.
+        """
+        cutoff = time.time() - _PRUNE_AFTER
+        for old in self.root.glob(f"{name}-{'?' * 16}"):
+            try:
+                stale = old != keep and old.is_dir() and old.stat().st_mtime < cutoff
+            except FileNotFoundError:
+                continue
+            if stale:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _copy_file(self, src: str, dst: str) -> str:
+        if self.reflink is not False:
+            try:
+                _reflink(src, dst)
+            except OSError as exc:
+                if exc.errno not in _REFLINK_UNSUPPORTED:
+                    raise
+                self.reflink = False
+            else:
+                self.reflink = True
+                shutil.copystat(src, dst)
+                return dst
+        return shutil.copy2(src, dst)
+
+
+def clone_file(src: str, dst: str) -> str:
+    """Copy *src* to *dst* (with metadata), sharing extents where supported.
+
+    Usable as ``shutil.copytree``'s ``copy_function``.
+    """
+    try:
+        _reflink(src, dst)
+    except OSError:
+        return shutil.copy2(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+
+def _reflink(src: str, dst: str) -> None:
+    """Clone *src* to *dst* sharing extents (raises OSError if unsupported)."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover — non-POSIX
+        raise OSError(errno.EOPNOTSUPP, "reflink unsupported") from None
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+
+def _path_spellings(path: Path) -> tuple[bytes, ...]:
+    """*path* as bytes, plus its resolved form if that differs (longest first)."""
+    spellings = {os.fsencode(path), os.fsencode(os.path.realpath(path))}
+    return tuple(sorted(spellings, key=len, reverse=True))
+
+
+def _relocate(root: Path, files: tuple[str, ...], old: Path) -> None:
+    """Rewrite *old*'s path to *root* in each of *files* (relative to *root*).
+
+    Modification times are kept, so build tools do not treat relocated
+    build files (Makefiles, flags) as changed.
+    """
+    for relative in files:
+        path = root / relative
+        st = path.stat()
+        data = path.read_bytes()
+        for spelling in _path_spellings(old):
+            data = data.replace(spelling, os.fsencode(root))
+        path.write_bytes(data)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _files_containing(
+    root: Path,
+    needles: tuple[bytes, ...],
+    *,
+    skip_dirs: Collection[str] = HEAVY_DIRS | {".git"},
+) -> list[str]:
+    """Relative paths of regular text files under *root* containing any needle.
+
+    Binary files (e.g. nit's SQLite stores under ``.nit/``, object files)
+    are skipped: rewriting a path inside them changes its length and
+    corrupts them.
+    """
+    found: list[str] = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in skip_dirs]
+        for filename in files:
+            path = Path(dirpath) / filename
+            if path.is_symlink() or not path.is_file():
+                continue
+            with open(path, "rb") as fh:
+                head = fh.read(_SNIFF_BYTES)
+                if b"\0" in head:
+                    continue  # binary; no need to read the rest
+                data = head + fh.read()
+            if any(needle in data for needle in needles) and _is_text(data):
+                found.append(path.relative_to(root).as_posix())
+    return sorted(found)
+
+
+def _is_text(data: bytes) -> bool:
+    """Whether *data* looks like a text file: UTF-8 without NUL bytes."""
+    if b"\0" in data:
+        return False
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def find_linked_dirs(source: Path) -> list[str]:
+    """Relative paths of every ``SYMLINK_DIRS`` directory under *source*.
+
+    These are what a clone of *source* symlinks instead of copying.
+    """
+    return _find_heavy_dirs(source)[0]
+
+
+def _find_heavy_dirs(source: Path) -> tuple[list[str], list[str]]:
+    """Relative paths of the ``SYMLINK_DIRS`` and ``OUTPUT_DIRS`` under *source*.
+
+    Walks the entire tree to catch nested occurrences too (e.g. pnpm
+    workspace per-package node_modules/).
+    """
+    links: list[str] = []
+    outputs: list[str] = []
+    for root, dirs, _files in os.walk(source):
+        for dirname in list(dirs):
+            if dirname in HEAVY_DIRS:
+                relative = (Path(root) / dirname).relative_to(source).as_posix()
+                (links if dirname in SYMLINK_DIRS else outputs).append(relative)
+                # Don't descend into heavy dirs
+                dirs.remove(dirname)
+    return sorted(links), sorted(outputs)
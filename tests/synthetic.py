@@ -0,0 +1,850 @@
+"""Synthetic large-project variants for nit scaling benchmarks.
+
+:func:`scale_project` copies an example project and adds a generated
+code base in the project's primary language: *packages* top-level
+packages holding *sources* modules in nested directories, each module
+importing up to two modules of earlier packages, and *tests* test files
+for a seeded sample of them. The same spec and seed always produce the
+same tree. The returned manifest covers the generated files (untested
+sources, test files, test count), so the usual assertion helpers apply
+to the variant unchanged.
+
+``python -m tests.synthetic`` generates variants of growing size and
+records the wall time, CPU time and peak RSS of ``nit scan``, ``nit run``
+and ``nit report`` on each, validating their output along the way::
+
+    python -m tests.synthetic --project python-api --sizes 100,1000,10000
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import csv
+import json
+import math
+import posixpath
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tomllib
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, fields, replace
+from functools import cache
+from pathlib import Path, PurePosixPath
+
+from tests.assertions import (
+    assert_run_structure_complete,
+    assert_run_tests_pass,
+    assert_scan_detects_language,
+    assert_scan_structure_complete,
+)
+from tests.inventory import Inventory
+from tests.manifests import ProjectManifest, examples_root, get_project
+from tests.nit_runner import NitResult, NitRunner
+from tests.snapshots import HEAVY_DIRS, find_linked_dirs
+
+# Generated functions reduce modulo this, so values fit a 32-bit int in
+# every language.
+_MODULUS = 1_000_003
+# Directory names available at each nesting level below a package.
+_DIR_FANOUT = 3
+
+
+@dataclass(frozen=True)
+class ScaleSpec:
+    """Size and shape of a synthetic code base."""
+
+    sources: int
+    tests: int
+    packages: int = 10
+    depth: int = 3  # directory levels below the synthetic root, package included
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.packages <= self.sources:
+            msg = f"need 1 <= packages <= sources, got {self.packages} and {self.sources}"
+            raise ValueError(msg)
+        if not 0 <= self.tests <= self.sources:
+            msg = f"need 0 <= tests <= sources, got {self.tests} and {self.sources}"
+            raise ValueError(msg)
+        if self.depth < 1:
+            msg = f"depth must be at least 1, got {self.depth}"
+            raise ValueError(msg)
+
+    @property
+    def label(self) -> str:
+        return f"{self.sources}s{self.tests}t{self.packages}p-{self.seed}"
+
+
+@dataclass(frozen=True)
+class _Module:
+    index: int
+    dirs: tuple[str, ...]  # package dir first, then nested dirs
+    deps: tuple[int, ...]  # the first is called, the others only referenced
+    offset: int
+
+    @property
+    def name(self) -> str:
+        return f"m{self.index:05d}"
+
+    @property
+    def func(self) -> str:
+        return f"f{self.index:05d}"
+
+
+def _plan(spec: ScaleSpec) -> tuple[list[_Module], set[int]]:
+    """The modules of *spec* and the indexes of those that get a test."""
+    rng = random.Random(spec.seed)
+    modules: list[_Module] = []
+    package_start = 0
+    for index in range(spec.sources):
+        package = index * spec.packages // spec.sources
+        if index and package != (index - 1) * spec.packages // spec.sources:
+            package_start = index
+        nested = rng.randrange(spec.depth)
+        dirs = (f"p{package:03d}", *(f"d{rng.randrange(_DIR_FANOUT)}" for _ in range(nested)))
+        # Only modules of earlier packages: no import cycles, and call
+        # chains are at most one module per package long.
+        count = min(rng.randint(0, 2), package_start)
+        deps = tuple(rng.sample(range(package_start), count))
+        modules.append(_Module(index, dirs, deps, rng.randrange(1, 100)))
+    return modules, set(rng.sample(range(spec.sources), spec.tests))
+
+
+def _expectations(modules: list[_Module]) -> Callable[[int, int], int]:
+    """``(index, x) -> f_index(x)`` as the generated code computes it."""
+
+    @cache
+    def value(index: int, x: int) -> int:
+        module = modules[index]
+        called = value(module.deps[0], x) if module.deps else 0
+        return (x + module.offset + called) % _MODULUS
+
+    return value
+
+
+def _test_input(module: _Module) -> int:
+    return 3 + module.index % 5
+
+
+# ---------------------------------------------------------------------------
+# Languages
+# ---------------------------------------------------------------------------
+
+
+class _Language(abc.ABC):
+    """Where a language's generated files go and what they contain.
+
+    *base* is the project-relative directory the language's sources live
+    under (a workspace package for monorepos, otherwise the project root).
+    """
+
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        self.root = root
+        self.manifest = manifest
+        self.base = base
+
+    def path(self, *parts: str) -> str:
+        return posixpath.join(self.base, *parts) if self.base else posixpath.join(*parts)
+
+    @abc.abstractmethod
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        """Contents of *module*'s source file(s), by project-relative path."""
+
+    @abc.abstractmethod
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        """Path and contents of the test for *module*, asserting *expected*."""
+
+    def support_files(self, modules: list[_Module], tested: set[int]) -> dict[str, str]:
+        """Package markers, build file changes and the like (full contents)."""
+        return {}
+
+    def untested(self, sources: Iterable[str]) -> list[str]:
+        """The generated source files a manifest lists as untested."""
+        return list(sources)
+
+
+class _Python(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        package = _parts_after(manifest.untested_source_files, "src")[0]
+        self.src = self.path("src", package, "synth")
+        self.tests = self.path("tests", "synth")
+        # Projects whose tests/ is a package import their code as src.<pkg>.
+        package_tests = (root / self.path("tests", "__init__.py")).is_file()
+        self.prefix = f"src.{package}.synth" if package_tests else f"{package}.synth"
+
+    def _module(self, module: _Module) -> str:
+        return ".".join((self.prefix, *module.dirs, module.name))
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        lines = [f'"""Synthetic module {module.name}."""', ""]
+        lines += [f"from {self._module(d)} import {d.func}" for d in deps]
+        if deps:
+            lines.append("")
+        if len(deps) > 1:
+            lines += ["RELATED = (" + "".join(f"{d.func}, " for d in deps[1:]).rstrip() + ")", ""]
+        called = f" + {deps[0].func}(x)" if deps else ""
+        lines += [
+            "",
+            f"def {module.func}(x: int) -> int:",
+            f"    return (x + {module.offset}{called}) % {_MODULUS}",
+        ]
+        path = posixpath.join(self.src, *module.dirs, f"{module.name}.py")
+        return {path: "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        path = posixpath.join(self.tests, *module.dirs, f"test_{module.name}.py")
+        return path, (
+            f"from {self._module(module)} import {module.func}\n"
+            "\n\n"
+            f"def test_{module.func}():\n"
+            f"    assert {module.func}({_test_input(module)}) == {expected}\n"
+        )
+
+    def support_files(self, modules: list[_Module], tested: set[int]) -> dict[str, str]:
+        packages = _directories(self.src, (m.dirs for m in modules))
+        if (self.root / self.path("tests", "__init__.py")).is_file():
+            packages |= _directories(self.tests, (modules[i].dirs for i in tested))
+        return {posixpath.join(d, "__init__.py"): "" for d in packages}
+
+
+class _TypeScript(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        self.src = self.path("src", "synth")
+        self.tests = self.path("tests", "synth")
+
+    def _stem(self, module: _Module) -> str:
+        return posixpath.join(self.src, *module.dirs, module.name)
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        here = posixpath.join(self.src, *module.dirs)
+        lines = [
+            f"import {{ {d.func} }} from '{_relative(self._stem(d), here)}';" for d in deps
+        ]
+        if deps:
+            lines.append("")
+        if len(deps) > 1:
+            lines += [f"export const related = [{', '.join(d.func for d in deps[1:])}];", ""]
+        called = f" + {deps[0].func}(x)" if deps else ""
+        lines += [
+            f"export function {module.func}(x: number): number {{",
+            f"  return (x + {module.offset}{called}) % {_MODULUS};",
+            "}",
+        ]
+        return {f"{self._stem(module)}.ts": "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        path = posixpath.join(self.tests, *module.dirs, f"{module.name}.test.ts")
+        source = _relative(self._stem(module), posixpath.dirname(path))
+        return path, (
+            "import { describe, it, expect } from 'vitest';\n"
+            f"import {{ {module.func} }} from '{source}';\n"
+            "\n"
+            f"describe('{module.func}', () => {{\n"
+            "  it('matches the generated expectation', () => {\n"
+            f"    expect({module.func}({_test_input(module)})).toBe({expected});\n"
+            "  });\n"
+            "});\n"
+        )
+
+
+class _Go(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        go_mod = (root / self.path("go.mod")).read_text()
+        module_path = next(
+            line.split()[1] for line in go_mod.splitlines() if line.startswith("module ")
+        )
+        self.import_root = f"{module_path}/synth"
+        self.src = self.path("synth")
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        imports = sorted({d.dirs for d in deps})
+        lines = [f"package {module.dirs[-1]}", ""]
+        if imports:
+            lines.append("import (")
+            lines += [
+                f'\t{"".join(dirs)} "{posixpath.join(self.import_root, *dirs)}"' for dirs in imports
+            ]
+            lines += [")", ""]
+        exported = [f"{''.join(d.dirs)}.{d.func.upper()}" for d in deps]
+        if len(deps) > 1:
+            lines += [
+                f"// Related{module.func.upper()} lists the other functions it builds on.",
+                f"var Related{module.func.upper()} = []func(int) int{{{', '.join(exported[1:])}}}",
+                "",
+            ]
+        called = f" + {exported[0]}(x)" if deps else ""
+        lines += [
+            f"func {module.func.upper()}(x int) int {{",
+            f"\treturn (x + {module.offset}{called}) % {_MODULUS}",
+            "}",
+        ]
+        path = posixpath.join(self.src, *module.dirs, f"{module.name}.go")
+        return {path: "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        path = posixpath.join(self.src, *module.dirs, f"{module.name}_test.go")
+        func, arg = module.func.upper(), _test_input(module)
+        return path, (
+            f"package {module.dirs[-1]}\n"
+            "\n"
+            'import "testing"\n'
+            "\n"
+            f"func Test{func}(t *testing.T) {{\n"
+            f"\tif got := {func}({arg}); got != {expected} {{\n"
+            f'\t\tt.Errorf("{func}({arg}) = %d, want {expected}", got)\n'
+            "\t}\n"
+            "}\n"
+        )
+
+
+class _Java(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        package = _parts_after(manifest.untested_source_files, "java")[:-1]
+        self.package = ".".join((*package, "synth"))
+        self.main = self.path("src", "main", "java", *package, "synth")
+        self.test = self.path("src", "test", "java", *package, "synth")
+
+    def _class(self, module: _Module) -> str:
+        return module.name.upper()
+
+    def _package(self, module: _Module) -> str:
+        return ".".join((self.package, *module.dirs))
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        lines = [f"package {self._package(module)};", ""]
+        imports = [f"import {self._package(d)}.{self._class(d)};" for d in deps]
+        if len(deps) > 1:
+            imports += ["import java.util.List;", "import java.util.function.IntUnaryOperator;"]
+        if imports:
+            lines += [*imports, ""]
+        lines += [f"public final class {self._class(module)} {{", ""]
+        if len(deps) > 1:
+            related = ", ".join(f"{self._class(d)}::{d.func}" for d in deps[1:])
+            lines += [
+                f"    public static final List<IntUnaryOperator> RELATED = List.of({related});",
+                "",
+            ]
+        called = f" + {self._class(deps[0])}.{deps[0].func}(x)" if deps else ""
+        lines += [
+            f"    private {self._class(module)}() {{",
+            "    }",
+            "",
+            f"    public static int {module.func}(int x) {{",
+            f"        return (x + {module.offset}{called}) % {_MODULUS};",
+            "    }",
+            "}",
+        ]
+        path = posixpath.join(self.main, *module.dirs, f"{self._class(module)}.java")
+        return {path: "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        name = self._class(module)
+        path = posixpath.join(self.test, *module.dirs, f"{name}Test.java")
+        return path, (
+            f"package {self._package(module)};\n"
+            "\n"
+            "import org.junit.jupiter.api.Test;\n"
+            "import static org.junit.jupiter.api.Assertions.assertEquals;\n"
+            "\n"
+            f"class {name}Test {{\n"
+            "\n"
+            "    @Test\n"
+            f"    void {module.func}() {{\n"
+            f"        assertEquals({expected}, {name}.{module.func}({_test_input(module)}));\n"
+            "    }\n"
+            "}\n"
+        )
+
+
+class _Rust(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        cargo = tomllib.loads((root / self.path("Cargo.toml")).read_text())
+        self.crate = cargo.get("lib", {}).get("name") or cargo["package"]["name"].replace("-", "_")
+        self.src = self.path("src", "synth")
+        self.tests = self.path("tests")
+
+    def _module(self, module: _Module, root: str) -> str:
+        return "::".join((root, "synth", *module.dirs, module.name))
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        lines = [f"use {self._module(d, 'crate')}::{d.func};" for d in deps]
+        if deps:
+            lines.append("")
+        if len(deps) > 1:
+            lines += [
+                "/// Other synthetic functions this one builds on.",
+                "pub const RELATED: &[fn(i64) -> i64] = "
+                f"&[{', '.join(d.func for d in deps[1:])}];",
+                "",
+            ]
+        called = f" + {deps[0].func}(x)" if deps else ""
+        lines += [
+            f"pub fn {module.func}(x: i64) -> i64 {{",
+            f"    (x + {module.offset}{called}) % {_MODULUS}",
+            "}",
+        ]
+        path = posixpath.join(self.src, *module.dirs, f"{module.name}.rs")
+        return {path: "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        path = posixpath.join(self.tests, f"synth_{module.name}.rs")
+        return path, (
+            f"use {self._module(module, self.crate)}::{module.func};\n"
+            "\n"
+            "#[test]\n"
+            f"fn {module.func}_matches_expectation() {{\n"
+            f"    assert_eq!({module.func}({_test_input(module)}), {expected});\n"
+            "}\n"
+        )
+
+    def support_files(self, modules: list[_Module], tested: set[int]) -> dict[str, str]:
+        children: dict[str, set[str]] = {self.src: set()}
+        for module in modules:
+            directory = self.src
+            for part in (*module.dirs, module.name):
+                children.setdefault(directory, set()).add(part)
+                directory = posixpath.join(directory, part)
+        files = {
+            posixpath.join(directory, "mod.rs"): "".join(f"pub mod {c};\n" for c in sorted(names))
+            for directory, names in children.items()
+        }
+        lib = self.path("src", "lib.rs")
+        text = (self.root / lib).read_text()
+        if "pub mod synth;" not in text:
+            files[lib] = text.rstrip("\n") + "\n\npub mod synth;\n"
+        return files
+
+
+class _CSharp(_Language):
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        project = next((root / base).glob("*.csproj"))
+        self.namespace = f"{project.stem}.Synth"
+        self.tests_namespace = f"{project.stem}.Tests.Synth"
+        self.src = self.path("src", "Synth")
+        self.tests = self.path("tests", "Synth")
+
+    def _namespace(self, module: _Module) -> str:
+        return ".".join((self.namespace, *(d.capitalize() for d in module.dirs)))
+
+    def _dirs(self, module: _Module) -> list[str]:
+        return [d.capitalize() for d in module.dirs]
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        usings = sorted({self._namespace(d) for d in deps})
+        lines = [f"using {u};" for u in usings]
+        if usings:
+            lines.append("")
+        lines += [f"namespace {self._namespace(module)};", ""]
+        lines += [f"public static class {module.name.upper()}", "{"]
+        if len(deps) > 1:
+            related = ", ".join(f"{d.name.upper()}.{d.func.upper()}" for d in deps[1:])
+            lines += [f"    public static readonly Func<int, int>[] Related = {{ {related} }};", ""]
+        called = f" + {deps[0].name.upper()}.{deps[0].func.upper()}(x)" if deps else ""
+        lines += [
+            f"    public static int {module.func.upper()}(int x) =>",
+            f"        (x + {module.offset}{called}) % {_MODULUS};",
+            "}",
+        ]
+        path = posixpath.join(self.src, *self._dirs(module), f"{module.name.upper()}.cs")
+        return {path: "\n".join(lines) + "\n"}
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        name, func = module.name.upper(), module.func.upper()
+        path = posixpath.join(self.tests, *self._dirs(module), f"{name}Tests.cs")
+        return path, (
+            f"using {self._namespace(module)};\n"
+            "using Xunit;\n"
+            "\n"
+            f"namespace {self.tests_namespace};\n"
+            "\n"
+            f"public class {name}Tests\n"
+            "{\n"
+            "    [Fact]\n"
+            f"    public void {func}_GeneratedInput_ReturnsExpected()\n"
+            "    {\n"
+            f"        Assert.Equal({expected}, {name}.{func}({_test_input(module)}));\n"
+            "    }\n"
+            "}\n"
+        )
+
+
+class _Cpp(_Language):
+    _CMAKE_MARKER = "# Synthetic sources (tests/synthetic.py)"
+
+    def __init__(self, root: Path, manifest: ProjectManifest, base: str) -> None:
+        super().__init__(root, manifest, base)
+        self.src = self.path("src")
+        self.tests = self.path("tests", "synth")
+
+    def _header(self, module: _Module) -> str:
+        return posixpath.join("synth", *module.dirs, f"{module.name}.h")
+
+    def source_files(self, module: _Module, modules: list[_Module]) -> dict[str, str]:
+        deps = [modules[d] for d in module.deps]
+        header = self._header(module)
+        lines = [f'#include "{header}"', ""]
+        if deps:
+            lines += [*(f'#include "{self._header(d)}"' for d in deps), ""]
+        lines += ["namespace synth {", ""]
+        if len(deps) > 1:
+            lines += [
+                "// Other synthetic functions this one builds on.",
+                "[[maybe_unused]] static int (*const related[])(int) = "
+                f"{{{', '.join(d.func for d in deps[1:])}}};",
+                "",
+            ]
+        called = f" + {deps[0].func}(x)" if deps else ""
+        lines += [
+            f"int {module.func}(int x) {{",
+            f"    return (x + {module.offset}{called}) % {_MODULUS};",
+            "}",
+            "",
+            "}  // namespace synth",
+        ]
+        stem = posixpath.join(self.src, *header.removesuffix(".h").split("/"))
+        return {
+            f"{stem}.h": (
+                "#pragma once\n\nnamespace synth {\n\n"
+                f"int {module.func}(int x);\n\n}}  // namespace synth\n"
+            ),
+            f"{stem}.cpp": "\n".join(lines) + "\n",
+        }
+
+    def test_file(self, module: _Module, expected: int) -> tuple[str, str]:
+        path = posixpath.join(self.tests, *module.dirs, f"test_{module.name}.cpp")
+        return path, (
+            "#include <gtest/gtest.h>\n"
+            f'#include "{self._header(module)}"\n'
+            "\n"
+            f"TEST({module.name.upper()}Test, GeneratedInput) {{\n"
+            f"    EXPECT_EQ(synth::{module.func}({_test_input(module)}), {expected});\n"
+            "}\n"
+        )
+
+    def support_files(self, modules: list[_Module], tested: set[int]) -> dict[str, str]:
+        cmake = self.path("CMakeLists.txt")
+        text = (self.root / cmake).read_text()
+        if self._CMAKE_MARKER in text:
+            return {}
+        block = [
+            "",
+            self._CMAKE_MARKER,
+            "file(GLOB_RECURSE SYNTH_SOURCES CONFIGURE_DEPENDS src/synth/*.cpp)",
+            "add_library(synth ${SYNTH_SOURCES})",
+            "target_include_directories(synth PUBLIC src)",
+        ]
+        if tested:
+            block += [
+                "",
+                "file(GLOB_RECURSE SYNTH_TESTS CONFIGURE_DEPENDS tests/synth/*.cpp)",
+                "add_executable(test_synth ${SYNTH_TESTS})",
+                "target_link_libraries(test_synth PRIVATE synth GTest::GTest GTest::Main)",
+                "gtest_discover_tests(test_synth)",
+            ]
+        return {cmake: text.rstrip("\n") + "\n" + "\n".join(block) + "\n"}
+
+    def untested(self, sources: Iterable[str]) -> list[str]:
+        return [s for s in sources if s.endswith(".cpp")]
+
+
+_LANGUAGES: dict[str, type[_Language]] = {
+    "python": _Python,
+    "typescript": _TypeScript,
+    "go": _Go,
+    "java": _Java,
+    "rust": _Rust,
+    "csharp": _CSharp,
+    "cpp": _Cpp,
+}
+
+
+# ---------------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------------
+
+
+def scale_project(
+    manifest: ProjectManifest,
+    dest: Path,
+    spec: ScaleSpec,
+    *,
+    source: Path | None = None,
+) -> ProjectManifest:
+    """Write a scaled variant of *manifest*'s project to *dest*.
+
+    *dest* must not exist. Dependency dirs are symlinked from *source*
+    (default: the project in this repository) like in snapshot clones;
+    build output is left out. Returns the variant's manifest, whose
+    ``path`` is *dest*.
+    """
+    language_cls = _LANGUAGES.get(manifest.primary_language)
+    if language_cls is None:
+        msg = f"No synthetic code generator for {manifest.primary_language!r}"
+        raise ValueError(msg)
+    source = source or examples_root() / manifest.path
+
+    shutil.copytree(
+        source,
+        dest,
+        ignore=lambda directory, entries: {e for e in entries if e in HEAVY_DIRS},
+    )
+    for relative in find_linked_dirs(source):
+        (dest / relative).symlink_to(source / relative)
+
+    language = language_cls(dest, manifest, _project_base(manifest))
+    modules, tested = _plan(spec)
+    expected = _expectations(modules)
+    sources: list[str] = []
+    tests: list[str] = []
+    files: dict[str, str] = {}
+    for module in modules:
+        generated = language.source_files(module, modules)
+        files.update(generated)
+        if module.index in tested:
+            path, text = language.test_file(module, expected(module.index, _test_input(module)))
+            files[path] = text
+            tests.append(path)
+        else:
+            sources.extend(generated)
+    files.update(language.support_files(modules, tested))
+    for relative, text in files.items():
+        path = dest / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    return replace(
+        manifest,
+        name=f"{manifest.name}-{spec.label}",
+        path=str(dest),
+        untested_source_files=[*manifest.untested_source_files, *language.untested(sources)],
+        existing_test_files=[*manifest.existing_test_files, *tests],
+        expected_test_count_min=manifest.expected_test_count_min + len(tests),
+    )
+
+
+def _project_base(manifest: ProjectManifest) -> str:
+    """Directory the primary language's code lives under: the part of the
+    first untested source's path before ``src/`` (``""`` without one)."""
+    parts = PurePosixPath(manifest.untested_source_files[0]).parts
+    return "/".join(parts[: parts.index("src")]) if "src" in parts else ""
+
+
+def _parts_after(paths: list[str], marker: str) -> tuple[str, ...]:
+    """Path components after the first *marker* component of the first of *paths*."""
+    parts = PurePosixPath(paths[0]).parts
+    return parts[parts.index(marker) + 1 :]
+
+
+def _directories(root: str, dirs: Iterable[tuple[str, ...]]) -> set[str]:
+    """*root* and every directory along the *dirs* below it."""
+    found = {root}
+    for parts in dirs:
+        for depth in range(1, len(parts) + 1):
+            found.add(posixpath.join(root, *parts[:depth]))
+    return found
+
+
+def _relative(target: str, start: str) -> str:
+    relative = posixpath.relpath(target, start)
+    return relative if relative.startswith(".") else f"./{relative}"
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+COMMANDS = ("scan", "run", "report")
+
+
+@dataclass(frozen=True)
+class ScalingPoint:
+    """One nit command on one synthetic variant."""
+
+    project: str
+    sources: int
+    tests: int
+    packages: int
+    files: int
+    command: str
+    exit_code: int
+    wall_seconds: float
+    cpu_seconds: float | None
+    max_rss_kb: int | None
+    error: str = ""  # validation failure, empty when the output checked out
+
+
+def _validate(command: str, result: NitResult, manifest: ProjectManifest) -> None:
+    if command == "scan":
+        assert result.success, f"scan failed:\n{result.stderr}"
+        data = result.json()
+        assert_scan_structure_complete(data)
+        assert_scan_detects_language(data, manifest)
+    elif command == "run":
+        assert_run_tests_pass(result, manifest)
+        assert_run_structure_complete(result.json())
+    else:
+        assert result.exit_code in (0, 1), (
+            f"report --html crashed (exit={result.exit_code}):\n{result.stderr}"
+        )
+
+
+def benchmark(
+    manifest: ProjectManifest,
+    spec: ScaleSpec,
+    workdir: Path,
+    *,
+    commands: Iterable[str] = COMMANDS,
+    timeout: int = 1800,
+) -> list[ScalingPoint]:
+    """Generate *spec*'s variant of *manifest* under *workdir* and time nit on it."""
+    variant = scale_project(manifest, workdir / f"{manifest.name}-{spec.label}", spec)
+    project_dir = Path(variant.path)
+    files = len(Inventory.scan(project_dir, variant).files)
+    nit = NitRunner(project_dir, timeout=timeout)
+    nit.init()
+
+    invoke = {
+        "scan": lambda: nit.scan(json_output=True, force=True),
+        "run": nit.run_tests,
+        "report": nit.report_html,
+    }
+    points = []
+    for command in commands:
+        started = time.perf_counter()
+        result = invoke[command]()
+        usage = result.usage
+        try:
+            _validate(command, result, variant)
+            error = ""
+        except (AssertionError, KeyError, ValueError) as exc:
+            error = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+        cpu = None
+        if usage is not None and usage.user_seconds is not None:
+            cpu = usage.user_seconds + (usage.system_seconds or 0.0)
+        points.append(
+            ScalingPoint(
+                project=manifest.name,
+                sources=spec.sources,
+                tests=spec.tests,
+                packages=spec.packages,
+                files=files,
+                command=command,
+                exit_code=result.exit_code,
+                wall_seconds=usage.wall_seconds if usage else time.perf_counter() - started,
+                cpu_seconds=cpu,
+                max_rss_kb=usage.max_rss_kb if usage else None,
+                error=error,
+            ),
+        )
+    return points
+
+
+def write_points(points: list[ScalingPoint], directory: Path, stem: str) -> tuple[Path, Path]:
+    """Write ``<stem>.json`` and ``<stem>.csv`` into *directory*."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rows = [asdict(p) for p in points]
+    json_path = directory / f"{stem}.json"
+    json_path.write_text(json.dumps({"points": rows}, indent=2) + "\n")
+    csv_path = directory / f"{stem}.csv"
+    with csv_path.open("w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=[f.name for f in fields(ScalingPoint)])
+        writer.writeheader()
+        writer.writerows(rows)
+    return json_path, csv_path
+
+
+def print_points(points: list[ScalingPoint]) -> None:
+    print(f"{'files':>7} {'sources':>7} {'tests':>6}  {'command':<7} {'exit':>4} "
+          f"{'wall s':>8} {'cpu s':>8} {'rss MiB':>8}  error")
+    for p in points:
+        cpu = f"{p.cpu_seconds:8.2f}" if p.cpu_seconds is not None else f"{'-':>8}"
+        rss = f"{p.max_rss_kb / 1024:8.1f}" if p.max_rss_kb is not None else f"{'-':>8}"
+        print(f"{p.files:7d} {p.sources:7d} {p.tests:6d}  {p.command:<7} {p.exit_code:4d} "
+              f"{p.wall_seconds:8.2f} {cpu} {rss}  {p.error}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.synthetic",
+        description="Time nit scan/run/report on synthetic variants of growing size.",
+    )
+    parser.add_argument("--project", required=True, metavar="NAME",
+                        help="Example project to scale.")
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000",
+        help="Comma-separated source module counts, one variant each (default: %(default)s).",
+    )
+    parser.add_argument("--test-ratio", type=float, default=0.2,
+                        help="Test files per source module (default: %(default)s).")
+    parser.add_argument("--packages", type=int, default=0,
+                        help="Top-level packages per variant (default: sqrt of the size).")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="Directory levels per package (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--command",
+        action="append",
+        choices=COMMANDS,
+        dest="commands",
+        help="Only time this nit command (repeatable; default: all).",
+    )
+    parser.add_argument("--timeout", type=int, default=1800,
+                        help="Per-command timeout in seconds (default: %(default)s).")
+    parser.add_argument("--keep", type=Path, metavar="DIR",
+                        help="Generate the variants in DIR and keep them.")
+    parser.add_argument("--output-dir", type=Path, default=Path(".nit-usage"),
+                        help="Where to write the JSON/CSV results (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = get_project(args.project)
+        sizes = [int(size) for size in args.sizes.split(",")]
+        specs = [
+            ScaleSpec(
+                sources=size,
+                tests=round(size * args.test_ratio),
+                packages=args.packages or max(1, math.isqrt(size)),
+                depth=args.depth,
+                seed=args.seed,
+            )
+            for size in sizes
+        ]
+    except (KeyError, ValueError) as exc:
+        parser.error(exc.args[0])
+
+    points: list[ScalingPoint] = []
+    with tempfile.TemporaryDirectory(prefix="nit-synthetic-") as tmp:
+        workdir = args.keep or Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for spec in specs:
+            points += benchmark(
+                manifest, spec, workdir,
+                commands=args.commands or COMMANDS, timeout=args.timeout,
+            )
+
+    print_points(points)
+    stem = f"scaling-{manifest.name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    json_path, csv_path = write_points(points, args.output_dir, stem)
+    print(f"\nScaling results: {json_path}, {csv_path}")
+    return 0 if all(not p.error for p in points) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Per-command resource accounting for nit invocations.
+
+A :class:`UsageLog` collects one :class:`UsageRecord` per nit command run
+during the session and writes them out as JSON and CSV, so the cost of
+each command on each stack can be compared across runs.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from tests.nit_runner import NitListener, NitResult, command_words
+
+
+@dataclass(frozen=True)
+class UsageRecord:
+    """One nit command: where it ran and what it cost."""
+
+    project: str
+    test: str
+    command: str
+    args: str
+    exit_code: int | None
+    cached: bool
+    timed_out: bool
+    wall_seconds: float | None
+    user_seconds: float | None
+    system_seconds: float | None
+    max_rss_kb: int | None
+    stdout_bytes: int | None
+    stderr_bytes: int | None
+
+
+@dataclass(frozen=True)
+class UsageSummary:
+    """Aggregated cost of one command on one project."""
+
+    project: str
+    command: str
+    calls: int
+    cached: int
+    wall_seconds: float
+    cpu_seconds: float
+    max_rss_kb: int
+
+
+def _command_name(args: tuple[str, ...]) -> str:
+    return " ".join(command_words(args) or args[:1])
+
+
+class _UsageListener(NitListener):
+    def __init__(self, log: UsageLog, project: str, test: str) -> None:
+        self.log = log
+        self.project = project
+        self.test = test
+
+    def _args(self, runner: Any, args: tuple[str, ...]) -> str:
+        here = str(runner.project_dir)
+        return " ".join(a.replace(here, ".") for a in args)
+
+    def command_finished(
+        self, runner: Any, args: tuple[str, ...], result: NitResult,
+    ) -> None:
+        usage = result.usage
+        self.log.add(
+            UsageRecord(
+                project=self.project,
+                test=self.test,
+                command=_command_name(args),
+                args=self._args(runner, args),
+                exit_code=result.exit_code,
+                cached=usage is None,
+                timed_out=False,
+                wall_seconds=usage.wall_seconds if usage else None,
+                user_seconds=usage.user_seconds if usage else None,
+                system_seconds=usage.system_seconds if usage else None,
+                max_rss_kb=usage.max_rss_kb if usage else None,
+                stdout_bytes=usage.stdout_bytes if usage else None,
+                stderr_bytes=usage.stderr_bytes if usage else None,
+            ),
+        )
+
+    def command_failed(
+        self, runner: Any, args: tuple[str, ...], error: BaseException,
+    ) -> None:
+        timeout = getattr(error, "timeout", None)
+        self.log.add(
+            UsageRecord(
+                project=self.project,
+                test=self.test,
+                command=_command_name(args),
+                args=self._args(runner, args),
+                exit_code=None,
+                cached=False,
+                timed_out=timeout is not None,
+                wall_seconds=float(timeout) if timeout is not None else None,
+                user_seconds=None,
+                system_seconds=None,
+                max_rss_kb=None,
+                stdout_bytes=None,
+                stderr_bytes=None,
+            ),
+        )
+
+
+class UsageLog:
+    """Thread-safe collection of :class:`UsageRecord` for one session."""
+
+    def __init__(self) -> None:
+        self.records: list[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def listener(self, *, project: str, test: str) -> NitListener:
+        """Listener that attributes commands to *project* and *test*."""
+        return _UsageListener(self, project, test)
+
+    def add(self, record: UsageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def summarize(self) -> list[UsageSummary]:
+        """Per (project, command) totals, most expensive wall time first."""
+        groups: dict[tuple[str, str], list[UsageRecord]] = defaultdict(list)
+        with self._lock:
+            for record in self.records:
+                groups[(record.project, record.command)].append(record)
+
+        summaries = [
+            UsageSummary(
+                project=project,
+                command=command,
+                calls=len(records),
+                cached=sum(r.cached for r in records),
+                wall_seconds=sum(r.wall_seconds or 0.0 for r in records),
+                cpu_seconds=sum(
+                    (r.user_seconds or 0.0) + (r.system_seconds or 0.0)
+                    for r in records
+                ),
+                max_rss_kb=max((r.max_rss_kb or 0 for r in records), default=0),
+            )
+            for (project, command), records in groups.items()
+        ]
+        return sorted(summaries, key=lambda s: s.wall_seconds, reverse=True)
+
+    def write(self, directory: Path, stem: str) -> tuple[Path, Path]:
+        """Write ``<stem>.json`` and ``<stem>.csv`` into *directory*."""
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            rows = [asdict(r) for r in self.records]
+
+        json_path = directory / f"{stem}.json"
+        json_path.write_text(
+            json.dumps(
+                {
+                    "records": rows,
+                    "summary": [asdict(s) for s in self.summarize()],
+                },
+                indent=2,
+            )
+            + "\n",
+        )
+
+        csv_path = directory / f"{stem}.csv"
+        with csv_path.open("w", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=[f.name for f in fields(UsageRecord)])
+            writer.writeheader()
+            writer.writerows(rows)
+        return json_path, csv_path